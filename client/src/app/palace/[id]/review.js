@@ -11,6 +11,9 @@ import {
 } from 'react-native';
 import { apiClient } from '../../../../services/apiClient';
 
+// Cards downloaded when a session starts, answers append one more each
+const SESSION_BATCH_SIZE = 10;
+
 export default function ReviewScreen() {
   const { id: currentPalaceId } = useLocalSearchParams();
   const {
@@ -28,21 +31,29 @@ export default function ReviewScreen() {
   // Which answer button to show spinner on when submitting
   const [spinnerButtonIndex, setSpinnerButtonIndex] = useState(null);
 
+  // Review session cursor: every answer returns the next card to append,
+  // the due cards are downloaded only once per session
+  const sessionCursor = useRef(null);
+  const [remaining, setRemaining] = useState(0);
+
   const refetchQuestions = useCallback(async () => {
     setIsLoading(true);
     setSpinnerButtonIndex('refetch');
     setError('');
 
     try {
-      const flashcards = await apiClient(
-        `/api/palaces/${currentPalaceId}/flashcards?onlyInReview=true`,
+      const session = await apiClient(
+        `/api/palaces/${currentPalaceId}/review-session/`,
         {
-          method: 'GET',
+          method: 'POST',
+          body: { size: SESSION_BATCH_SIZE },
         }
       );
 
+      sessionCursor.current = session.session;
+      setRemaining(session.due);
       clearFlashcardsQueue();
-      for (const question of flashcards) {
+      for (const question of session.flashcards) {
         pushFlashcard(question);
       }
     } catch (err) {
@@ -62,12 +73,22 @@ export default function ReviewScreen() {
     setError('');
 
     try {
-      await apiClient(`/api/flashcards/${currentFlashcard.id}/review/`, {
-        method: 'POST',
-        body: { grade },
-      });
+      const result = await apiClient(
+        `/api/flashcards/${currentFlashcard.id}/review/`,
+        {
+          method: 'POST',
+          body: { grade, session: sessionCursor.current },
+        }
+      );
       setShowAnswer(false);
       popFlashcard();
+      setRemaining(count => Math.max(count - 1, 0));
+      if (result.session) {
+        sessionCursor.current = result.session.cursor;
+        for (const question of result.session.flashcards) {
+          pushFlashcard(question);
+        }
+      }
     } catch {
       setError(
         'Something went wrong when updating flashcard. Please try again.'
@@ -103,7 +124,7 @@ export default function ReviewScreen() {
         <Text style={styles.headerTitle}>{showAnswer}</Text>
         <View style={styles.scoreBadge}>
           <Text style={styles.scoreText}>
-            Remaining: {flashcardsLength} flashcards
+            Remaining: {remaining} flashcards
           </Text>
 
           <Pressable style={styles.refetchButton} onPress={refetchQuestions}>
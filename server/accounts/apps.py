@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.models.signals import post_delete, post_save
+        from .authentication import invalidate_user
+
+        post_save.connect(invalidate_user, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(invalidate_user, sender=settings.AUTH_USER_MODEL)
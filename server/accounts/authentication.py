@@ -0,0 +1,133 @@
+"""
+JWT authentication without a user query per request.
+
+CachedJWTAuthentication validates the token like simplejwt's
+JWTAuthentication, but takes the user row from a small in-process cache
+(bounded LRU, entries live settings.USER_CACHE_TTL seconds) instead of
+selecting it on every request. A miss loads the row once.
+
+Saving or deleting a user (e.g. deactivating it) drops its entry in this
+process; other processes see the change within USER_CACHE_TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    user id (str) -> user row (values of the concrete fields), LRU bounded by
+    settings.USER_CACHE_SIZE, entries expire after settings.USER_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._rows.get(user_id)
+            if entry is None:
+                return None
+            expires, row = entry
+            if expires < time.monotonic():
+                del self._rows[user_id]
+                return None
+            self._rows.move_to_end(user_id)
+            return row
+
+    def set(self, user_id, row):
+        ttl = getattr(settings, "USER_CACHE_TTL", 30)
+        size = getattr(settings, "USER_CACHE_SIZE", 10000)
+        if ttl <= 0 or size <= 0:
+            return
+        with self._lock:
+            self._rows[user_id] = (time.monotonic() + ttl, row)
+            self._rows.move_to_end(user_id)
+            while len(self._rows) > size:
+                self._rows.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._rows.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(sender, instance, **kwargs):
+    """
+    post_save / post_delete receiver for the user model (see AccountsConfig.ready).
+    """
+    user_id = str(getattr(instance, jwt_settings.USER_ID_FIELD))
+    user_cache.invalidate(user_id)
+    # a request running concurrently may have cached the old row meanwhile
+    transaction.on_commit(lambda: user_cache.invalidate(user_id), using=router.db_for_write(sender))
+
+
+def _fields(user_model):
+    return [field.attname for field in user_model._meta.concrete_fields]
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with the user row served from user_cache (same checks).
+    """
+
+    def user_id(self, validated_token):
+        # cache key, tokens carry the id as a string
+        try:
+            return str(validated_token[jwt_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+    def row_queryset(self, user_id):
+        return self.user_model.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).values_list(
+            *_fields(self.user_model)
+        )[:1]
+
+    def user_from_row(self, validated_token, row):
+        if row is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        # a fresh instance per request, views may change it
+        user = self.user_model.from_db(router.db_for_read(self.user_model), _fields(self.user_model), row)
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+
+        return user
+
+    def get_user(self, validated_token):
+        user_id = self.user_id(validated_token)
+        row = user_cache.get(user_id)
+        if row is None:
+            row = next(iter(self.row_queryset(user_id)), None)
+            if row is not None:
+                user_cache.set(user_id, row)
+        return self.user_from_row(validated_token, row)
+
+    async def aget_user(self, validated_token):
+        user_id = self.user_id(validated_token)
+        row = user_cache.get(user_id)
+        if row is None:
+            row = next(iter([row async for row in self.row_queryset(user_id)]), None)
+            if row is not None:
+                user_cache.set(user_id, row)
+        return self.user_from_row(validated_token, row)
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+def users_by_email(email):
+    """
+    Users with this email, ignoring case. Matches the unique index on
+    UPPER(email) WHERE email <> '' (accounts/migrations/0001_email_index.py).
+    """
+    return get_user_model()._default_manager.filter(email__iexact=email).exclude(email="")
+
+
+class EmailBackend(ModelBackend):
+    """
+    authenticate(request, email=..., password=...): the user is looked up and
+    verified with one indexed query, usernames are left to ModelBackend.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if not email or password is None:
+            return None
+
+        user = next(iter(users_by_email(email)[:1]), None)
+        if user is None:
+            # hash anyway, unknown emails should take as long as wrong passwords
+            get_user_model()().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:20
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # email lookups ignore case (accounts.backends.users_by_email); users without
+        # an email (createsuperuser allows that) are left out. Fails if two accounts
+        # share an email in different case, those have to be merged first.
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS auth_user_email_upper_uniq "
+            "ON auth_user (UPPER(email)) WHERE email <> ''",
+            "DROP INDEX CONCURRENTLY IF EXISTS auth_user_email_upper_uniq",
+        ),
+    ]
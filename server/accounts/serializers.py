@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+
+from .backends import users_by_email
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -9,7 +12,7 @@ class RegisterSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True, min_length=8)
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        if users_by_email(value).exists():
             raise serializers.ValidationError(
                 "Email already in use.",
                 code="conflict"
@@ -17,11 +20,21 @@ class RegisterSerializer(serializers.Serializer):
         return value
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data["name"],
-            email=validated_data["email"],
-            password=validated_data["password"]
-        )
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=validated_data["name"],
+                    email=validated_data["email"],
+                    password=validated_data["password"]
+                )
+        except IntegrityError:
+            # another registration took the email since validate_email
+            if users_by_email(validated_data["email"]).exists():
+                raise serializers.ValidationError(
+                    {"email": ["Email already in use."]},
+                    code="conflict"
+                )
+            raise
         return user
 
 
@@ -33,29 +46,20 @@ class LoginSerializer(serializers.Serializer):
         email = data.get("email")
         password = data.get("password")
 
-        user = User.objects.filter(email=email).first()
+        # accounts.backends.EmailBackend, one query
+        user = authenticate(self.context.get("request"), email=email, password=password)
 
         if user is None:
-            raise serializers.ValidationError(
-                "Invalid email or password.",
-                code="authentication_failed"
-            )
-
-        if not user.is_active:
-            raise serializers.ValidationError(
-                "Account is disabled.",
-                code="account_disabled"
-            )
-
-        authenticated_user = authenticate(username=user.username, password=password)
-
-        if authenticated_user is None:
+            if users_by_email(email).filter(is_active=False).exists():
+                raise serializers.ValidationError(
+                    "Account is disabled.",
+                    code="account_disabled"
+                )
             raise serializers.ValidationError(
                 "Invalid email or password.",
                 code="authentication_failed"
             )
 
         # Store user in validated_data for view to access
-        data['user'] = authenticated_user
+        data['user'] = user
         return data
-
@@ -1,3 +1,145 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import UserCache, user_cache
+from api.models import UserPalace
+
+
+class EmailLoginTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="login", email="Login@Example.com", password="password123"
+        )
+
+    def login(self, email, password="password123"):
+        return self.client.post("/api/auth/login/", {"email": email, "password": password}, format="json")
+
+    def test_login_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.login("login@example.com")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("token", response.data)
+
+    def test_failed_logins(self):
+        self.assertEqual(self.login("login@example.com", "wrong-password").status_code, 401)
+        self.assertEqual(self.login("nobody@example.com").status_code, 401)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.login("login@example.com")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["non_field_errors"][0].code, "account_disabled")
+
+    def test_username_login_still_works(self):
+        self.assertEqual(authenticate(username="login", password="password123"), self.user)
+
+    def test_register_conflict_ignores_case(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            {"email": "LOGIN@example.com", "name": "other", "password": "password123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+
+    def test_unique_index(self):
+        # users without an email are not constrained
+        User.objects.create_user(username="blank1")
+        User.objects.create_user(username="blank2")
+
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user(username="copy", email="LOGIN@example.COM")
+
+    def test_login_query_uses_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.login("LOGIN@example.com")
+        (sql,) = [query["sql"] for query in queries]
+
+        # a test table is too small for the planner to prefer any index on its own
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("Index Scan using auth_user_email_upper_uniq", plan)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username="cached", email="cached@example.com", password="password123"
+        )
+        UserPalace.objects.create(user=self.user, name="Palace")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries]
+
+    def test_user_loaded_once(self):
+        first = self.queries("/api/flashcards/")
+        self.assertIn("auth_user", first[0])
+
+        second = self.queries("/api/flashcards/")
+        self.assertEqual(second, first[1:])
+
+    def test_deactivated_user_rejected(self):
+        self.client.get("/api/palaces/")
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/api/palaces/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "user_inactive")
+
+    def test_deleted_user_rejected(self):
+        self.client.get("/api/palaces/")
+        self.user.delete()
+
+        response = self.client.get("/api/palaces/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "user_not_found")
+
+    @override_settings(ROOT_URLCONF="api.tests.test_async_views")
+    def test_async_views(self):
+        self.assertIn("auth_user", self.queries("/api/flashcards/queue/")[0])
+        self.assertFalse(any("auth_user" in sql for sql in self.queries("/api/flashcards/queue/")))
+
+    @override_settings(USER_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        self.client.get("/api/flashcards/")
+        self.assertIn("auth_user", self.queries("/api/flashcards/")[0])
+
+
+class UserCacheTests(APITestCase):
+
+    @override_settings(USER_CACHE_TTL=30, USER_CACHE_SIZE=2)
+    def test_bounded_lru(self):
+        cache = UserCache()
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        self.assertEqual((cache.get(1), cache.get(2), cache.get(3)), ("a", None, "c"))
+
+    @override_settings(USER_CACHE_TTL=30)
+    def test_expiry(self):
+        cache = UserCache()
+        with mock.patch("accounts.authentication.time.monotonic", return_value=100):
+            cache.set(1, "a")
+        with mock.patch("accounts.authentication.time.monotonic", return_value=129):
+            self.assertEqual(cache.get(1), "a")
+        with mock.patch("accounts.authentication.time.monotonic", return_value=131):
+            self.assertIsNone(cache.get(1))
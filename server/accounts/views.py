@@ -1,6 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from .serializers import RegisterSerializer, LoginSerializer
 from rest_framework_simplejwt.tokens import AccessToken
@@ -16,7 +17,11 @@ class RegisterView(APIView):
                 return Response(serializer.errors, status=status.HTTP_409_CONFLICT)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except ValidationError as e:
+            # lost a race for the email
+            return Response(e.detail, status=status.HTTP_409_CONFLICT)
 
         token  = AccessToken.for_user(user)
 
@@ -31,7 +36,7 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={"request": request})
 
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import UserPalace, PalaceTemplate, Furniture, Flashcard
+from .models import UserPalace, PalaceTemplate, Furniture, Flashcard, FlashcardReview
 
 admin.site.register(UserPalace)
 admin.site.register(PalaceTemplate)
 admin.site.register(Furniture)
 admin.site.register(Flashcard)
+admin.site.register(FlashcardReview)
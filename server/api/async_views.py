@@ -0,0 +1,313 @@
+"""
+Async variants of the hot read / review endpoints, on Django's async ORM.
+
+Served instead of the DRF actions when settings.ASYNC_VIEWS is on (run the
+project under ASGI then, see README). They answer exactly like
+
+    GET  /flashcards/queue/           FlashcardViewSet.queue
+    POST /flashcards/<id>/review/     FlashcardViewSet.review
+    GET  /palaces/<id>/flashcards/    UserPalaceViewSet.flashcards
+
+including JWT authentication, ETag / If-None-Match / If-Match, keyset
+pagination and ?fields=, but the number of requests in flight is not capped
+by a fixed set of worker threads. The ORM calls still run on a thread of the
+request (Django's async ORM is sync_to_async underneath), so the database
+pool (DB_POOL_MAX_SIZE) is the limit. Every middleware has to be async
+capable for this, see settings.SERVER.
+
+DRF views are sync only, so these are plain Django views: they authenticate,
+negotiate the renderer and shape errors the way DRF does.
+"""
+
+from functools import wraps
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings as drf_settings
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .conditional import PreconditionFailed, aresource_validators, set_validators
+from .fast_serializers import fast_serializer
+from .fieldsets import field_tree
+from .instrumentation import timed
+from .models import UserPalace, Flashcard
+from .pagination import KeysetPagination
+from .serializers import FlashcardSerializer
+from .services.review_session import InvalidSession, anext_batch, continuation, dump_session
+from .services.reviews import SCHEDULING_FIELDS
+from .services.spaced_repetition import apply_sm2_batch
+from .services.review_load import aspread_reviews
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    CachedJWTAuthentication for the async views, a cache miss loads the user on the async ORM.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        return await self.aget_user(self.get_validated_token(raw_token))
+
+
+def _renderers():
+    # the browsable API needs a DRF view, async views answer in the API formats only
+    renderers = [
+        renderer() for renderer in drf_settings.DEFAULT_RENDERER_CLASSES
+        if renderer.format != "api"
+    ]
+    return renderers or [JSONRenderer()]
+
+
+def negotiate(request, api_request):
+    """
+    Pick the renderer for the Accept header, like DRF's perform_content_negotiation().
+    The Django request gets it too: the ETag depends on the format.
+    """
+    renderers = _renderers()
+    try:
+        renderer, media_type = DefaultContentNegotiation().select_renderer(api_request, renderers)
+    except exceptions.NotAcceptable:
+        renderer, media_type = renderers[0], renderers[0].media_type
+
+    api_request.accepted_renderer, api_request.accepted_media_type = renderer, media_type
+    request.accepted_renderer = renderer
+
+
+def render(api_request, data, status_code=status.HTTP_200_OK):
+    """
+    Render data like a DRF Response: negotiated renderer, same bytes and headers.
+    """
+    renderer, media_type = api_request.accepted_renderer, api_request.accepted_media_type
+
+    with timed("render"):
+        content = renderer.render(data, media_type, {"request": api_request})
+    content_type = media_type
+    if renderer.charset:
+        content_type = f"{media_type}; charset={renderer.charset}"
+
+    return HttpResponse(content, status=status_code, content_type=content_type)
+
+
+def _error_response(api_request, exc, headers):
+    if isinstance(exc, Http404):
+        exc = exceptions.NotFound(*exc.args)
+
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # DRF answers 401 with the authenticator's challenge
+        exc.status_code = status.HTTP_401_UNAUTHORIZED
+        headers["WWW-Authenticate"] = AsyncJWTAuthentication().authenticate_header(api_request)
+
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    return render(api_request, data, exc.status_code)
+
+
+def api_view(methods):
+    """
+    Turns `async def view(request, api_request, **kwargs)` into an authenticated
+    JSON endpoint: request.user is set, APIExceptions / Http404 become
+    DRF-shaped error responses, other methods get 405.
+    """
+    allow = ", ".join(methods)
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, **kwargs):
+            api_request = Request(request, parsers=[parser() for parser in drf_settings.DEFAULT_PARSER_CLASSES])
+            headers = {"Allow": allow}
+            negotiate(request, api_request)
+            try:
+                # DRF authenticates before it looks at the method
+                user = await AsyncJWTAuthentication().aauthenticate(request)
+                if user is None:
+                    raise exceptions.NotAuthenticated()
+                request.user = user
+
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+
+                response = await view(request, api_request, **kwargs)
+            except (exceptions.APIException, Http404) as exc:
+                response = _error_response(api_request, exc, headers)
+
+            for name, value in headers.items():
+                response.setdefault(name, value)
+            if len(drf_settings.DEFAULT_RENDERER_CLASSES) > 1:
+                patch_vary_headers(response, ["Accept"])
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _pk(model, value):
+    # same answer DRF gives for ids that are not numbers
+    try:
+        return model._meta.pk.to_python(value)
+    except DjangoValidationError:
+        raise Http404
+
+
+async def _conditional(request, api_request, queryset, respond, scope, digest_ids=False):
+    """
+    ConditionalMixin.conditional() for async views.
+    """
+    etag, last_modified = await aresource_validators(
+        request, queryset, scope=scope, query=request.GET.urlencode(), digest_ids=digest_ids
+    )
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await respond()
+    return set_validators(response, etag, timestamp)
+
+
+async def _flashcard_list(request, api_request, queryset):
+    """
+    Optionally paginated, sparse-fieldset aware list of flashcards.
+    """
+    # flashcards have no nested relations, from_instances() does not query
+    serializer = fast_serializer(FlashcardSerializer, field_tree(FlashcardSerializer, request.GET))
+
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(queryset, api_request)
+    if page is not None:
+        with timed("serialize"):
+            data = serializer.from_instances(page)
+        return render(api_request, {"next": paginator.get_next_link(), "results": data})
+
+    cards = [card async for card in queryset]
+    with timed("serialize"):
+        data = serializer.from_instances(cards)
+    return render(api_request, data)
+
+
+@api_view(["GET", "HEAD"])
+async def flashcard_queue(request, api_request):
+    """
+    GET /flashcards/queue/ (see FlashcardViewSet.queue)
+    """
+    furniture_id = request.GET.get("furnitureId")
+    now = timezone.now()
+
+    cards = Flashcard.objects.filter(user=request.user)
+
+    if furniture_id:
+        cards = cards.filter(furniture_id=furniture_id)
+
+    due_cards = cards.filter(next_review__lte=now).order_by("next_review", "id")
+
+    return await _conditional(
+        request, api_request, due_cards,
+        lambda: _flashcard_list(request, api_request, due_cards),
+        scope="queue",
+        digest_ids=True,
+    )
+
+
+@api_view(["GET", "HEAD"])
+async def palace_flashcards(request, api_request, pk):
+    """
+    GET /palaces/<id>/flashcards/?onlyInReview=true|false (see UserPalaceViewSet.flashcards)
+    """
+    try:
+        palace = await UserPalace.objects.filter(user=request.user).aget(pk=_pk(UserPalace, pk))
+    except UserPalace.DoesNotExist:
+        raise Http404("No UserPalace matches the given query.")
+
+    only_in_review = request.GET.get("onlyInReview", "false").lower() == "true"
+    now = timezone.now()
+
+    qs = Flashcard.objects.filter(user=request.user, furniture__palace=palace)
+
+    if only_in_review:
+        qs = qs.filter(next_review__lte=now)
+
+    qs = qs.order_by("next_review", "id")
+
+    return await _conditional(
+        request, api_request, qs,
+        lambda: _flashcard_list(request, api_request, qs),
+        scope="flashcards",
+        digest_ids=only_in_review,
+    )
+
+
+@api_view(["POST"])
+async def flashcard_review(request, api_request, pk):
+    """
+    POST /flashcards/<id>/review/ (see FlashcardViewSet.review)
+    """
+    cards = Flashcard.objects.filter(user=request.user)
+    try:
+        card = await cards.aget(pk=_pk(Flashcard, pk))
+    except Flashcard.DoesNotExist:
+        raise Http404("No Flashcard matches the given query.")
+
+    if_match = request.META.get("HTTP_IF_MATCH")
+    if if_match:
+        # same validator GET /flashcards/<id>/ returned
+        etag, _ = await aresource_validators(request, Flashcard.objects.filter(pk=card.pk), scope="object")
+        etags = parse_etags(if_match)
+        if "*" not in etags and etag not in etags:
+            raise PreconditionFailed()
+
+    # parsing only reads the body, it is safe in the event loop
+    data = api_request.data
+    grade = data.get("grade")
+    if grade is None:
+        return render(api_request, {"error": "grade is required"}, 400)
+
+    try:
+        grade = int(grade)
+    except ValueError:
+        return render(api_request, {"error": "grade must be an integer"}, 400)
+
+    if not (0 <= grade <= 5):
+        return render(api_request, {"error": "grade must be between 0 and 5"}, 400)
+
+    try:
+        session, size = continuation(data, request.user)
+    except InvalidSession as exc:
+        return render(api_request, {"error": str(exc)}, 400)
+
+    updated = await aspread_reviews(request.user, [card.id], apply_sm2_batch(
+        [card.repetition], [card.interval], [card.ease_factor], [grade]
+    ))
+
+    card.repetition = updated["repetition"][0]
+    card.interval = updated["interval"][0]
+    card.ease_factor = updated["ease_factor"][0]
+    card.next_review = updated["next_review"][0]
+    card.last_reviewed_at = timezone.now()
+    await card.asave(update_fields=SCHEDULING_FIELDS)
+
+    data = {
+        "message": "Review updated successfully",
+        "flashcard": FlashcardSerializer(card).data
+    }
+    if session is not None:
+        cards, session = await anext_batch(request.user, session, size)
+        data["session"] = {
+            "cursor": dump_session(session),
+            "flashcards": FlashcardSerializer(cards, many=True).data,
+        }
+    return render(api_request, data, 200)
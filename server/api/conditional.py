@@ -0,0 +1,160 @@
+import hashlib
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, TextField
+from django.db.models.functions import MD5, Cast
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "Resource has been modified."
+    default_code = "precondition_failed"
+
+
+def _aggregates(related, digest_ids):
+    aggregates = {"count": Count("pk", distinct=bool(related)), "last": Max("updated_at")}
+    for i, lookup in enumerate(related):
+        aggregates[f"count_{i}"] = Count(lookup, distinct=True)
+        aggregates[f"last_{i}"] = Max(f"{lookup}__updated_at")
+    if digest_ids:
+        aggregates["ids"] = MD5(StringAgg(Cast("pk", TextField()), ",", order_by="pk"))
+    return aggregates
+
+
+def _validators(request, queryset, state, scope, query, digest_ids):
+    modified = [value for key, value in state.items() if key.startswith("last") and value is not None]
+    # rows can join the set without being modified, no date can tell the client it is unchanged
+    last_modified = max(modified) if modified and not digest_ids else None
+
+    parts = [str(request.user.pk), queryset.model._meta.label, scope, query]
+    renderer = getattr(request, "accepted_renderer", None)
+    if renderer is not None and renderer.format != "json":
+        # another representation (MessagePack, browsable API), another validator
+        parts.append(renderer.format)
+    parts += [f"{key}={state[key]}" for key in sorted(state)]
+    etag = '"%s"' % hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+    return etag, last_modified
+
+
+def resource_validators(request, queryset, related=(), scope="", query="", digest_ids=False):
+    """
+    Strong ETag and Last-Modified of the rows in queryset (plus the related
+    lookups, e.g. "furniture__flashcards"), from a single aggregate query:
+    row counts catch deletes, max(updated_at) catches inserts and updates.
+
+    digest_ids: queryset depends on the clock (next_review <= now), so rows
+    join it without changing and the same count and max(updated_at) can
+    describe other rows. The ETag then covers a digest of the ids, and there
+    is no Last-Modified.
+
+    Returns (etag, last_modified datetime or None).
+    """
+    state = queryset.order_by().aggregate(**_aggregates(related, digest_ids))
+    return _validators(request, queryset, state, scope, query, digest_ids)
+
+
+async def aresource_validators(request, queryset, related=(), scope="", query="", digest_ids=False):
+    """
+    Async version of resource_validators (same validators).
+    """
+    state = await queryset.order_by().aaggregate(**_aggregates(related, digest_ids))
+    return _validators(request, queryset, state, scope, query, digest_ids)
+
+
+def set_validators(response, etag, timestamp):
+    """
+    Add ETag / Last-Modified (epoch seconds or None) to 200 and 304 responses.
+    """
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+    return response
+
+
+class ConditionalMixin:
+    """
+    ETag / Last-Modified support for viewsets.
+
+    - list and retrieve answer If-None-Match / If-Modified-Since with 304
+      before anything is serialized,
+    - extra read actions opt in through self.conditional(queryset, respond),
+    - writes going through get_object() honour If-Match (412 on mismatch).
+
+    etag_related: related lookups whose rows are part of the representation.
+    respond() can read the aggregate the validators were computed from
+    in self.resource_state (see _aggregates for the keys).
+    """
+    etag_related = ()
+
+    def conditional(self, queryset, respond, related=(), scope="", digest_ids=False):
+        request = self.request
+        self.resource_state = queryset.order_by().aggregate(**_aggregates(related, digest_ids))
+        etag, last_modified = _validators(
+            request, queryset, self.resource_state, scope, request.GET.urlencode(), digest_ids
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = respond()
+        return set_validators(response, etag, timestamp)
+
+    def lookup_value(self):
+        """
+        The object id from the URL, converted like get_object() would.
+        """
+        opts = self.get_queryset().model._meta
+        field = opts.pk if self.lookup_field == "pk" else opts.get_field(self.lookup_field)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return field.to_python(self.kwargs[lookup_url_kwarg])
+        except ValidationError:
+            # same answer get_object() gives for a malformed id
+            raise Http404
+
+    def object_queryset(self):
+        return self.get_queryset().filter(**{self.lookup_field: self.lookup_value()})
+
+    def list(self, request, *args, **kwargs):
+        respond = super().list
+        return self.conditional(
+            self.filter_queryset(self.get_queryset()),
+            lambda: respond(request, *args, **kwargs),
+            related=self.etag_related,
+            scope="list",
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        respond = super().retrieve
+        return self.conditional(
+            self.object_queryset(),
+            lambda: respond(request, *args, **kwargs),
+            related=self.etag_related,
+            scope="object",
+        )
+
+    def get_object(self):
+        obj = super().get_object()
+
+        if_match = self.request.META.get("HTTP_IF_MATCH")
+        if if_match and self.request.method not in SAFE_METHODS:
+            # same validator GET /<resource>/<id>/ returned
+            etag, _ = resource_validators(
+                self.request,
+                type(obj).objects.filter(pk=obj.pk),
+                self.etag_related,
+                scope="object",
+            )
+            etags = parse_etags(if_match)
+            if "*" not in etags and etag not in etags:
+                raise PreconditionFailed()
+
+        return obj
@@ -0,0 +1,160 @@
+"""
+Read-only fast path for the hot list endpoints.
+
+FastSerializer compiles a ModelSerializer's fields once into a plan of
+(output name, model column, converter) and then builds the output from
+values_list() tuples (or plain attribute reads of fetched instances), with
+no per-field DRF machinery. The output is the same as the serializer's
+(same keys, order and values), so the rendered JSON is byte-identical.
+
+Only plain model fields, primary-key relations, datetimes and nested
+many=True model serializers are supported, anything else fails at import.
+
+Nested lists come out ordered by primary key. The DRF serializer gets the
+same order from the prefetches of ordered_prefetch().
+"""
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import relations, serializers
+
+
+def _datetime(value):
+    # DateTimeField.to_representation with the default ISO 8601 format
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class FastSerializer:
+    def __init__(self, serializer_class, tree=None, _plan=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.pk = self.model._meta.pk.attname
+        # [(name, column or None for nested, converter, nested FastSerializer, related fk column)]
+        self.plan = _plan if _plan is not None else self._compile(serializer_class)
+        if tree is not None:
+            self.plan = self._restrict(self.plan, tree)
+
+        self.names = [entry[0] for entry in self.plan]
+        self.columns = [entry[1] or self.pk for entry in self.plan]
+        self.datetimes = [entry[0] for entry in self.plan if entry[2] is _datetime]
+        self.nested = [(entry[0], entry[3], entry[4]) for entry in self.plan if entry[3] is not None]
+
+    @staticmethod
+    def _compile(serializer_class):
+        plan = []
+        model = serializer_class.Meta.model
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                child = field.child
+                related = model._meta.get_field(field.source).field
+                plan.append((name, None, None, FastSerializer(type(child)), related.attname))
+            elif isinstance(field, relations.PrimaryKeyRelatedField):
+                plan.append((name, model._meta.get_field(field.source).attname, None, None, None))
+            elif isinstance(field, serializers.DateTimeField):
+                if getattr(field, "format", serializers.empty) not in (serializers.empty, None, "iso-8601"):
+                    raise ValueError(f"{serializer_class.__name__}.{name}: custom datetime formats are not supported")
+                plan.append((name, model._meta.get_field(field.source).attname, _datetime, None, None))
+            elif isinstance(field, (
+                serializers.IntegerField, serializers.FloatField, serializers.CharField,
+                serializers.JSONField, serializers.BooleanField, serializers.ModelField,
+            )):
+                plan.append((name, model._meta.get_field(field.source).attname, None, None, None))
+            else:
+                raise ValueError(f"{serializer_class.__name__}.{name}: {type(field).__name__} is not supported")
+        return plan
+
+    @staticmethod
+    def _restrict(plan, tree):
+        restricted = []
+        for name, column, convert, nested, related in plan:
+            if name not in tree:
+                continue
+            if nested is not None and tree[name] is not None:
+                nested = FastSerializer(nested.serializer_class, tree[name], _plan=nested.plan)
+            restricted.append((name, column, convert, nested, related))
+        return restricted
+
+    def _finish(self, rows, ids):
+        """
+        Convert datetimes and attach the nested lists (one query per nested relation).
+        """
+        for name in self.datetimes:
+            for row in rows:
+                value = row[name]
+                if value is not None:
+                    row[name] = _datetime(value)
+
+        for name, nested, related in self.nested:
+            children = {parent_id: [] for parent_id in ids}
+            queryset = nested.model._default_manager.filter(**{f"{related}__in": ids}).order_by(nested.pk)
+            for parent_id, child in nested._values(queryset, extra=[related]):
+                children[parent_id].append(child)
+            for row, parent_id in zip(rows, ids):
+                row[name] = children[parent_id]
+        return rows
+
+    def _values(self, queryset, extra=()):
+        """
+        Returns the rows, or (extra column value, row) pairs for extra=[column].
+        """
+        columns = self.columns + [self.pk] + list(extra)
+        names = self.names
+        raw = list(queryset.values_list(*columns))
+        rows = [dict(zip(names, values)) for values in raw]
+        ids = [values[len(names)] for values in raw]
+        self._finish(rows, ids)
+        if extra:
+            return [(values[-1], row) for values, row in zip(raw, rows)]
+        return rows
+
+    def from_queryset(self, queryset):
+        """
+        Serialize the rows of queryset (its filters and ordering are kept, prefetches are ignored).
+        """
+        return self._values(queryset.prefetch_related(None))
+
+    def from_instances(self, instances):
+        """
+        Serialize already fetched instances (e.g. a page), nested relations are queried.
+        """
+        instances = list(instances)
+        rows = [
+            {name: getattr(obj, column) for name, column in zip(self.names, self.columns)}
+            for obj in instances
+        ]
+        return self._finish(rows, [getattr(obj, self.pk) for obj in instances])
+
+
+_compiled = {}
+
+
+def fast_serializer(serializer_class, tree=None):
+    """
+    The compiled FastSerializer of serializer_class, restricted to a field tree (see api.fieldsets).
+    """
+    base = _compiled.get(serializer_class)
+    if base is None:
+        base = _compiled[serializer_class] = FastSerializer(serializer_class)
+    if tree is None:
+        return base
+    return FastSerializer(serializer_class, tree, _plan=base.plan)
+
+
+def ordered_prefetch(model, *lookups):
+    """
+    prefetch_related() arguments for lookups of model ("furniture__flashcards"),
+    every relation on the way ordered by primary key like the nested lists above.
+    """
+    prefetches = {}
+    for lookup in lookups:
+        related, path = model, []
+        for name in lookup.split("__"):
+            related = related._meta.get_field(name).related_model
+            path.append(name)
+            key = "__".join(path)
+            if key not in prefetches:
+                prefetches[key] = Prefetch(key, queryset=related._default_manager.order_by(related._meta.pk.name))
+    return list(prefetches.values())
@@ -0,0 +1,164 @@
+"""
+Sparse fieldsets: ?fields= and ?expand= query parameters.
+
+    ?fields=id,name,furniture.name      only these fields (dotted paths reach into nested serializers)
+    ?expand=furniture                   nested serializers to include, unlisted ones are left out
+    ?expand=                            no nested serializers at all
+
+Without both parameters the full representation is returned.
+The resolved field tree also decides which relations get prefetched.
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .fast_serializers import fast_serializer
+from .instrumentation import timed
+
+
+def _split(value):
+    return {path.strip() for path in value.split(",") if path.strip()}
+
+
+def _selected(path, fields):
+    return (
+        path in fields
+        # an ancestor was selected: take the whole subtree
+        or any(path.startswith(field + ".") for field in fields)
+        # a descendant was selected: keep the path to it
+        or any(field.startswith(path + ".") for field in fields)
+    )
+
+
+def _all_paths(serializer, prefix=""):
+    paths = set()
+    for name, field in serializer.fields.items():
+        path = prefix + name
+        paths.add(path)
+        if isinstance(field, serializers.BaseSerializer):
+            paths |= _all_paths(getattr(field, "child", field), path + ".")
+    return paths
+
+
+def _build_tree(serializer, fields, expand, prefix=""):
+    tree = {}
+    for name, field in serializer.fields.items():
+        path = prefix + name
+        nested = isinstance(field, serializers.BaseSerializer)
+
+        if nested and expand is not None and path not in expand:
+            continue
+        if fields is not None and not _selected(path, fields):
+            continue
+
+        tree[name] = _build_tree(getattr(field, "child", field), fields, expand, path + ".") if nested else None
+    return tree
+
+
+def field_tree(serializer_class, query_params):
+    """
+    Returns the field tree for the request, or None for the full representation:
+    {"id": None, "furniture": {"name": None}} (dict = nested serializer, None = plain field)
+    """
+    fields = query_params.get("fields")
+    expand = query_params.get("expand")
+    if fields is None and expand is None:
+        return None
+
+    fields = _split(fields) if fields is not None else None
+    expand = _split(expand) if expand is not None else None
+
+    serializer = serializer_class()
+    known = _all_paths(serializer)
+    unknown = sorted((fields or set()) - known) + sorted((expand or set()) - known)
+    if unknown:
+        raise ValidationError({"fields": [f"Unknown field: {path}" for path in unknown]})
+
+    return _build_tree(serializer, fields, expand)
+
+
+def prefetch_lookups(tree, prefix=""):
+    """
+    Relations a field tree needs, as prefetch_related lookups: ["furniture", "furniture__flashcards"]
+    """
+    lookups = []
+    for name, subtree in tree.items():
+        if subtree is not None:
+            lookups.append(prefix + name)
+            lookups += prefetch_lookups(subtree, prefix + name + "__")
+    return lookups
+
+
+def restrict_fields(serializer, tree):
+    for name in list(serializer.fields):
+        if name not in tree:
+            serializer.fields.pop(name)
+        elif tree[name] is not None:
+            nested = serializer.fields[name]
+            restrict_fields(getattr(nested, "child", nested), tree[name])
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin accepting field_tree=... (see field_tree()).
+    """
+
+    def __init__(self, *args, **kwargs):
+        tree = kwargs.pop("field_tree", None)
+        super().__init__(*args, **kwargs)
+        if tree is not None:
+            restrict_fields(self, tree)
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin passing the request's field tree to get_serializer().
+    """
+
+    def get_field_tree(self, serializer_class=None):
+        if not hasattr(self, "_field_trees"):
+            self._field_trees = {}
+        serializer_class = serializer_class or self.get_serializer_class()
+        if serializer_class not in self._field_trees:
+            self._field_trees[serializer_class] = field_tree(serializer_class, self.request.query_params)
+        return self._field_trees[serializer_class]
+
+    def get_prefetch_lookups(self, default):
+        """
+        Prefetches for the current request: the ones the field tree needs, or default.
+        """
+        tree = self.get_field_tree()
+        return default if tree is None else prefetch_lookups(tree)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method in ("GET", "HEAD"):
+            kwargs.setdefault("field_tree", self.get_field_tree())
+        return super().get_serializer(*args, **kwargs)
+
+    def sparse_serializer(self, serializer_class, *args, **kwargs):
+        """
+        Serializer for extra actions returning another resource type.
+        """
+        kwargs.setdefault("field_tree", self.get_field_tree(serializer_class))
+        kwargs.setdefault("context", self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+    def fast_serializer(self, serializer_class=None):
+        """
+        Read-only FastSerializer (see api.fast_serializers) for the request's field tree.
+        """
+        serializer_class = serializer_class or self.get_serializer_class()
+        return fast_serializer(serializer_class, self.get_field_tree(serializer_class))
+
+    def fast_list(self, queryset, serializer_class=None, paginator=None):
+        """
+        Response with the (optionally paginated) queryset, serialized by the fast path.
+        """
+        serializer = self.fast_serializer(serializer_class)
+        paginator = paginator or self.paginator
+        page = paginator.paginate_queryset(queryset, self.request, view=self) if paginator else None
+        with timed("serialize"):
+            if page is not None:
+                return paginator.get_paginated_response(serializer.from_instances(page))
+            return Response(serializer.from_queryset(queryset))
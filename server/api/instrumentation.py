@@ -0,0 +1,333 @@
+"""
+Per-request performance instrumentation.
+
+InstrumentationMiddleware measures every request: database queries (count
+and time, through an execute wrapper installed on each connection),
+serialization and rendering time, total time and response size. They are
+
+- sent back in a Server-Timing header (settings.SERVER_TIMING, DEBUG by default), e.g.
+      Server-Timing: db;dur=3.1;desc="4 queries", serialize;dur=1.2, render;dur=0.4, total;dur=7.9
+- aggregated per route (the URL name, e.g. palace-flashcards) into
+  process-local counters and latency histograms, served in the Prometheus
+  text format by metrics_view (GET /metrics, needs settings.METRICS_TOKEN outside DEBUG),
+  together with the database connection pool statistics.
+
+The timings live in a context variable, so they follow a request into the
+async ORM's worker threads. Serialize time includes the queries the
+serializer triggers (nested relations).
+"""
+
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import serializers
+
+from . import palace_cache
+
+# seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+_lock = threading.Lock()
+_requests = defaultdict(int)       # (route, method, status) -> count
+_durations = {}                    # route -> [count per bucket..., +Inf], sum
+_totals = defaultdict(float)       # (name, route) -> sum
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "serialize", "render")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.serialize = self.render = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Connection execute wrapper: counts and times queries of instrumented requests.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver (see ApiConfig.ready).
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block to the current request's "serialize" / "render" timing.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, name, getattr(timings, name) + time.perf_counter() - start)
+
+
+class TimedDataMixin:
+    """
+    Serializer mixin: .data counts as serialize time.
+    """
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """
+    list_serializer_class of the TimedDataMixin serializers, for many=True.
+    """
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route
+
+
+def observe(route, method, status, timings, total, size):
+    with _lock:
+        _requests[route, method, status] += 1
+
+        histogram = _durations.get(route)
+        if histogram is None:
+            histogram = _durations[route] = [[0] * (len(DURATION_BUCKETS) + 1), 0.0]
+        buckets, _ = histogram
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if total <= bound:
+                buckets[i] += 1
+                break
+        else:
+            buckets[-1] += 1
+        histogram[1] += total
+
+        _totals["db_queries", route] += timings.queries
+        _totals["db_seconds", route] += timings.db
+        _totals["serialize_seconds", route] += timings.serialize
+        _totals["render_seconds", route] += timings.render
+        _totals["response_bytes", route] += size
+
+
+def reset():
+    with _lock:
+        _requests.clear()
+        _durations.clear()
+        _totals.clear()
+
+
+def server_timing(timings, total):
+    def ms(seconds):
+        return f"{seconds * 1000:.1f}"
+
+    return (
+        f'db;dur={ms(timings.db)};desc="{timings.queries} queries", '
+        f"serialize;dur={ms(timings.serialize)}, render;dur={ms(timings.render)}, total;dur={ms(total)}"
+    )
+
+
+class InstrumentationMiddleware:
+    """
+    Keep it first in MIDDLEWARE, so total covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def process_template_response(self, request, response):
+        # runs right before DRF / template responses are rendered
+        timings = _current.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.render += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, timings, total):
+        size = 0 if response.streaming else len(response.content)
+        observe(route_name(request), request.method, response.status_code, timings, total, size)
+        if getattr(settings, "SERVER_TIMING", settings.DEBUG):
+            response["Server-Timing"] = server_timing(timings, total)
+        return response
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        requests = sorted(_requests.items())
+        durations = sorted((route, (list(buckets), total)) for route, (buckets, total) in _durations.items())
+        totals = sorted(_totals.items())
+
+    lines = [
+        "# HELP http_requests_total Requests by route, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (route, method, status), count in requests:
+        lines.append(
+            f'http_requests_total{{route="{_label(route)}",method="{_label(method)}",status="{status}"}} {count}'
+        )
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for route, (buckets, total) in durations:
+        label = _label(route)
+        cumulative = 0
+        for bound, count in zip((*DURATION_BUCKETS, "+Inf"), buckets):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{route="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{route="{label}"}} {total}')
+        lines.append(f'http_request_duration_seconds_count{{route="{label}"}} {cumulative}')
+
+    descriptions = {
+        "db_queries": "Database queries by route.",
+        "db_seconds": "Time spent in database queries by route.",
+        "serialize_seconds": "Time spent in serializers by route.",
+        "render_seconds": "Time spent rendering responses by route.",
+        "response_bytes": "Response body bytes by route.",
+    }
+    for name, description in descriptions.items():
+        lines += [f"# HELP http_{name}_total {description}", f"# TYPE http_{name}_total counter"]
+        for (metric, route), value in totals:
+            if metric == name:
+                lines.append(f'http_{name}_total{{route="{_label(route)}"}} {value}')
+
+    cache_stats = palace_cache.stats()
+    lines += [
+        "# HELP palace_cache_operations_total Rendered palace cache hits and misses.",
+        "# TYPE palace_cache_operations_total counter",
+    ]
+    for name in sorted(cache_stats):
+        lines.append(f'palace_cache_operations_total{{result="{name}"}} {cache_stats[name]}')
+
+    lines += pool_metrics()
+
+    return "\n".join(lines) + "\n"
+
+
+# psycopg_pool statistics (ConnectionPool.get_stats()) that are gauges, the others count up
+POOL_GAUGES = {
+    "pool_min": "Minimum connections of the pool.",
+    "pool_max": "Maximum connections of the pool.",
+    "pool_size": "Connections managed by the pool (in use, idle or being opened).",
+    "pool_available": "Idle connections in the pool.",
+    "requests_waiting": "Requests waiting for a connection.",
+}
+POOL_COUNTERS = {
+    "requests_num": "Connections requested from the pool.",
+    "requests_queued": "Requests that had to wait for a connection.",
+    "requests_wait_ms": "Milliseconds spent waiting for a connection.",
+    "requests_errors": "Requests that got no connection (timeout or error).",
+    "usage_ms": "Milliseconds connections were in use.",
+    "returns_bad": "Connections returned to the pool in a bad state.",
+    "connections_num": "Connections opened by the pool.",
+    "connections_ms": "Milliseconds spent opening connections.",
+    "connections_errors": "Failed connection attempts.",
+    "connections_lost": "Connections found broken on checkout.",
+}
+
+
+def pool_metrics():
+    """
+    Statistics of the database connection pools (settings DB_POOL*), per alias.
+    """
+    stats = {}
+    for alias in connections:
+        if connections.settings[alias].get("OPTIONS", {}).get("pool"):
+            stats[alias] = connections[alias].pool.get_stats()
+
+    lines = []
+    for kind, names in (("gauge", POOL_GAUGES), ("counter", POOL_COUNTERS)):
+        for name, description in names.items():
+            metric = f"db_pool_{name.removeprefix('pool_')}" if kind == "gauge" else f"db_pool_{name}_total"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+            for alias in sorted(stats):
+                lines.append(f'{metric}{{alias="{_label(alias)}"}} {stats[alias].get(name, 0)}')
+    return lines
+
+
+def metrics_view(request):
+    """
+    GET /metrics. Scrapers send "Authorization: Bearer <settings.METRICS_TOKEN>".
+    Without a token configured the metrics are only served with DEBUG (404 otherwise),
+    they describe the traffic and the database pool.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token:
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        if not constant_time_compare(header, f"Bearer {token}"):
+            response = HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+            response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+            return response
+    elif not settings.DEBUG:
+        return HttpResponse("Not Found\n", status=404, content_type="text/plain")
+
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
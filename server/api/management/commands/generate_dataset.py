@@ -0,0 +1,243 @@
+import io
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from api.models import UserPalace, Furniture, Flashcard, FlashcardReview
+from api.services.spaced_repetition import sm2_step
+
+ICONS = ["book", "star", "heart", "flag", "bell", None]
+FURNITURE = ["chairWood", "bedGreen", "table", "lamp", "shelf", "sofa", "desk", "plant"]
+# grades of successful reviews (3, 4, 5) and of lapses (0, 1, 2)
+PASS_WEIGHTS = [2, 5, 3]
+LAPSE_WEIGHTS = [1, 2, 3]
+
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value):
+    """
+    One column in COPY's text format (the common types are checked first, this runs per cell).
+    """
+    kind = type(value)
+    if kind is int or kind is float:
+        return str(value)
+    if kind is str:
+        return value.translate(COPY_ESCAPES)
+    if value is None:
+        return "\\N"
+    if kind is bool:
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return json.dumps(value).translate(COPY_ESCAPES)
+
+
+class CopyWriter:
+    """
+    Buffers rows of one table and writes them with COPY ... FROM STDIN every batch_size rows.
+    Ids are assigned here (next_id) so children can reference rows not written yet.
+    """
+
+    def __init__(self, cursor, model, columns, batch_size, with_ids=True):
+        self.cursor, self.batch_size = cursor, batch_size
+        self.table = model._meta.db_table
+        self.columns = (["id"] if with_ids else []) + columns
+        self.with_ids = with_ids
+        self.buffer, self.pending, self.written = io.StringIO(), 0, 0
+        self.next_id = None
+        if with_ids:
+            cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [self.table])
+            self.next_id = cursor.fetchone()[0]
+
+    def add(self, *values):
+        """
+        Queue one row (values in the order of columns), returns its id.
+        """
+        row_id = None
+        if self.with_ids:
+            row_id, self.next_id = self.next_id, self.next_id + 1
+            values = (row_id, *values)
+        self.buffer.write("\t".join(_copy_value(value) for value in values) + "\n")
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+        return row_id
+
+    def flush(self):
+        if not self.pending:
+            return
+        with self.cursor.copy(f'COPY {self.table} ({", ".join(self.columns)}) FROM STDIN') as copy:
+            copy.write(self.buffer.getvalue())
+        self.written += self.pending
+        self.buffer, self.pending = io.StringIO(), 0
+
+    def close(self):
+        self.flush()
+        if self.with_ids:
+            # the sequence continues after the ids used here
+            self.cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)", [self.table, self.next_id]
+            )
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic dataset (users, palaces, furniture, flashcards, review history)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--palaces-per-user", type=int, default=2)
+        parser.add_argument("--matrix-size", type=int, default=12, help="Palace matrix rows and columns")
+        parser.add_argument("--furniture", type=int, default=20, help="Furniture per palace")
+        parser.add_argument("--cards-per-furniture", type=int, default=9, choices=range(0, 10), metavar="0-9")
+        parser.add_argument("--reviews-mean", type=float, default=4,
+                            help="Mean reviews per reviewed card (geometric distribution)")
+        parser.add_argument("--new-fraction", type=float, default=0.2, help="Share of cards never reviewed")
+        parser.add_argument("--lapse-rate", type=float, default=0.15, help="Share of reviews graded below 3")
+        parser.add_argument("--history-days", type=int, default=365, help="Cards were created within this many days")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--now", help="ISO timestamp the history ends at (default: now)")
+        parser.add_argument("--prefix", default="gen", help="Username prefix: <prefix>0, <prefix>1, ...")
+        parser.add_argument("--password", default="password123", help="Password of every generated user")
+        parser.add_argument("--batch-size", type=int, default=20000, help="Rows per COPY")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("generate_dataset writes with COPY and needs PostgreSQL.")
+        if User.objects.filter(username__startswith=options["prefix"]).exists():
+            raise CommandError(f"Users named {options['prefix']}* already exist, pick another --prefix.")
+
+        now = timezone.now()
+        if options["now"]:
+            now = datetime.fromisoformat(options["now"])
+            if timezone.is_naive(now):
+                now = timezone.make_aware(now)
+
+        self.options, self.now = options, now
+        self.rng = random.Random(options["seed"])
+        self.stdout.write(f"Generating {options['users']} users (seed {options['seed']})...")
+
+        started = time.monotonic()
+        with transaction.atomic(), connection.cursor() as cursor:
+            # nobody else may insert while ids are handed out here
+            tables = [model._meta.db_table for model in (User, UserPalace, Furniture, Flashcard, FlashcardReview)]
+            cursor.execute(f"LOCK TABLE {', '.join(tables)} IN EXCLUSIVE MODE")
+
+            batch_size = options["batch_size"]
+            self.users = CopyWriter(cursor, User, [
+                "password", "is_superuser", "username", "first_name", "last_name",
+                "email", "is_staff", "is_active", "date_joined",
+            ], batch_size)
+            self.palaces = CopyWriter(cursor, UserPalace, [
+                "user_id", "name", "palace_matrix", "created_at", "updated_at",
+            ], batch_size)
+            self.furniture = CopyWriter(cursor, Furniture, [
+                "user_id", "palace_id", "name", "description", "created_at", "updated_at",
+            ], batch_size)
+            self.flashcards = CopyWriter(cursor, Flashcard, [
+                "user_id", "furniture_id", "front", "back", "icon_name", "furniture_slot_index",
+                "interval", "ease_factor", "repetition", "next_review", "last_reviewed_at",
+                "created_at", "updated_at",
+            ], batch_size)
+            self.reviews = CopyWriter(cursor, FlashcardReview, [
+                "user_id", "flashcard_id", "idempotency_key", "grade", "reviewed_at",
+                "interval", "ease_factor", "repetition", "next_review", "created_at",
+            ], batch_size, with_ids=False)
+
+            # one hash for everyone, hashing is slow on purpose
+            password = make_password(options["password"])
+            for n in range(options["users"]):
+                self.generate_user(n, password)
+
+            writers = (self.users, self.palaces, self.furniture, self.flashcards, self.reviews)
+            for writer in writers:
+                writer.close()
+
+        elapsed = time.monotonic() - started
+        counts = ", ".join(f"{writer.written} {writer.table}" for writer in writers)
+        total = sum(writer.written for writer in writers)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts} in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)."
+        ))
+
+    def generate_user(self, n, password):
+        options, rng = self.options, self.rng
+        joined = self.now - timedelta(days=options["history_days"] + rng.randrange(30))
+        username = f"{options['prefix']}{n}"
+        user_id = self.users.add(
+            password, False, username, "", "", f"{username}@example.com", False, True, joined
+        )
+
+        size = options["matrix_size"]
+        for p in range(options["palaces_per_user"]):
+            created = joined + timedelta(seconds=rng.randrange(86400))
+            # furniture ids are known before the rows are written, so the matrix can point at them
+            furniture_ids = [self.furniture.next_id + i for i in range(options["furniture"])]
+            matrix = self.matrix(size, furniture_ids)
+            palace_id = self.palaces.add(user_id, f"Palace {p + 1}", matrix, created, created)
+
+            for f in range(options["furniture"]):
+                furniture_id = self.furniture.add(
+                    user_id, palace_id, f"{rng.choice(FURNITURE)} {f + 1}", "", created, created
+                )
+                for slot in range(options["cards_per_furniture"]):
+                    self.generate_card(user_id, furniture_id, slot, f"{p}.{f}.{slot}")
+
+    def matrix(self, size, furniture_ids):
+        """
+        Four rooms ("1_" ... "4_") split by a corridor ("0_"), furniture ("room_<id>_") on random cells.
+        """
+        middle = size // 2
+        matrix = [
+            ["0_" if row == middle or col == middle else f"{1 + (row > middle) * 2 + (col > middle)}_"
+             for col in range(size)]
+            for row in range(size)
+        ]
+        cells = [(row, col) for row in range(size) for col in range(size) if matrix[row][col] != "0_"]
+        for furniture_id, (row, col) in zip(furniture_ids, self.rng.sample(cells, min(len(cells), len(furniture_ids)))):
+            matrix[row][col] = f"{matrix[row][col]}{furniture_id}_"
+        return matrix
+
+    def generate_card(self, user_id, furniture_id, slot, label):
+        options, rng = self.options, self.rng
+        created = self.now - timedelta(seconds=rng.randrange(options["history_days"] * 86400 or 1))
+
+        repetition, interval, ease_factor, next_review = 0, 1, 2.5, created
+        history = []
+        if rng.random() >= options["new_fraction"]:
+            # geometric number of reviews with the requested mean (at least one)
+            mean = max(options["reviews_mean"], 1)
+            count = 1 + int(math.log(1 - rng.random()) / math.log(1 - 1 / mean)) if mean > 1 else 1
+
+            reviewed_at = created + timedelta(hours=rng.expovariate(1 / 12))
+            for _ in range(count):
+                if reviewed_at > self.now:
+                    break
+                if rng.random() < options["lapse_rate"]:
+                    grade = rng.choices((0, 1, 2), LAPSE_WEIGHTS)[0]
+                else:
+                    grade = rng.choices((3, 4, 5), PASS_WEIGHTS)[0]
+                repetition, interval, ease_factor = sm2_step(repetition, interval, ease_factor, grade)
+                next_review = reviewed_at + timedelta(days=interval)
+                history.append((grade, reviewed_at, interval, ease_factor, repetition, next_review))
+                # reviewers come back some hours after the card is due
+                reviewed_at = next_review + timedelta(hours=rng.expovariate(1 / 18))
+
+        last_reviewed_at = history[-1][1] if history else None
+        flashcard_id = self.flashcards.add(
+            user_id, furniture_id, f"Question {label}", f"Answer {label}", rng.choice(ICONS), slot,
+            interval, ease_factor, repetition, next_review, last_reviewed_at, created,
+            last_reviewed_at or created,
+        )
+        for i, (grade, reviewed_at, *state) in enumerate(history):
+            self.reviews.add(
+                user_id, flashcard_id, f"gen-{flashcard_id}-{i}", grade, reviewed_at, *state, reviewed_at
+            )
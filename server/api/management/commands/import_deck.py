@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from api.models import UserPalace
+from api.services.deck_import import import_deck, DeckImportError
+
+
+class Command(BaseCommand):
+    help = "Import a CSV / TSV deck (furniture, front, back[, icon_name][, description]) into a palace"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Deck file, UTF-8")
+        parser.add_argument("--user", type=int, default=1, help="Owner id (default: 1)")
+        parser.add_argument("--palace", type=int, help="Palace id (default: a new palace named after the file)")
+        parser.add_argument("--delimiter", choices=["comma", "tab"], help="Default: detected from the header row")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(id=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+
+        if options["palace"] is not None:
+            try:
+                palace = UserPalace.objects.get(id=options["palace"], user=user)
+            except UserPalace.DoesNotExist:
+                raise CommandError(f"Palace {options['palace']} of user {user.id} does not exist.")
+        else:
+            name = options["path"].rsplit("/", 1)[-1].rsplit(".", 1)[0]
+            palace = UserPalace(user=user, name=name[:100])
+
+        delimiter = {"comma": ",", "tab": "\t"}.get(options["delimiter"])
+
+        self.stdout.write(f"Importing {options['path']} into palace '{palace.name}'...")
+
+        try:
+            # a new palace is rolled back together with a failed import
+            with open(options["path"], "rb") as deck, transaction.atomic():
+                if palace.pk is None:
+                    palace.save()
+                counts = import_deck(deck, user=user, palace=palace, delimiter=delimiter)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except DeckImportError as exc:
+            raise CommandError(f"Import failed, nothing was imported: {exc}")
+        except IntegrityError:
+            raise CommandError(
+                "Import failed, nothing was imported: furniture slots were taken by a concurrent import"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['flashcards_created']} flashcards, "
+            f"created {counts['furniture_created']} furniture."
+        ))
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.services.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_DAYS (run daily, e.g. from cron)"
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} tombstones older than {settings.SYNC_TOMBSTONE_DAYS} days."
+        ))
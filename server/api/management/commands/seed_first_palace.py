@@ -2,7 +2,6 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from django.utils import timezone
 from api.models import UserPalace, PalaceTemplate, Furniture, Flashcard
-import json
 
 PALACE_MATRIX = [
   ['1__', '1__', '1__', '1__', '1__', '0__', '2__', '2__', '2__', '2__', '2__'],
@@ -68,7 +67,7 @@ class Command(BaseCommand):
         template, _ = PalaceTemplate.objects.get_or_create(
             name="Default Learning Palace",
             defaults={
-                "palace_matrix": json.dumps(PALACE_MATRIX)
+                "palace_matrix": PALACE_MATRIX
             }
         )
 
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0008_flashcard_furniture_slot_index_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # build the composite indexes first, without blocking writes ...
+        AddIndexConcurrently(
+            model_name='flashcard',
+            index=models.Index(fields=['user', 'next_review', 'id'], name='flashcard_user_due_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='flashcard',
+            index=models.Index(fields=['furniture', 'next_review', 'id'], name='flashcard_furniture_due_idx'),
+        ),
+        # ... then drop the single-column FK indexes they make redundant
+        migrations.AlterField(
+            model_name='flashcard',
+            name='furniture',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='flashcards', to='api.furniture'),
+        ),
+        migrations.AlterField(
+            model_name='flashcard',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='flashcards', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
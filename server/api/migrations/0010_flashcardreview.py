@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:15
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_flashcard_due_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlashcardReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=64)),
+                ('grade', models.IntegerField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)])),
+                ('reviewed_at', models.DateTimeField()),
+                ('interval', models.IntegerField()),
+                ('ease_factor', models.FloatField()),
+                ('repetition', models.IntegerField()),
+                ('next_review', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('flashcard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='api.flashcard')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flashcard_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_review_idempotency_key_per_user')],
+            },
+        ),
+    ]
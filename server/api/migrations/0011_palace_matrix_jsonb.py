@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_flashcardreview'),
+    ]
+
+    operations = [
+        # empty strings are not valid JSON, the text -> jsonb cast would fail on them
+        migrations.RunSQL(
+            "UPDATE api_userpalace SET palace_matrix = NULL WHERE palace_matrix = ''",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='palacetemplate',
+            name='palace_matrix',
+            field=models.JSONField(),
+        ),
+        migrations.AlterField(
+            model_name='userpalace',
+            name='palace_matrix',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# change_xid = the writing transaction (api.services.sync), set on every insert and update
+SET_CHANGE_XID = """
+CREATE FUNCTION api_set_change_xid() RETURNS trigger AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# one tombstone per deleted row, TG_ARGV[0] is the kind
+ADD_TOMBSTONES = """
+CREATE FUNCTION api_add_tombstones() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO api_synctombstone (user_id, kind, object_id, change_xid, deleted_at)
+    SELECT user_id, TG_ARGV[0], id, pg_current_xact_id()::text::bigint, now() FROM deleted;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+TABLES = [("api_userpalace", "palace"), ("api_furniture", "furniture"), ("api_flashcard", "flashcard")]
+
+CREATE_TRIGGERS = [SET_CHANGE_XID, ADD_TOMBSTONES] + [
+    statement
+    for table, kind in TABLES
+    for statement in (
+        f"CREATE TRIGGER {table}_change_xid BEFORE INSERT OR UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION api_set_change_xid()",
+        # statement level, a cascade over thousands of cards is one INSERT ... SELECT
+        f"CREATE TRIGGER {table}_tombstones AFTER DELETE ON {table} "
+        f"REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION api_add_tombstones('{kind}')",
+    )
+]
+
+DROP_TRIGGERS = [
+    statement
+    for table, _ in TABLES
+    for statement in (
+        f"DROP TRIGGER {table}_change_xid ON {table}",
+        f"DROP TRIGGER {table}_tombstones ON {table}",
+    )
+] + ["DROP FUNCTION api_set_change_xid()", "DROP FUNCTION api_add_tombstones()"]
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0011_palace_matrix_jsonb'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('change_xid', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='flashcard',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='furniture',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='userpalace',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        AddIndexConcurrently(
+            model_name='flashcard',
+            index=models.Index(fields=['user', 'change_xid'], name='flashcard_user_change_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='furniture',
+            index=models.Index(fields=['user', 'change_xid'], name='furniture_user_change_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userpalace',
+            index=models.Index(fields=['user', 'change_xid'], name='palace_user_change_idx'),
+        ),
+        migrations.AddField(
+            model_name='synctombstone',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['user', 'change_xid'], name='tombstone_user_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
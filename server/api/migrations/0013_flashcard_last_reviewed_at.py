@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+# Cards reviewed before the column existed: the latest logged review, else the
+# last update. Every review moves the card off its initial state
+# (repetition 0, interval 1, ease factor 2.5; a lapse lowers the ease factor).
+BACKFILL = """
+UPDATE api_flashcard AS card
+SET last_reviewed_at = COALESCE(
+    (SELECT max(review.reviewed_at) FROM api_flashcardreview AS review WHERE review.flashcard_id = card.id),
+    card.updated_at
+)
+WHERE card.repetition > 0
+   OR card.interval <> 1
+   OR card.ease_factor <> 2.5
+   OR EXISTS (SELECT 1 FROM api_flashcardreview AS review WHERE review.flashcard_id = card.id)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_sync_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flashcard',
+            name='last_reviewed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
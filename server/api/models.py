@@ -12,16 +12,24 @@ class UserPalace(models.Model):
     )
 
     name = models.CharField(max_length=100)
-    palace_matrix = models.TextField(null=True, blank=True) 
+    palace_matrix = models.JSONField(null=True, blank=True)  # [][] of cells
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # transaction that wrote the row last, set by a trigger (see api.services.sync)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # GET /sync/: WHERE user_id = ? AND (change_xid >= ? OR change_xid IN (...))
+            models.Index(fields=["user", "change_xid"], name="palace_user_change_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} (user: {self.user.username})"
 
 class PalaceTemplate(models.Model):
     name = models.CharField(max_length=255)
-    palace_matrix = models.TextField()  # JSON string [][]
+    palace_matrix = models.JSONField()  # [][] of cells
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -46,14 +54,21 @@ class Furniture(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "change_xid"], name="furniture_user_change_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} in palace: {self.palace.name}"
 
 
 class Flashcard(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="flashcards")
-    furniture = models.ForeignKey(Furniture, on_delete=models.CASCADE, related_name='flashcards')
+    # single-column FK indexes are covered by the composite indexes below
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="flashcards", db_index=False)
+    furniture = models.ForeignKey(Furniture, on_delete=models.CASCADE, related_name='flashcards', db_index=False)
 
     front = models.TextField()
     back = models.TextField()
@@ -69,9 +84,12 @@ class Flashcard(models.Model):
     ease_factor = models.FloatField(default=2.5)
     repetition = models.IntegerField(default=0)
     next_review = models.DateTimeField(default=timezone.now)
+    # None = never reviewed (repetition is 0 again after every lapse)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    change_xid = models.BigIntegerField(default=0, editable=False)
 
     
     class Meta:
@@ -81,7 +99,77 @@ class Flashcard(models.Model):
                 name="unique_flashcard_slot_per_furniture"
             )
         ]
+        indexes = [
+            # GET /flashcards/, /flashcards/queue/:
+            #   WHERE user_id = ? AND next_review <= ? ORDER BY next_review, id
+            models.Index(
+                fields=["user", "next_review", "id"],
+                name="flashcard_user_due_idx",
+            ),
+            # GET /palaces/<id>/flashcards/, /furniture/<id>/flashcards/:
+            #   WHERE furniture_id IN (...) AND next_review <= ? ORDER BY next_review, id
+            models.Index(
+                fields=["furniture", "next_review", "id"],
+                name="flashcard_furniture_due_idx",
+            ),
+            models.Index(fields=["user", "change_xid"], name="flashcard_user_change_idx"),
+        ]
 
     def __str__(self):
         return f"{self.front[:30]}..."
 
+
+
+class FlashcardReview(models.Model):
+    """
+    One graded review of a flashcard, with the scheduling state it produced.
+    The idempotency key lets offline clients resend a batch safely.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="flashcard_reviews")
+    flashcard = models.ForeignKey(Flashcard, on_delete=models.CASCADE, related_name="reviews")
+
+    idempotency_key = models.CharField(max_length=64)
+    grade = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(5)])
+    reviewed_at = models.DateTimeField()
+
+    interval = models.IntegerField()
+    ease_factor = models.FloatField()
+    repetition = models.IntegerField()
+    next_review = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "idempotency_key"],
+                name="unique_review_idempotency_key_per_user"
+            )
+        ]
+
+    def __str__(self):
+        return f"review {self.idempotency_key} of flashcard {self.flashcard_id}"
+
+
+class SyncTombstone(models.Model):
+    """
+    A deleted palace, furniture item or flashcard, written by a delete trigger
+    so GET /sync/ can report it (see api.services.sync).
+    """
+    # no FK constraint: deleting a user deletes its palaces first, which adds tombstones
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    kind = models.CharField(max_length=16)  # "palace" | "furniture" | "flashcard"
+    object_id = models.BigIntegerField()
+    change_xid = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "change_xid"], name="tombstone_user_change_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"deleted {self.kind} {self.object_id}"
@@ -0,0 +1,147 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the (next_review, id) ordering.
+
+    The cursor holds the ordering values of the last row of the page,
+    so the next page is a plain range scan and page N costs the same as page 1.
+
+    Pagination is opt-in for compatibility with the current clients:
+    without ?cursor= or ?page_size= the full unpaginated list is returned.
+
+    GET /flashcards/?page_size=100
+        -> {"next": "<url with ?cursor=...>", "results": [...]}
+    """
+    ordering = ("next_review", "id")
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.page_queryset(queryset, request)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        paginate_queryset() for async views, reading the page with the async ORM.
+        """
+        page_queryset = self.page_queryset(queryset, request)
+        if page_queryset is None:
+            return None
+        return self.set_page([row async for row in page_queryset])
+
+    def page_queryset(self, queryset, request):
+        """
+        The rows of the requested page (plus one), or None when pagination is not requested.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        model = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            position = self.decode_cursor(encoded, model)
+            queryset = queryset.filter(self.after(position))
+
+        # fetch one extra row to know if there is a next page
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+
+        self.next_position = None
+        if self.has_next:
+            last = page[-1]
+            self.next_position = [getattr(last, field) for field in self.ordering]
+
+        return page
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def after(self, position):
+        """
+        Build the row-value comparison (a, b) > (x, y) as
+        a >= x AND (a > x OR (a = x AND b > y)).
+
+        The redundant a >= x is what Postgres turns into an index condition,
+        so the scan starts at the cursor; the OR alone is only a filter over
+        every earlier row of the user.
+        """
+        condition = Q()
+        for i in reversed(range(len(self.ordering))):
+            equal = {field: value for field, value in zip(self.ordering[:i], position[:i])}
+            step = Q(**equal, **{f"{self.ordering[i]}__gt": position[i]})
+            condition = step if i == len(self.ordering) - 1 else step | condition
+        return Q(**{f"{self.ordering[0]}__gte": position[0]}) & condition
+
+    def encode_cursor(self, position):
+        # keep full microsecond precision, the cursor must match rows exactly
+        raw = json.dumps(position, default=lambda value: value.isoformat(), separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, encoded, model):
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            values = json.loads(raw)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
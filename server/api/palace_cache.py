@@ -0,0 +1,98 @@
+"""
+Read-through cache of rendered palace payloads (UserPalaceSerializer output).
+
+Entries are keyed by (user, palace, version). The version is read from the
+data itself: the row counts and latest updated_at of the palace, its
+furniture and their flashcards, the state the palace ETag is computed from
+(see api.conditional). Every write changes it, so all processes agree on
+which entry is current whatever the cache backend, without any invalidation
+step; entries of older versions are never read again and expire.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+
+# bump when the palace representation changes shape
+SCHEMA_VERSION = 2
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    return caches[getattr(settings, "PALACE_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "PALACE_CACHE_TIMEOUT", 3600)
+
+
+def _count(name, value=1):
+    with _lock:
+        _stats[name] += value
+
+
+def stats():
+    """
+    Process-local counters: hits, misses.
+    """
+    with _lock:
+        return dict(_stats)
+
+
+def _palace_key(user_id, palace_id, version):
+    return f"palace:{SCHEMA_VERSION}:{user_id}:{palace_id}:{version}"
+
+
+def version(furniture_count, flashcard_count, last, furniture_last, flashcard_last):
+    """
+    Version of one palace from its counts and latest updated_at values.
+    """
+    state = (furniture_count, flashcard_count, last, furniture_last, flashcard_last)
+    return hashlib.sha256(repr(state).encode()).hexdigest()[:32]
+
+
+def versions(queryset):
+    """
+    [(palace_id, version)] of the palaces in queryset, in its order,
+    from one grouped query.
+    """
+    rows = queryset.values_list("id").annotate(
+        furniture_count=Count("furniture", distinct=True),
+        flashcard_count=Count("furniture__flashcards", distinct=True),
+        last=Max("updated_at"),
+        furniture_last=Max("furniture__updated_at"),
+        flashcard_last=Max("furniture__flashcards__updated_at"),
+    )
+    return [(row[0], version(*row[1:])) for row in rows]
+
+
+def get_many(user_id, versions):
+    """
+    {palace_id: payload} of the palaces cached at their version.
+    versions = {palace_id: version}, see versions().
+    """
+    keys = {_palace_key(user_id, palace_id, version): palace_id for palace_id, version in versions.items()}
+    found = _cache().get_many(list(keys))
+
+    hits = {keys[key]: payload for key, payload in found.items()}
+    _count("hits", len(hits))
+    _count("misses", len(keys) - len(hits))
+    return hits
+
+
+def set_many(user_id, payloads, versions):
+    """
+    Store payloads ({palace_id: payload}) under the versions they were read at.
+    """
+    _cache().set_many(
+        {
+            _palace_key(user_id, palace_id, versions[palace_id]): payload
+            for palace_id, payload in payloads.items()
+        },
+        _timeout(),
+    )
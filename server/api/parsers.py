@@ -0,0 +1,64 @@
+import codecs
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser on orjson, for UTF-8 bodies (other charsets go through JSONParser).
+    orjson rejects NaN / Infinity, like JSONParser with STRICT_JSON.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != "utf-8" or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackParser(BaseParser):
+    """
+    MessagePack request bodies (application/msgpack).
+    """
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
+
+
+class PalaceArchiveParser(BaseParser):
+    """
+    Raw gzip request bodies (palace archives). The body is not read here:
+    request.data["archive"] is the request stream, consumed while importing.
+    """
+    media_type = "application/gzip"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {"archive": stream}
+
+
+class DeckFileParser(BaseParser):
+    """
+    Raw CSV / TSV request bodies (text/csv, text/tab-separated-values, text/plain),
+    passed on unread as request.data["file"], like PalaceArchiveParser.
+    """
+    media_type = "text/*"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {"file": stream}
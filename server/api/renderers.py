@@ -0,0 +1,62 @@
+"""
+Response renderers, negotiated through the Accept header (see REST_FRAMEWORK in settings):
+
+    application/json        ORJSONRenderer, same bytes as DRF's JSONRenderer
+    application/msgpack     MessagePackRenderer, same data in MessagePack
+"""
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def encode_default(value):
+    """
+    Types the encoders do not handle natively (datetimes, Decimal, UUID, lazy
+    strings, ...) are converted like DRF's JSONEncoder converts them.
+    """
+    return JSONEncoder().default(value)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson.
+
+    Datetimes go through DRF's encoder, so the output matches JSONRenderer
+    byte for byte. Indented output (?format=json; indent=4, the browsable API)
+    and data orjson rejects (e.g. integers beyond 64 bit) fall back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # JSONRenderer escapes these, so the output stays a strict javascript subset
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack (https://msgpack.org) responses, for clients pulling large
+    flashcard sets. Datetimes are strings, formatted as in the JSON output.
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default)
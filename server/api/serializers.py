@@ -1,11 +1,15 @@
 from rest_framework import serializers
 from .models import UserPalace, PalaceTemplate, Furniture, Flashcard
-import json
+from .fieldsets import SparseFieldsMixin
+from .instrumentation import TimedDataMixin, TimedListSerializer
+from .services.review_session import MAX_BATCH
+from .services.review_load import MAX_FORECAST_DAYS
 
 
-class FlashcardSerializer(serializers.ModelSerializer):
+class FlashcardSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     furniture = serializers.PrimaryKeyRelatedField(read_only=True)
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Flashcard
         fields = [
             "id",
@@ -41,10 +45,42 @@ class FlashcardSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class FurnitureSerializer(serializers.ModelSerializer):
+class ReviewEntrySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    grade = serializers.IntegerField(min_value=0, max_value=5)
+    reviewed_at = serializers.DateTimeField(required=False)
+    idempotency_key = serializers.CharField(max_length=64)
+
+
+class ReviewBatchSerializer(serializers.Serializer):
+    """
+    POST /flashcards/reviews/ body:
+    {"reviews": [{"id", "grade", "reviewed_at", "idempotency_key"}, ...]}
+    """
+    MAX_REVIEWS = 500
+
+    reviews = ReviewEntrySerializer(many=True, allow_empty=False, max_length=MAX_REVIEWS)
+
+
+class ReviewSessionSerializer(serializers.Serializer):
+    """
+    POST /palaces/<id>/review-session/ body: {"size": 20}
+    """
+    size = serializers.IntegerField(min_value=1, max_value=MAX_BATCH, default=20)
+
+
+class ForecastSerializer(serializers.Serializer):
+    """
+    GET /flashcards/forecast/ query: ?days=30
+    """
+    days = serializers.IntegerField(min_value=1, max_value=MAX_FORECAST_DAYS, default=30)
+
+
+class FurnitureSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     flashcards = FlashcardSerializer(many=True, read_only=True)
 
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = Furniture
         fields = [
             "id", "user", "palace", "name", "description",
@@ -52,11 +88,12 @@ class FurnitureSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserPalaceSerializer(serializers.ModelSerializer):
+class UserPalaceSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     furniture = FurnitureSerializer(many=True, read_only=True)
     palace_matrix = serializers.JSONField(required=False)
 
     class Meta:
+        list_serializer_class = TimedListSerializer
         model = UserPalace
         fields = [
             "id", "user", "name", "palace_matrix",
@@ -64,17 +101,40 @@ class UserPalaceSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("id", "created_at", "updated_at", "user")
 
-    def create(self, validated_data):
-        matrix = validated_data.get("palace_matrix")
-        if matrix is not None:
-            validated_data["palace_matrix"] = json.dumps(matrix)
-        return super().create(validated_data)
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        if instance.palace_matrix:
-            data["palace_matrix"] = json.loads(instance.palace_matrix)
-        return data
+class UserPalaceSummarySerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    GET /palaces/?summary=true: no nested furniture / flashcards, only counts
+    (annotated by the queryset).
+    """
+    furniture_count = serializers.IntegerField(read_only=True)
+    flashcard_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+        model = UserPalace
+        fields = [
+            "id", "name", "created_at", "updated_at",
+            "furniture_count", "flashcard_count"
+        ]
+        read_only_fields = fields
+
+
+class CellEditSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=0)
+    col = serializers.IntegerField(min_value=0)
+    value = serializers.CharField(allow_null=True, allow_blank=True, trim_whitespace=False)
+
+
+class PalaceCellsSerializer(serializers.Serializer):
+    """
+    PATCH /palaces/<id>/cells/ body:
+    {"cells": [{"row": 0, "col": 1, "value": "1_chairWood_"}, ...]}
+    """
+    MAX_CELLS = 1000
+
+    cells = CellEditSerializer(many=True, allow_empty=False, max_length=MAX_CELLS)
+
 
 class PalaceTemplateSerializer(serializers.ModelSerializer):
     palace_matrix = serializers.JSONField()
@@ -83,12 +143,3 @@ class PalaceTemplateSerializer(serializers.ModelSerializer):
         model = PalaceTemplate
         fields = ["id", "name", "palace_matrix", "created_at"]
         read_only_fields = ("id", "created_at")
-
-    def create(self, validated_data):
-        validated_data["palace_matrix"] = json.dumps(validated_data["palace_matrix"])
-        return super().create(validated_data)
-
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data["palace_matrix"] = json.loads(instance.palace_matrix)
-        return data
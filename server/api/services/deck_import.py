@@ -0,0 +1,164 @@
+"""
+Bulk import of delimited decks (CSV or TSV, UTF-8) into a palace.
+
+The first row names the columns, in any order:
+
+    furniture,front,back[,icon_name][,description]
+
+Cards are grouped onto furniture by name. Existing furniture of the palace
+with free slots is filled first; when a furniture item is full (9 cards),
+the import continues on "<name> (2)", "<name> (3)", ... and creates the
+furniture it needs. The file is read row by row and written in batches.
+"""
+
+import codecs
+import csv
+import itertools
+
+from django.db import transaction
+from django.db.models import Count
+
+from api.models import Furniture, Flashcard
+
+SLOTS_PER_FURNITURE = 9
+BATCH_SIZE = 1000
+
+REQUIRED_COLUMNS = ("furniture", "front", "back")
+OPTIONAL_COLUMNS = ("icon_name", "description")
+
+
+class DeckImportError(ValueError):
+    pass
+
+
+class _Slots:
+    """
+    Free furniture slots of the palace, by furniture name.
+    """
+
+    def __init__(self, user, palace):
+        self.user = user
+        self.palace = palace
+        self.by_name = {}  # name -> [Furniture, free slots]
+        self.created = []
+
+        furniture = Furniture.objects.filter(palace=palace).annotate(card_count=Count("flashcards"))
+        used = {}
+        for furniture_id, slot in Flashcard.objects.filter(furniture__palace=palace).values_list(
+            "furniture_id", "furniture_slot_index"
+        ):
+            used.setdefault(furniture_id, set()).add(slot)
+
+        for item in furniture.order_by("id"):
+            free = [slot for slot in range(SLOTS_PER_FURNITURE) if slot not in used.get(item.id, ())]
+            # cards without a slot still count towards the limit
+            free = free[:max(SLOTS_PER_FURNITURE - item.card_count, 0)]
+            self.by_name.setdefault(item.name, [item, free])
+
+    def take(self, name, description):
+        """
+        Returns (furniture, slot) for the next card of name, new furniture is not saved yet.
+        """
+        for n in itertools.count(1):
+            candidate = name if n == 1 else f"{name[:100 - len(f' ({n})')]} ({n})"
+            entry = self.by_name.get(candidate)
+            if entry is None:
+                furniture = Furniture(
+                    user=self.user, palace=self.palace, name=candidate, description=description
+                )
+                entry = self.by_name[candidate] = [furniture, list(range(SLOTS_PER_FURNITURE))]
+                self.created.append(furniture)
+            furniture, free = entry
+            if free:
+                return furniture, free.pop(0)
+
+
+def _rows(stream, delimiter):
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    try:
+        first = next(lines, None)
+    except UnicodeDecodeError:
+        raise DeckImportError("file is not UTF-8 encoded")
+    if first is None:
+        raise DeckImportError("file is empty")
+
+    if delimiter is None:
+        delimiter = "\t" if "\t" in first else ","
+    return csv.reader(itertools.chain([first], lines), delimiter=delimiter)
+
+
+def _columns(header):
+    columns = {name.strip().lower(): index for index, name in enumerate(header)}
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise DeckImportError(f"missing columns: {', '.join(missing)}")
+    return columns
+
+
+def import_deck(stream, *, user, palace, delimiter=None):
+    """
+    Import a deck from a binary stream into palace, in one transaction.
+    delimiter: "," or "\\t", detected from the header row when None.
+
+    Returns {"furniture_created": n, "flashcards_created": n}.
+    """
+    rows = _rows(stream, delimiter)
+    created_cards = 0
+
+    with transaction.atomic():
+        slots = _Slots(user, palace)
+        flushed = 0
+        batch = []
+
+        def flush():
+            nonlocal flushed, created_cards
+            new_furniture = slots.created[flushed:]
+            if new_furniture:
+                Furniture.objects.bulk_create(new_furniture)
+                flushed = len(slots.created)
+            if batch:
+                Flashcard.objects.bulk_create(batch)
+                created_cards += len(batch)
+                batch.clear()
+
+        try:
+            header = next(rows, None)
+            if header is None:
+                raise DeckImportError("file is empty")
+            columns = _columns(header)
+
+            def column(row, name):
+                index = columns.get(name)
+                return row[index].strip() if index is not None and index < len(row) else ""
+
+            for row in rows:
+                if not any(value.strip() for value in row):
+                    continue
+
+                name = column(row, "furniture")[:100]
+                front = column(row, "front")
+                back = column(row, "back")
+                if not (name and front and back):
+                    raise DeckImportError(
+                        f"line {rows.line_num}: furniture, front and back are required"
+                    )
+
+                furniture, slot = slots.take(name, column(row, "description"))
+                batch.append(Flashcard(
+                    user=user,
+                    furniture=furniture,
+                    front=front,
+                    back=back,
+                    icon_name=column(row, "icon_name")[:100] or None,
+                    furniture_slot_index=slot,
+                ))
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+        except csv.Error as exc:
+            raise DeckImportError(f"line {rows.line_num}: {exc}")
+        except UnicodeDecodeError:
+            raise DeckImportError("file is not UTF-8 encoded")
+
+        flush()
+
+    return {"furniture_created": flushed, "flashcards_created": created_cards}
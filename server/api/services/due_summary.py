@@ -0,0 +1,64 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import Flashcard
+
+
+def _counts(row=None):
+    if row is None:
+        return {"due": 0, "new": 0, "total": 0}
+    return {"due": row["due"], "new": row["new"], "total": row["total"]}
+
+
+def _add(target, counts):
+    for key, value in counts.items():
+        target[key] += value
+
+
+def summarize_due(user, now=None):
+    """
+    Due / new / total flashcard counts per palace and per furniture item,
+    from one grouped aggregate (one row per furniture that has cards).
+
+        due = next_review <= now, new = never reviewed (no last_reviewed_at;
+        lapsed cards are back at repetition 0 but are not new)
+
+    Returns:
+    {
+        "now": now,
+        "totals": {"due", "new", "total"},
+        "palaces": [{"id", "due", "new", "total", "furniture": [{"id", "due", "new", "total"}]}]
+    }
+    Palaces and furniture without flashcards are left out.
+    Furniture not placed in a palace only counts towards the totals.
+    """
+    now = now or timezone.now()
+
+    rows = (
+        Flashcard.objects.filter(user=user)
+        .values("furniture_id", "furniture__palace_id")
+        .annotate(
+            due=Count("id", filter=Q(next_review__lte=now)),
+            new=Count("id", filter=Q(last_reviewed_at__isnull=True)),
+            total=Count("id"),
+        )
+        .order_by("furniture__palace_id", "furniture_id")
+    )
+
+    totals = _counts()
+    palaces = {}
+    for row in rows:
+        counts = _counts(row)
+        _add(totals, counts)
+
+        palace_id = row["furniture__palace_id"]
+        if palace_id is None:
+            continue
+
+        palace = palaces.get(palace_id)
+        if palace is None:
+            palace = palaces[palace_id] = {"id": palace_id, **_counts(), "furniture": []}
+        _add(palace, counts)
+        palace["furniture"].append({"id": row["furniture_id"], **counts})
+
+    return {"now": now, "totals": totals, "palaces": list(palaces.values())}
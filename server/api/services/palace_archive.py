@@ -0,0 +1,304 @@
+"""
+Palace archives: gzip compressed NDJSON, one record per line, in this order:
+
+    {"type": "palace", "version": 1, "name": ..., "palace_matrix": [[...]]}
+    {"type": "furniture", "id": ..., "name": ..., "description": ...}            (repeated)
+    {"type": "flashcard", "furniture": <furniture id>, "front": ..., ...}        (repeated)
+
+Furniture ids are the ids of the exporting database, import remaps them
+(also inside "room_<id>_" matrix cells).
+"""
+
+import datetime
+import gzip
+import io
+import json
+import math
+import zlib
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from api.models import UserPalace, Furniture, Flashcard
+from .palace_matrix import CELL_RE
+from .spaced_repetition import MIN_EASE_FACTOR
+
+ARCHIVE_VERSION = 1
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+MAX_INT = 2 ** 31 - 1  # Postgres integer
+
+FURNITURE_FIELDS = ("id", "name", "description")
+FLASHCARD_FIELDS = (
+    "furniture", "front", "back", "icon_name", "furniture_slot_index",
+    "interval", "ease_factor", "repetition", "next_review", "last_reviewed_at",
+)
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def _json_default(value):
+    # full microsecond precision (DjangoJSONEncoder truncates to milliseconds)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _line(record):
+    return (json.dumps(record, default=_json_default, separators=(",", ":")) + "\n").encode()
+
+
+def export_records(palace):
+    """
+    Yields the archive records of palace, reading the rows in chunks.
+    """
+    yield {
+        "type": "palace",
+        "version": ARCHIVE_VERSION,
+        "name": palace.name,
+        "palace_matrix": palace.palace_matrix,
+    }
+
+    furniture = (
+        Furniture.objects.filter(palace=palace)
+        .order_by("id")
+        .values_list(*FURNITURE_FIELDS)
+    )
+    for row in furniture.iterator(chunk_size=CHUNK_SIZE):
+        yield {"type": "furniture", **dict(zip(FURNITURE_FIELDS, row))}
+
+    flashcards = (
+        Flashcard.objects.filter(furniture__palace=palace)
+        .order_by("furniture_id", "id")
+        .values_list("furniture_id", *FLASHCARD_FIELDS[1:])
+    )
+    for row in flashcards.iterator(chunk_size=CHUNK_SIZE):
+        yield {"type": "flashcard", **dict(zip(FLASHCARD_FIELDS, row))}
+
+
+def _compressor():
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+
+def export_archive(palace):
+    """
+    Yields the gzip compressed archive of palace in chunks, for StreamingHttpResponse.
+    """
+    compressor = _compressor()
+    for record in export_records(palace):
+        chunk = compressor.compress(_line(record))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+async def aexport_archive(palace):
+    """
+    export_archive() as an async iterator: under ASGI Django reads a sync
+    iterator to the end before sending anything, an async one is streamed.
+    The records are read CHUNK_SIZE at a time on the request's thread, the
+    one its server-side cursor lives on.
+    """
+    records = export_records(palace)  # a generator, nothing is read yet
+
+    def next_records():
+        return list(islice(records, CHUNK_SIZE))
+
+    compressor = _compressor()
+    while batch := await sync_to_async(next_records)():
+        chunk = compressor.compress(b"".join(_line(record) for record in batch))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def read_archive(stream):
+    """
+    Yields the records of a gzip compressed archive read from a binary stream.
+    """
+    try:
+        lines = io.TextIOWrapper(gzip.GzipFile(fileobj=stream, mode="rb"), encoding="utf-8")
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ArchiveError(f"line {number}: invalid JSON")
+            if not isinstance(record, dict):
+                raise ArchiveError(f"line {number}: expected an object")
+            yield record
+    except (OSError, EOFError, UnicodeDecodeError, zlib.error):
+        raise ArchiveError("not a gzip compressed palace archive")
+
+
+def remap_matrix(matrix, furniture_ids):
+    """
+    Rewrite "room_<old id>_" cells to the new furniture ids.
+    Cells pointing at furniture missing from the archive are cleared (None).
+    """
+    if not isinstance(matrix, list):
+        return None
+
+    remapped = []
+    for row in matrix:
+        if not isinstance(row, list):
+            raise ArchiveError("palace_matrix must be a 2D array")
+        cells = []
+        for cell in row:
+            if isinstance(cell, str) and "\x00" in cell:
+                raise ArchiveError("palace_matrix cells cannot contain NUL characters")
+            m = CELL_RE.match(cell) if isinstance(cell, str) else None
+            if m and m.group("payload").isdigit():
+                new_id = furniture_ids.get(int(m.group("payload")))
+                cell = f"{m.group('room')}_{new_id}_" if new_id is not None else None
+            cells.append(cell)
+        remapped.append(cells)
+    return remapped
+
+
+def _text(record, name, *, null=False, max_length=None):
+    value = record.get(name)
+    if value is None and null:
+        return None
+    # Postgres text cannot hold NUL
+    if not isinstance(value, str) or "\x00" in value:
+        raise ArchiveError(f"{name} must be a string")
+    if max_length is not None and len(value) > max_length:
+        raise ArchiveError(f"{name} is longer than {max_length} characters")
+    return value
+
+
+def _integer(record, name, default, minimum, maximum=MAX_INT, *, null=False):
+    value = record.get(name, default)
+    if value is None and null:
+        return None
+    # bool is an int subclass, true is not a number here
+    if not isinstance(value, int) or isinstance(value, bool) or not minimum <= value <= maximum:
+        raise ArchiveError(f"{name} must be an integer from {minimum} to {maximum}")
+    return value
+
+
+def _number(record, name, default, minimum):
+    value = record.get(name, default)
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value) or value < minimum:
+        raise ArchiveError(f"{name} must be a finite number of at least {minimum}")
+    return float(value)
+
+
+def _moment(record, name):
+    value = record.get(name)
+    if value is None:
+        return None
+    try:
+        moment = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ArchiveError(f"{name} must be an ISO 8601 datetime")
+    return moment
+
+
+def _furniture(record, user, palace):
+    old_id = record.get("id")
+    if not isinstance(old_id, int) or isinstance(old_id, bool):
+        raise ArchiveError("id must be an integer")
+    return old_id, Furniture(
+        user=user,
+        palace=palace,
+        name=_text(record, "name")[:100],
+        description=_text(record, "description", null=True) or "",
+    )
+
+
+def _flashcard(record, user, furniture_ids):
+    """
+    A Flashcard of the record. bulk_create() runs no model validation,
+    so every field is checked here.
+    """
+    try:
+        furniture_id = furniture_ids[record.get("furniture")]
+    except (KeyError, TypeError):
+        raise ArchiveError(f"flashcard references unknown furniture {record.get('furniture')!r}")
+
+    card = Flashcard(
+        user=user,
+        furniture_id=furniture_id,
+        front=_text(record, "front"),
+        back=_text(record, "back"),
+        icon_name=_text(record, "icon_name", null=True, max_length=100),
+        furniture_slot_index=_integer(record, "furniture_slot_index", None, 0, 8, null=True),
+        interval=_integer(record, "interval", 1, 1),
+        ease_factor=_number(record, "ease_factor", 2.5, MIN_EASE_FACTOR),
+        repetition=_integer(record, "repetition", 0, 0),
+        last_reviewed_at=_moment(record, "last_reviewed_at"),
+    )
+    next_review = _moment(record, "next_review")
+    if next_review is not None:
+        card.next_review = next_review
+    return card
+
+
+def import_archive(records, *, user):
+    """
+    Rebuild a palace from archive records (see read_archive) for user
+    in one transaction: one INSERT for the furniture, batched INSERTs
+    for the flashcards. Returns the new UserPalace.
+    """
+    records = iter(records)
+    header = next(records, None)
+    if not header or header.get("type") != "palace":
+        raise ArchiveError("archive must start with a palace record")
+    if header.get("version") != ARCHIVE_VERSION:
+        raise ArchiveError(f"unsupported archive version {header.get('version')!r}")
+
+    try:
+        name = _text(header, "name", null=True) or "Imported palace"
+    except ArchiveError as exc:
+        raise ArchiveError(f"record 1 (palace): {exc}")
+
+    with transaction.atomic():
+        palace = UserPalace.objects.create(user=user, name=name[:100])
+
+        pending_furniture = {}  # old id -> Furniture
+        furniture_ids = None  # old id -> new id, once the furniture is inserted
+        batch = []
+
+        def flush_furniture():
+            created = Furniture.objects.bulk_create(pending_furniture.values())
+            return {old_id: furniture.id for old_id, furniture in zip(pending_furniture, created)}
+
+        # record 1 is the palace
+        for number, record in enumerate(records, start=2):
+            kind = record.get("type")
+            try:
+                if kind == "furniture":
+                    if furniture_ids is not None:
+                        raise ArchiveError("furniture records must come before flashcards")
+                    old_id, furniture = _furniture(record, user, palace)
+                    pending_furniture[old_id] = furniture
+                elif kind == "flashcard":
+                    if furniture_ids is None:
+                        furniture_ids = flush_furniture()
+                    batch.append(_flashcard(record, user, furniture_ids))
+                    if len(batch) >= BATCH_SIZE:
+                        Flashcard.objects.bulk_create(batch)
+                        batch = []
+                else:
+                    raise ArchiveError(f"unknown record type {kind!r}")
+            except ArchiveError as exc:
+                raise ArchiveError(f"record {number} ({kind}): {exc}")
+
+        if furniture_ids is None:
+            furniture_ids = flush_furniture()
+        if batch:
+            Flashcard.objects.bulk_create(batch)
+
+        palace.palace_matrix = remap_matrix(header.get("palace_matrix"), furniture_ids)
+        palace.save(update_fields=["palace_matrix"])
+
+    return palace
@@ -0,0 +1,115 @@
+import json
+import re
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Cast
+
+from api.models import Furniture
+
+# tiles like "1_" "0_" "2_"
+TILE_RE = re.compile(r"\d+_")
+CELL_RE = re.compile(r"^(?P<room>\d+?)_(?P<payload>[^_]+?)_$")
+
+
+def parse_cell(cell):
+    """
+    Normalize one frontend cell without touching the database.
+
+    Returns (value, new_furniture):
+        value = normalized cell, or None for invalid cells
+        new_furniture = (room, name) when the cell is "room_<name>_"
+                        and a Furniture has to be created for it, else None
+    """
+    if cell is None:
+        return None, None
+
+    if not isinstance(cell, str):
+        return None, None
+
+    s = cell.strip()
+
+    if TILE_RE.fullmatch(s):
+        return s, None
+
+    m = CELL_RE.match(s)
+    if not m:
+        return None, None
+
+    room = m.group("room")
+    payload = m.group("payload")
+
+    # already "room_<id>_"
+    if payload.isdigit():
+        return f"{room}_{payload}_", None
+
+    return None, (room, payload)
+
+
+def normalize_cells(cells, *, user, palace):
+    """
+    Normalize a flat list of cells in two passes:
+    1. parse every cell and collect the new furniture names,
+    2. create all new furniture with one bulk INSERT and
+       rewrite "room_<name>_" cells to "room_<newId>_".
+    """
+    values = []
+    pending = []  # (position in values, room)
+    new_furniture = []
+
+    for cell in cells:
+        value, furniture = parse_cell(cell)
+        if furniture is not None:
+            room, name = furniture
+            pending.append((len(values), room))
+            new_furniture.append(Furniture(user=user, palace=palace, name=name, description=""))
+        values.append(value)
+
+    if new_furniture:
+        # Postgres returns the new ids from the same INSERT
+        created = Furniture.objects.bulk_create(new_furniture)
+        for (index, room), furniture in zip(pending, created):
+            values[index] = f"{room}_{furniture.id}_"
+
+    return values
+
+
+def normalize_palace_matrix(matrix, *, user, palace):
+    """
+    Normalize a 2D palace matrix in place with a constant number of queries.
+    """
+    flat = [cell for row in matrix for cell in row]
+    values = iter(normalize_cells(flat, user=user, palace=palace))
+
+    for row in matrix:
+        for c in range(len(row)):
+            row[c] = next(values)
+
+    return matrix
+
+
+class JSONBSet(Func):
+    """
+    jsonb_set(target, path, new_value): replaces one element of a jsonb document in the database.
+    """
+    function = "jsonb_set"
+    arity = 3
+    output_field = models.JSONField()
+
+
+def set_cells_expression(edits):
+    """
+    Build an UPDATE expression applying [(row, col, value), ...] to palace_matrix.
+    The edits are applied to the stored document inside the UPDATE,
+    so concurrent edits of other cells are not lost.
+    """
+    expression = F("palace_matrix")
+    for row, col, value in edits:
+        expression = JSONBSet(
+            expression,
+            Value([str(row), str(col)], output_field=ArrayField(models.TextField())),
+            # Value(None, JSONField()) would be SQL NULL and null out the whole matrix
+            Cast(Value(json.dumps(value)), models.JSONField()),
+        )
+    return expression
@@ -0,0 +1,125 @@
+"""
+Review load per day: the forecast of due cards (GET /flashcards/forecast/)
+and, with settings.REVIEW_FUZZ, spreading new due dates over nearby days
+with the fewest cards due (see spaced_repetition.fuzz_schedule).
+
+Days are local dates (settings.TIME_ZONE), bucketed by the database in one
+grouped query over the (user, next_review) index.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, DateField, Q, Value
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from api.models import Flashcard
+from .spaced_repetition import fuzz_range, fuzz_schedule
+
+MAX_FORECAST_DAYS = 365
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def forecast(user, days, now=None):
+    """
+    Cards due per day for the next days days, today first.
+
+    Returns:
+    {
+        "now": now,
+        "overdue": cards already due now,
+        "days": [{"date", "due"}] with every day, cards due before today count towards today
+    }
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+
+    rows = (
+        Flashcard.objects.filter(user=user, next_review__lt=_midnight(today + timedelta(days=days)))
+        .annotate(day=Greatest(TruncDate("next_review"), Value(today, output_field=DateField())))
+        .values("day")
+        .annotate(due=Count("id"), overdue=Count("id", filter=Q(next_review__lte=now)))
+        .order_by("day")
+    )
+
+    due = {}
+    overdue = 0
+    for row in rows:
+        due[row["day"]] = row["due"]
+        overdue += row["overdue"]
+
+    dates = [today + timedelta(days=offset) for offset in range(days)]
+    return {
+        "now": now,
+        "overdue": overdue,
+        "days": [{"date": date, "due": due.get(date, 0)} for date in dates],
+    }
+
+
+def due_per_day(user, first, last, exclude=()):
+    """
+    (date, cards due) rows for first <= date <= last, without the cards in exclude.
+    """
+    return (
+        Flashcard.objects.filter(
+            user=user,
+            next_review__gte=_midnight(first),
+            next_review__lt=_midnight(last + timedelta(days=1)),
+        )
+        .exclude(id__in=exclude)
+        .annotate(day=TruncDate("next_review"))
+        .values_list("day")
+        .annotate(due=Count("id"))
+        .order_by()
+    )
+
+
+def _window(updated):
+    """
+    (first, last) date the rows of updated may move to, None when none can move.
+    """
+    dates = []
+    for days, moment in zip(updated["interval"], updated["next_review"]):
+        shortest, longest = fuzz_range(days)
+        if shortest < longest:
+            reviewed_at = moment - timedelta(days=days)
+            dates.append(timezone.localdate(reviewed_at + timedelta(days=shortest)))
+            dates.append(timezone.localdate(reviewed_at + timedelta(days=longest)))
+    return (min(dates), max(dates)) if dates else None
+
+
+def _fuzzed(updated, card_ids, load):
+    seeds = [
+        f"{settings.REVIEW_FUZZ_SEED}:{card_id}:{repetition}"
+        for card_id, repetition in zip(card_ids, updated["repetition"])
+    ]
+    interval, next_review = fuzz_schedule(updated["interval"], updated["next_review"], seeds, load)
+    return {**updated, "interval": interval, "next_review": next_review}
+
+
+def spread_reviews(user, card_ids, updated):
+    """
+    updated (apply_sm2_batch result for the cards card_ids) with every next
+    review moved to the least loaded day of its fuzz_range, one extra query.
+    Returned as is unless settings.REVIEW_FUZZ is on.
+    """
+    window = _window(updated) if settings.REVIEW_FUZZ else None
+    if window is None:
+        return updated
+    load = dict(due_per_day(user, *window, exclude=card_ids))
+    return _fuzzed(updated, card_ids, load)
+
+
+async def aspread_reviews(user, card_ids, updated):
+    """
+    spread_reviews() on the async ORM.
+    """
+    window = _window(updated) if settings.REVIEW_FUZZ else None
+    if window is None:
+        return updated
+    load = {day: due async for day, due in due_per_day(user, *window, exclude=card_ids)}
+    return _fuzzed(updated, card_ids, load)
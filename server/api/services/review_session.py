@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+from django.core import signing
+from django.db.models import DurationField, ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from api.models import Flashcard
+
+SALT = "api.review_session"
+# sessions older than this are refused, the client starts a new one
+MAX_AGE = timedelta(days=1)
+MAX_BATCH = 100
+
+
+class InvalidSession(Exception):
+    pass
+
+
+def overdue(as_of):
+    """
+    (as_of - next_review) / interval: how far past due a card is, relative to
+    its interval. A card a day late on a 1 day interval comes before one a
+    day late on a 30 day interval.
+    """
+    late = ExpressionWrapper(Value(as_of) - F("next_review"), output_field=DurationField())
+    return ExpressionWrapper(late / Greatest(F("interval"), Value(1)), output_field=DurationField())
+
+
+def session_queryset(user, session):
+    """
+    The cards of the session not handed out yet, in session order.
+
+    A session covers the cards of the palace due at its start (as_of), most
+    overdue first, ties by id. Reviewing a card schedules it after as_of, so
+    it drops out, and the others keep their overdue value. The session can
+    therefore continue with a keyset condition on the last card handed out
+    (overdue, id), like KeysetPagination.
+    """
+    as_of = session["as_of"]
+    queryset = (
+        Flashcard.objects
+        .filter(user=user, furniture__palace_id=session["palace"], next_review__lte=as_of)
+        .annotate(overdue=overdue(as_of))
+    )
+    if session["after"] is not None:
+        last_overdue, last_id = session["after"]
+        queryset = queryset.filter(Q(overdue__lt=last_overdue) | Q(overdue=last_overdue, id__gt=last_id))
+    return queryset.order_by("-overdue", "id")
+
+
+def start_session(user, palace, now=None):
+    return {"palace": palace.id, "user": user.id, "as_of": now or timezone.now(), "after": None}
+
+
+def advance(session, cards):
+    """
+    The session after handing out cards (the next batch of session_queryset).
+    """
+    if not cards:
+        return session
+    return {**session, "after": [cards[-1].overdue, cards[-1].id]}
+
+
+def next_batch(user, session, size):
+    """
+    (cards, session): the next size cards and the session after them.
+    """
+    cards = list(session_queryset(user, session)[:size])
+    return cards, advance(session, cards)
+
+
+async def anext_batch(user, session, size):
+    """
+    next_batch() on the async ORM.
+    """
+    cards = [card async for card in session_queryset(user, session)[:size]]
+    return cards, advance(session, cards)
+
+
+def dump_session(session):
+    """
+    The session as a signed, URL safe cursor.
+    """
+    after = session["after"]
+    if after is not None:
+        # whole microseconds, the same value Postgres computed
+        after = [after[0] // timedelta(microseconds=1), after[1]]
+    return signing.dumps(
+        [session["palace"], session["user"], session["as_of"].isoformat(), after],
+        salt=SALT, compress=True,
+    )
+
+
+def load_session(cursor, user):
+    """
+    The session of cursor, InvalidSession if it is forged, expired or someone else's.
+    """
+    try:
+        palace, user_id, as_of, after = signing.loads(cursor, salt=SALT, max_age=MAX_AGE)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidSession("Invalid or expired review session")
+    if user_id != user.id:
+        raise InvalidSession("Invalid or expired review session")
+
+    if after is not None:
+        after = [timedelta(microseconds=after[0]), after[1]]
+    return {"palace": palace, "user": user_id, "as_of": datetime.fromisoformat(as_of), "after": after}
+
+
+def continuation(data, user):
+    """
+    The optional session part of a review body: {"session": "<cursor>", "next": 1}.
+    Returns (session, size), session None when the review is not part of one.
+    """
+    cursor = data.get("session")
+    if cursor is None:
+        return None, 0
+    if not isinstance(cursor, str):
+        raise InvalidSession("session must be a string")
+
+    try:
+        size = int(data.get("next", 1))
+    except (TypeError, ValueError):
+        raise InvalidSession("next must be an integer")
+    if not (0 <= size <= MAX_BATCH):
+        raise InvalidSession(f"next must be between 0 and {MAX_BATCH}")
+
+    return load_session(cursor, user), size
@@ -0,0 +1,125 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from api.models import Flashcard, FlashcardReview
+from .spaced_repetition import apply_sm2_batch
+from .review_load import spread_reviews
+
+SCHEDULING_FIELDS = ["interval", "ease_factor", "repetition", "next_review", "last_reviewed_at", "updated_at"]
+
+
+class UnknownFlashcards(Exception):
+    def __init__(self, ids):
+        super().__init__(f"Unknown flashcards: {sorted(ids)}")
+        self.ids = sorted(ids)
+
+
+def apply_review_batch(user, entries):
+    """
+    Apply many reviews in one transaction.
+
+    entries = list of dicts: id, grade, idempotency_key, reviewed_at (optional)
+
+    Reviews whose idempotency key was already recorded are skipped,
+    so a client can safely resend a batch after a lost response.
+    Reviews of the same card are applied in reviewed_at order.
+
+    Returns (results, cards):
+        results = [{"idempotency_key", "id", "status": "applied" | "duplicate"}]
+        cards = touched Flashcard instances with their current scheduling state
+
+    Raises IntegrityError if the batch keeps colliding with concurrent ones.
+    """
+    try:
+        return _apply_review_batch(user, entries)
+    except IntegrityError:
+        # a concurrent batch on other cards recorded one of the keys between the
+        # lookup and the insert below; it has committed by now (the insert waited
+        # for it), so a second run reports the key as a duplicate
+        return _apply_review_batch(user, entries)
+
+
+def _apply_review_batch(user, entries):
+    now = timezone.now()
+    card_ids = {entry["id"] for entry in entries}
+
+    with transaction.atomic():
+        # lock the cards first, so concurrent resends of the same batch serialize here
+        cards = {
+            card.id: card
+            for card in Flashcard.objects.select_for_update().filter(user=user, id__in=card_ids)
+        }
+        missing = card_ids - cards.keys()
+        if missing:
+            raise UnknownFlashcards(missing)
+
+        seen = set(
+            FlashcardReview.objects
+            .filter(user=user, idempotency_key__in=[entry["idempotency_key"] for entry in entries])
+            .values_list("idempotency_key", flat=True)
+        )
+
+        results = []
+        pending = []
+        for entry in entries:
+            key = entry["idempotency_key"]
+            status = "duplicate" if key in seen else "applied"
+            results.append({"idempotency_key": key, "id": entry["id"], "status": status})
+            if status == "applied":
+                seen.add(key)
+                # reviews recorded by a skewed client clock can't be in the future
+                pending.append({**entry, "reviewed_at": min(entry.get("reviewed_at") or now, now)})
+
+        pending.sort(key=lambda entry: entry["reviewed_at"])
+
+        # a card reviewed k times in the batch takes part in rounds 0..k-1,
+        # every round runs through the batch engine once
+        rounds = []
+        reviews_per_card = {}
+        for entry in pending:
+            index = reviews_per_card.get(entry["id"], 0)
+            reviews_per_card[entry["id"]] = index + 1
+            if index == len(rounds):
+                rounds.append([])
+            rounds[index].append(entry)
+
+        logs = []
+        touched = {}
+        for batch in rounds:
+            batch_cards = [cards[entry["id"]] for entry in batch]
+            updated = spread_reviews(user, [card.id for card in batch_cards], apply_sm2_batch(
+                [card.repetition for card in batch_cards],
+                [card.interval for card in batch_cards],
+                [card.ease_factor for card in batch_cards],
+                [entry["grade"] for entry in batch],
+                now=[entry["reviewed_at"] for entry in batch],
+            ))
+
+            for i, (card, entry) in enumerate(zip(batch_cards, batch)):
+                card.repetition = updated["repetition"][i]
+                card.interval = updated["interval"][i]
+                card.ease_factor = updated["ease_factor"][i]
+                card.next_review = updated["next_review"][i]
+                card.last_reviewed_at = entry["reviewed_at"]
+                card.updated_at = now
+                touched[card.id] = card
+
+                logs.append(FlashcardReview(
+                    user=user,
+                    flashcard=card,
+                    idempotency_key=entry["idempotency_key"],
+                    grade=entry["grade"],
+                    reviewed_at=entry["reviewed_at"],
+                    interval=card.interval,
+                    ease_factor=card.ease_factor,
+                    repetition=card.repetition,
+                    next_review=card.next_review,
+                ))
+
+        if touched:
+            # bulk_update skips auto_now, updated_at is set above
+            Flashcard.objects.bulk_update(touched.values(), SCHEDULING_FIELDS)
+            FlashcardReview.objects.bulk_create(logs)
+
+    ordered = sorted(cards.values(), key=lambda card: (card.next_review, card.id))
+    return results, ordered
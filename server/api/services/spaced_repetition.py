@@ -1,19 +1,29 @@
+import random
+
 from django.utils import timezone
 from datetime import timedelta
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
 
-def apply_sm2(card, grade):
-    """
-    card = dict containing:
-    id, front, back, interval, ease_factor, repetition, next_review
-    """
+# below this size the numpy call overhead costs more than the Python loop
+VECTORIZE_MIN_BATCH = 64
 
-    # Extract previous values
-    repetition = card.get("repetition", 0)
-    interval = card.get("interval", 1)
-    ef = card.get("ease_factor", 2.5)
+MIN_EASE_FACTOR = 1.3
 
-    # SM-2 Algorithm
+# fuzz_schedule: intervals from FUZZ_MIN_INTERVAL days on move by up to
+# FUZZ_FACTOR of the interval (at least one day) in either direction
+FUZZ_MIN_INTERVAL = 3
+FUZZ_FACTOR = 0.05
+
+
+def sm2_step(repetition, interval, ef, grade):
+    """
+    One SM-2 step on plain values.
+    Returns (repetition, interval, ease_factor).
+    """
     if grade >= 3:
         if repetition == 0:
             interval = 1
@@ -29,10 +39,31 @@ def apply_sm2(card, grade):
 
     # Update EF
     ef = ef + (0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
-    if ef < 1.3:
-        ef = 1.3
+    if ef < MIN_EASE_FACTOR:
+        ef = MIN_EASE_FACTOR
+
+    return repetition, interval, ef
 
-    next_review_date = timezone.now() + timedelta(days=interval)
+
+def apply_sm2(card, grade, now=None):
+    """
+    card = dict containing:
+    id, front, back, interval, ease_factor, repetition, next_review
+
+    now = moment of the review, defaults to timezone.now()
+    """
+
+    # Extract previous values
+    repetition = card.get("repetition", 0)
+    interval = card.get("interval", 1)
+    ef = card.get("ease_factor", 2.5)
+
+    # SM-2 Algorithm
+    repetition, interval, ef = sm2_step(repetition, interval, ef, grade)
+
+    if now is None:
+        now = timezone.now()
+    next_review_date = now + timedelta(days=interval)
 
     # Save changes inside card dict
     card["repetition"] = repetition
@@ -41,3 +72,119 @@ def apply_sm2(card, grade):
     card["next_review"] = next_review_date.isoformat()
 
     return card
+
+
+def apply_sm2_batch(repetition, interval, ease_factor, grade, now=None, clock=timezone.now):
+    """
+    SM-2 over columns: row i of every input describes one card.
+
+    now = review moment, either one datetime for the whole batch
+          or a sequence with one datetime per row
+    clock = called once when now is not given
+
+    Returns a dict of columns (lists of native values):
+    repetition, interval, ease_factor, next_review (datetimes).
+    Results are identical to calling apply_sm2 row by row.
+    """
+    size = len(grade)
+    if not (len(repetition) == len(interval) == len(ease_factor) == size):
+        raise ValueError("apply_sm2_batch columns must have the same length")
+
+    if np is not None and size >= VECTORIZE_MIN_BATCH:
+        repetition, interval, ease_factor = _sm2_vectorized(repetition, interval, ease_factor, grade)
+    else:
+        steps = [sm2_step(*row) for row in zip(repetition, interval, ease_factor, grade)]
+        repetition, interval, ease_factor = (
+            [list(column) for column in zip(*steps)] if steps else ([], [], [])
+        )
+
+    if now is None:
+        now = clock()
+
+    if isinstance(now, (list, tuple)):
+        next_review = [moment + timedelta(days=days) for moment, days in zip(now, interval)]
+    else:
+        next_review = [now + timedelta(days=days) for days in interval]
+
+    return {
+        "repetition": repetition,
+        "interval": interval,
+        "ease_factor": ease_factor,
+        "next_review": next_review,
+    }
+
+
+def fuzz_range(interval):
+    """
+    (shortest, longest) interval in days a review scheduled interval days ahead may move to.
+    """
+    if interval < FUZZ_MIN_INTERVAL:
+        return interval, interval
+    delta = max(1, round(interval * FUZZ_FACTOR))
+    return interval - delta, interval + delta
+
+
+def fuzz_schedule(interval, next_review, seeds, load=None):
+    """
+    Spread reviews that SM-2 puts on the same day over nearby days
+    (cards reviewed together would otherwise come due together).
+
+    interval, next_review = columns as returned by apply_sm2_batch
+    seeds = one per row, the same seed always picks the same day
+    load = optional {date: cards due}, each row then moves to the least
+           loaded day of its fuzz_range (the seed breaks ties) and is counted
+           there, so rows of one batch spread as well
+
+    Returns new (interval, next_review) columns. Dates are local dates.
+    """
+    new_interval = []
+    new_next_review = []
+    for days, moment, seed in zip(interval, next_review, seeds):
+        shortest, longest = fuzz_range(days)
+        if shortest < longest:
+            reviewed_at = moment - timedelta(days=days)
+            rng = random.Random(seed)
+            if load is None:
+                days = rng.randint(shortest, longest)
+            else:
+                days = min(
+                    range(shortest, longest + 1),
+                    key=lambda candidate: (
+                        load.get(timezone.localdate(reviewed_at + timedelta(days=candidate)), 0),
+                        rng.random(),
+                    ),
+                )
+            moment = reviewed_at + timedelta(days=days)
+
+        if load is not None:
+            day = timezone.localdate(moment)
+            load[day] = load.get(day, 0) + 1
+        new_interval.append(days)
+        new_next_review.append(moment)
+
+    return new_interval, new_next_review
+
+
+def _sm2_vectorized(repetition, interval, ease_factor, grade):
+    # same operations in the same order as sm2_step, so float results match bit for bit
+    repetition = np.asarray(repetition, dtype=np.int64)
+    interval = np.asarray(interval, dtype=np.int64)
+    ef = np.asarray(ease_factor, dtype=np.float64)
+    grade = np.asarray(grade, dtype=np.int64)
+
+    passed = grade >= 3
+    # np.rint rounds half to even, like round()
+    grown = np.rint(interval * ef).astype(np.int64)
+
+    new_interval = np.where(
+        passed,
+        np.where(repetition == 0, 1, np.where(repetition == 1, 6, grown)),
+        1,
+    )
+    new_repetition = np.where(passed, repetition + 1, 0)
+
+    penalty = 5 - grade
+    new_ef = ef + (0.1 - penalty * (0.08 + penalty * 0.02))
+    new_ef = np.where(new_ef < MIN_EASE_FACTOR, MIN_EASE_FACTOR, new_ef)
+
+    return new_repetition.tolist(), new_interval.tolist(), new_ef.tolist()
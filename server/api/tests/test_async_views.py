@@ -0,0 +1,223 @@
+import importlib.util
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import AsyncToSync, SyncToAsync, async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, override_settings
+from django.urls import include, path, resolve
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import async_views
+from api.models import UserPalace, Furniture, Flashcard
+from api.urls import async_urlpatterns, router
+from memory_palace.asgi import StaticFiles
+
+# the API with the async hot endpoints in front, as with ASYNC_VIEWS=True
+urlpatterns = [
+    path("api/", include(async_urlpatterns + router.urls)),
+]
+
+
+class AsyncViewParityTests(APITestCase):
+    """
+    The async endpoints must answer exactly like the DRF actions they replace.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="async", email="async@example.com", password="password123"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        now = timezone.now()
+        for f in range(2):
+            furniture = Furniture.objects.create(user=self.user, palace=self.palace, name=f"item{f}")
+            for c in range(4):
+                Flashcard.objects.create(
+                    user=self.user,
+                    furniture=furniture,
+                    front=f"front {f}/{c}",
+                    back=f"back {f}/{c}",
+                    furniture_slot_index=c,
+                    next_review=now - timedelta(days=c) + timedelta(days=2 * f),
+                )
+
+    def get_both(self, url, **extra):
+        headers = {**self.auth, **extra}
+        sync = self.client.get(url, **headers)
+        with override_settings(ROOT_URLCONF=__name__):
+            asynchronous = self.client.get(url, **headers)
+        return sync, asynchronous
+
+    def assertSameResponse(self, sync, asynchronous):
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(asynchronous.content, sync.content)
+        for header in ("Content-Type", "ETag", "Last-Modified", "Vary", "WWW-Authenticate"):
+            self.assertEqual(asynchronous.get(header), sync.get(header), header)
+
+    def test_routes_resolve_to_async_views(self):
+        for url, view in (
+            ("/api/flashcards/queue/", async_views.flashcard_queue),
+            ("/api/flashcards/1/review/", async_views.flashcard_review),
+            ("/api/palaces/1/flashcards/", async_views.palace_flashcards),
+        ):
+            func = resolve(url, urlconf=__name__).func
+            self.assertIs(func, view)
+            self.assertTrue(iscoroutinefunction(func))
+
+    def test_queue(self):
+        for url in (
+            "/api/flashcards/queue/",
+            f"/api/flashcards/queue/?furnitureId={Furniture.objects.first().id}",
+            "/api/flashcards/queue/?page_size=2",
+            "/api/flashcards/queue/?fields=id,front",
+        ):
+            self.assertSameResponse(*self.get_both(url))
+
+    def test_queue_not_modified(self):
+        etag = self.client.get("/api/flashcards/queue/", **self.auth)["ETag"]
+
+        sync, asynchronous = self.get_both("/api/flashcards/queue/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(asynchronous.status_code, 304)
+        self.assertSameResponse(sync, asynchronous)
+
+    def test_palace_flashcards_pages(self):
+        url = f"/api/palaces/{self.palace.id}/flashcards/?page_size=3"
+        while url:
+            sync, asynchronous = self.get_both(url)
+            self.assertSameResponse(sync, asynchronous)
+            url = sync.json()["next"]
+
+        self.assertSameResponse(*self.get_both(f"/api/palaces/{self.palace.id}/flashcards/?onlyInReview=true"))
+
+    def test_errors(self):
+        other = UserPalace.objects.create(
+            user=User.objects.create_user(username="other", password="password123"), name="Other"
+        )
+
+        self.assertSameResponse(*self.get_both(f"/api/palaces/{other.id}/flashcards/"))
+        self.assertSameResponse(*self.get_both("/api/palaces/abc/flashcards/"))
+        self.assertSameResponse(*self.get_both("/api/flashcards/queue/?cursor=broken"))
+        self.assertSameResponse(*self.get_both("/api/flashcards/queue/?fields=nope"))
+        self.assertSameResponse(*self.get_both("/api/flashcards/queue/", HTTP_AUTHORIZATION=""))
+        self.assertSameResponse(*self.get_both("/api/flashcards/queue/", HTTP_AUTHORIZATION="Bearer broken"))
+
+    def test_msgpack(self):
+        for url in ("/api/flashcards/queue/", f"/api/palaces/{self.palace.id}/flashcards/?page_size=3"):
+            self.assertSameResponse(*self.get_both(url, HTTP_ACCEPT="application/msgpack"))
+
+    def post_both(self, card_ids, data, **extra):
+        headers = {**self.auth, **extra}
+        sync = self.client.post(f"/api/flashcards/{card_ids[0]}/review/", data, format="json", **headers)
+        with override_settings(ROOT_URLCONF=__name__):
+            asynchronous = self.client.post(
+                f"/api/flashcards/{card_ids[1]}/review/", data, format="json", **headers
+            )
+        return sync, asynchronous
+
+    def test_review(self):
+        first, second = Flashcard.objects.filter(furniture_slot_index=0).order_by("id")
+
+        sync, asynchronous = self.post_both([first.id, second.id], {"grade": 4})
+
+        self.assertEqual(asynchronous.status_code, 200)
+        expected = sync.json()
+        expected["flashcard"].update(id=second.id, furniture=second.furniture_id)
+        actual = asynchronous.json()
+        for response in (expected, actual):
+            for field in ("front", "back", "next_review", "updated_at", "created_at"):
+                response["flashcard"].pop(field)
+        self.assertEqual(actual, expected)
+
+        second.refresh_from_db()
+        self.assertEqual((second.repetition, second.interval), (1, 1))
+
+    def test_review_errors(self):
+        first, second = Flashcard.objects.order_by("id")[:2]
+
+        for data in ({}, {"grade": "x"}, {"grade": 9}):
+            self.assertSameResponse(*self.post_both([first.id, second.id], data))
+
+        self.assertSameResponse(*self.post_both([0, 0], {"grade": 3}))
+        self.assertSameResponse(*self.post_both([first.id, second.id], {"grade": 3}, HTTP_IF_MATCH='"stale"'))
+
+        for body in (b'{"grade": ', b"\xc1"):
+            content_type = "application/json" if body.startswith(b"{") else "application/msgpack"
+            sync = self.client.generic(
+                "POST", f"/api/flashcards/{first.id}/review/", body, content_type=content_type, **self.auth
+            )
+            with override_settings(ROOT_URLCONF=__name__):
+                asynchronous = self.client.generic(
+                    "POST", f"/api/flashcards/{first.id}/review/", body, content_type=content_type, **self.auth
+                )
+            self.assertEqual(sync.status_code, 400)
+            self.assertSameResponse(sync, asynchronous)
+
+
+class ASGIStackTests(SimpleTestCase):
+    """
+    Under the ASGI server a request must not be handed to a thread on its way to the view.
+    """
+
+    def test_middleware_chain_has_no_sync_adapter(self):
+        # the settings module as the ASGI server loads it
+        spec = importlib.util.find_spec("memory_palace.settings")
+        settings_module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(os.environ, {"SERVER": "asgi"}):
+            spec.loader.exec_module(settings_module)
+        middleware = settings_module.MIDDLEWARE
+
+        with override_settings(MIDDLEWARE=middleware):
+            handler = ASGIHandler()
+
+        links, link = [], handler._middleware_chain
+        while link is not None:
+            links.append(link)
+            self.assertNotIsInstance(link, (SyncToAsync, AsyncToSync), links)
+            self.assertTrue(iscoroutinefunction(link), link)
+            link = getattr(link, "__wrapped__", None) or getattr(link, "get_response", None)
+        # every middleware and the view dispatch, each behind its exception wrapper
+        self.assertEqual(len(links), 2 * len(middleware) + 2)
+
+    def request(self, application, path, headers=()):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "root_path": "", "headers": list(headers)}
+        async_to_sync(application)(scope, receive, send)
+        return messages
+
+    def test_static_files_are_served_in_front_of_django(self):
+        async def django(scope, receive, send):
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "app.css"), "wb") as file:
+                file.write(b"body{}" * 20000)
+            with override_settings(STATIC_ROOT=root, DEBUG=False):
+                application = StaticFiles(django)
+
+            start, *body = self.request(application, "/static/app.css")
+            self.assertEqual(start["status"], 200)
+            self.assertIn((b"content-type", b"text/css; charset=\"utf-8\""), start["headers"])
+            self.assertEqual(b"".join(message["body"] for message in body), b"body{}" * 20000)
+            self.assertFalse(body[-1].get("more_body", False))
+
+            etag = dict(start["headers"])[b"etag"]
+            not_modified = self.request(application, "/static/app.css", [(b"if-none-match", etag)])
+            self.assertEqual(not_modified[0]["status"], 304)
+            self.assertEqual(self.request(application, "/api/flashcards/")[0]["status"], 204)
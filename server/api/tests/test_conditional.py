@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import UserPalace, Furniture, Flashcard
+
+
+class ConditionalRequestTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="etag", password="password123")
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        self.furniture = Furniture.objects.create(user=self.user, palace=self.palace, name="desk")
+        self.card = Flashcard.objects.create(
+            user=self.user, furniture=self.furniture, front="q", back="a", furniture_slot_index=0
+        )
+
+    def test_unchanged_palace_list_is_not_modified(self):
+        first = self.client.get("/api/palaces/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+
+        # only the aggregate query runs, nothing is serialized
+        with self.assertNumQueries(1):
+            second = self.client.get("/api/palaces/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_nested_change_changes_palace_etag(self):
+        etag = self.client.get(f"/api/palaces/{self.palace.id}/")["ETag"]
+
+        self.card.back = "changed"
+        self.card.save()
+
+        response = self.client.get(f"/api/palaces/{self.palace.id}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_delete_changes_flashcard_list_etag(self):
+        Flashcard.objects.create(
+            user=self.user, furniture=self.furniture, front="q2", back="a2", furniture_slot_index=1
+        )
+        etag = self.client.get("/api/flashcards/")["ETag"]
+
+        self.card.delete()
+
+        response = self.client.get("/api/flashcards/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def due_set_changes_by_the_clock(self, url):
+        """
+        Request url, then swap a due card for one that became due: same count,
+        same max(updated_at). Returns (first response, conditional response, the new card).
+        """
+        now = timezone.now()
+        later = Flashcard.objects.create(
+            user=self.user, furniture=self.furniture, front="later", back="a",
+            furniture_slot_index=1, next_review=now + timedelta(hours=1),
+        )
+        gone = Flashcard.objects.create(
+            user=self.user, furniture=self.furniture, front="gone", back="a", furniture_slot_index=2
+        )
+        # most recently updated, stays due
+        self.card.save()
+
+        first = self.client.get(url)
+        gone.delete()
+        with mock.patch("django.utils.timezone.now", return_value=now + timedelta(hours=2)):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        return first, second, later
+
+    def test_due_queue_etag_follows_the_due_cards(self):
+        for url in ("/api/flashcards/queue/", f"/api/palaces/{self.palace.id}/flashcards/?onlyInReview=true"):
+            Flashcard.objects.exclude(pk=self.card.pk).delete()
+            first, second, later = self.due_set_changes_by_the_clock(url)
+            self.assertEqual(second.status_code, 200)
+            self.assertIn(later.id, [card["id"] for card in second.json()])
+            self.assertNotIn("Last-Modified", first)
+
+    @override_settings(ROOT_URLCONF="api.tests.test_async_views")
+    def test_async_due_queue_etag_follows_the_due_cards(self):
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        _, second, later = self.due_set_changes_by_the_clock("/api/flashcards/queue/")
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(later.id, [card["id"] for card in second.json()])
+
+    def test_unchanged_due_queue_is_not_modified(self):
+        etag = self.client.get("/api/flashcards/queue/")["ETag"]
+        response = self.client.get("/api/flashcards/queue/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_varies_with_query_string(self):
+        plain = self.client.get("/api/flashcards/")["ETag"]
+        paged = self.client.get("/api/flashcards/?page_size=1")["ETag"]
+
+        self.assertNotEqual(plain, paged)
+
+    def test_if_match_guards_writes(self):
+        url = f"/api/furniture/{self.furniture.id}/"
+        etag = self.client.get(url)["ETag"]
+        body = {"user": self.user.id, "name": "table", "description": ""}
+
+        stale = self.client.put(url, body, format="json", HTTP_IF_MATCH='"stale"')
+        self.assertEqual(stale.status_code, 412)
+
+        fresh = self.client.put(url, body, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+
+        # the write changed the resource, the old etag no longer matches
+        again = self.client.put(url, body, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(again.status_code, 412)
+
+    def test_malformed_id_is_404(self):
+        response = self.client.get("/api/palaces/abc/")
+
+        self.assertEqual(response.status_code, 404)
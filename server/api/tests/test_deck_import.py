@@ -0,0 +1,125 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard
+from api.services import deck_import
+
+
+class DeckImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        self.palace = UserPalace.objects.create(user=self.user, name="Course")
+
+    def post_deck(self, content, content_type="text/csv"):
+        return self.client.generic(
+            "POST", f"/api/palaces/{self.palace.id}/deck/",
+            content.encode("utf-8"), content_type=content_type,
+        )
+
+    def test_csv_creates_furniture_and_slots(self):
+        rows = ["front,back,furniture"] + [f"q{i},a{i},Verbs" for i in range(20)] + ["hola,hello,Nouns"]
+        response = self.post_deck("\n".join(rows))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {"furniture_created": 4, "flashcards_created": 21})
+
+        names = list(Furniture.objects.filter(palace=self.palace).order_by("id").values_list("name", flat=True))
+        self.assertEqual(names, ["Verbs", "Verbs (2)", "Verbs (3)", "Nouns"])
+
+        verbs = Furniture.objects.get(palace=self.palace, name="Verbs")
+        slots = list(verbs.flashcards.order_by("furniture_slot_index").values_list("furniture_slot_index", "front"))
+        self.assertEqual(slots, [(i, f"q{i}") for i in range(9)])
+        self.assertEqual(Furniture.objects.get(name="Verbs (3)").flashcards.count(), 2)
+
+    def test_tsv_with_quotes_and_existing_furniture(self):
+        shelf = Furniture.objects.create(user=self.user, palace=self.palace, name="Shelf")
+        for slot in (0, 2):
+            Flashcard.objects.create(
+                user=self.user, furniture=shelf, front="old", back="old", furniture_slot_index=slot
+            )
+
+        content = 'furniture\tfront\tback\ticon_name\nShelf\t"multi\nline"\tback\tbook\nShelf\tsecond\tback\t\n'
+        response = self.post_deck(content, content_type="text/tab-separated-values")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["furniture_created"], 0)
+        cards = list(shelf.flashcards.exclude(front="old").order_by("furniture_slot_index"))
+        self.assertEqual([(c.furniture_slot_index, c.front, c.icon_name) for c in cards], [
+            (1, "multi\nline", "book"),
+            (3, "second", None),
+        ])
+
+    def test_batched_inserts(self):
+        content = "\n".join(["furniture,front,back"] + [f"item{i // 9},q{i},a{i}" for i in range(90)])
+
+        # furniture + slots + savepoint, then one furniture INSERT and one flashcard INSERT per batch
+        with self.assertNumQueries(6):
+            counts = deck_import.import_deck(
+                io.BytesIO(content.encode()), user=self.user, palace=self.palace
+            )
+
+        self.assertEqual(counts, {"furniture_created": 10, "flashcards_created": 90})
+
+    def test_invalid_row_imports_nothing(self):
+        response = self.post_deck("furniture,front,back\nShelf,q,a\nShelf,,a\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "line 3: furniture, front and back are required")
+        self.assertFalse(Furniture.objects.filter(palace=self.palace).exists())
+
+    def test_slot_taken_by_concurrent_import_returns_409(self):
+        shelf = Furniture.objects.create(user=self.user, palace=self.palace, name="Shelf")
+        read_slots = deck_import._Slots.__init__
+
+        def read_then_lose_slot(slots, user, palace):
+            read_slots(slots, user, palace)
+            # another import commits a card into the first free slot
+            Flashcard.objects.create(user=self.user, furniture=shelf, front="x", back="x", furniture_slot_index=0)
+
+        with mock.patch.object(deck_import._Slots, "__init__", read_then_lose_slot):
+            response = self.post_deck("furniture,front,back\nShelf,q,a\nLamp,q,a\n")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Flashcard.objects.filter(front="q").exists())
+        self.assertFalse(Furniture.objects.filter(name="Lamp").exists())
+
+    def test_missing_columns(self):
+        response = self.post_deck("front,back\nq,a\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "missing columns: furniture")
+
+    def test_multipart_upload_with_bom(self):
+        upload = io.BytesIO("\ufefffurniture,front,back\nDesk,q,a\n".encode("utf-8"))
+        upload.name = "deck.csv"
+
+        response = self.client.post(
+            f"/api/palaces/{self.palace.id}/deck/", {"file": upload}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Furniture.objects.get(palace=self.palace).name, "Desk")
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False, encoding="utf-8") as deck:
+            deck.write("furniture\tfront\tback\nLamp\tq\ta\n")
+        self.addCleanup(os.unlink, deck.name)
+
+        call_command("import_deck", deck.name, user=self.user.id, stdout=io.StringIO())
+
+        palace = UserPalace.objects.get(user=self.user, name=os.path.basename(deck.name)[:-4])
+        self.assertEqual(Flashcard.objects.filter(furniture__palace=palace).count(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command("import_deck", deck.name, user=self.user.id, palace=999999, stdout=io.StringIO())
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard
+
+
+class DueSummaryTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="badges", email="badges@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now()
+
+    def make_card(self, furniture, slot, days, repetition=0):
+        return Flashcard.objects.create(
+            user=self.user,
+            furniture=furniture,
+            front="front",
+            back="back",
+            furniture_slot_index=slot,
+            next_review=self.now + timedelta(days=days),
+            repetition=repetition,
+            last_reviewed_at=self.now - timedelta(days=1) if repetition else None,
+        )
+
+    def make_palace(self, furniture_count):
+        palace = UserPalace.objects.create(user=self.user, name="Palace")
+        for f in range(furniture_count):
+            furniture = Furniture.objects.create(user=self.user, palace=palace, name=f"item{f}")
+            self.make_card(furniture, 0, -1)              # due, new
+            self.make_card(furniture, 1, -2, repetition=2)  # due
+            self.make_card(furniture, 2, 3, repetition=1)   # not due
+        return palace
+
+    def test_counts_per_palace_and_furniture(self):
+        palace = self.make_palace(2)
+        other_user = User.objects.create_user(username="other", password="password123")
+        other_palace = UserPalace.objects.create(user=other_user, name="Other")
+        other_furniture = Furniture.objects.create(user=other_user, palace=other_palace, name="x")
+        Flashcard.objects.create(user=other_user, furniture=other_furniture, front="f", back="b")
+
+        response = self.client.get("/api/palaces/due-summary/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"], {"due": 4, "new": 2, "total": 6})
+        self.assertEqual(len(response.data["palaces"]), 1)
+
+        summary = response.data["palaces"][0]
+        self.assertEqual(summary["id"], palace.id)
+        self.assertEqual((summary["due"], summary["new"], summary["total"]), (4, 2, 6))
+        self.assertEqual(
+            [(item["due"], item["new"], item["total"]) for item in summary["furniture"]],
+            [(2, 1, 3), (2, 1, 3)],
+        )
+
+    def test_lapsed_cards_are_not_new(self):
+        furniture = Furniture.objects.create(
+            user=self.user, palace=UserPalace.objects.create(user=self.user, name="Palace"), name="desk"
+        )
+        card = self.make_card(furniture, 0, -1)
+        self.make_card(furniture, 1, -1)
+
+        # a failed first review leaves repetition at 0
+        response = self.client.post(f"/api/flashcards/{card.id}/review/", {"grade": 1}, format="json")
+        self.assertEqual(response.data["flashcard"]["repetition"], 0)
+
+        response = self.client.get("/api/palaces/due-summary/")
+        self.assertEqual(response.data["totals"], {"due": 1, "new": 1, "total": 2})
+
+    def test_constant_queries(self):
+        self.make_palace(1)
+        with self.assertNumQueries(1):
+            self.client.get("/api/palaces/due-summary/")
+
+        for _ in range(5):
+            self.make_palace(3)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/palaces/due-summary/")
+
+        self.assertEqual(len(response.data["palaces"]), 6)
+        self.assertEqual(response.data["totals"]["total"], 48)
+
+    def test_empty(self):
+        response = self.client.get("/api/palaces/due-summary/")
+
+        self.assertEqual(response.data["totals"], {"due": 0, "new": 0, "total": 0})
+        self.assertEqual(response.data["palaces"], [])
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.fast_serializers import fast_serializer, ordered_prefetch
+from api.models import UserPalace, Furniture, Flashcard
+from api.serializers import FlashcardSerializer, FurnitureSerializer, UserPalaceSerializer
+
+
+class FastSerializerTests(APITestCase):
+    """
+    The fast path must render exactly the bytes the DRF serializers render.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="fast", email="fast@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(
+            user=self.user, name="Palace ☃", palace_matrix=[["1_chairWood_", None], ["", "2"]]
+        )
+        UserPalace.objects.create(user=self.user, name="Empty")
+        now = timezone.now().replace(microsecond=123456)
+        for f in range(3):
+            furniture = Furniture.objects.create(
+                user=self.user, palace=self.palace if f < 2 else None, name=f"item{f}", description="d"
+            )
+            for c in range(3):
+                Flashcard.objects.create(
+                    user=self.user,
+                    furniture=furniture,
+                    front=f"front \"{f}\"/{c}",
+                    back="back",
+                    icon_name="book" if c else None,
+                    furniture_slot_index=c,
+                    ease_factor=2.5 - c * 0.13,
+                    next_review=now - timedelta(days=c, microseconds=c),
+                )
+
+    def assertSameBytes(self, serializer_class, queryset, tree=None):
+        nested = {
+            FurnitureSerializer: ["flashcards"], UserPalaceSerializer: ["furniture__flashcards"],
+        }.get(serializer_class, [])
+        prefetched = queryset.prefetch_related(*ordered_prefetch(queryset.model, *nested))
+        expected = JSONRenderer().render(serializer_class(prefetched, many=True, field_tree=tree).data)
+        fast = fast_serializer(serializer_class, tree)
+
+        self.assertEqual(JSONRenderer().render(fast.from_queryset(queryset)), expected)
+        self.assertEqual(JSONRenderer().render(fast.from_instances(queryset)), expected)
+
+    def test_same_output(self):
+        self.assertSameBytes(FlashcardSerializer, Flashcard.objects.order_by("id"))
+        self.assertSameBytes(FurnitureSerializer, Furniture.objects.order_by("id"))
+        self.assertSameBytes(UserPalaceSerializer, UserPalace.objects.order_by("id"))
+
+    @override_settings(TIME_ZONE="Europe/Warsaw")
+    def test_same_output_in_local_time(self):
+        self.assertSameBytes(FlashcardSerializer, Flashcard.objects.order_by("id"))
+
+    def test_same_output_for_field_trees(self):
+        self.assertSameBytes(FlashcardSerializer, Flashcard.objects.order_by("id"), {"id": None, "next_review": None})
+        self.assertSameBytes(UserPalaceSerializer, UserPalace.objects.order_by("id"), {
+            "name": None, "furniture": {"name": None, "flashcards": {"front": None}},
+        })
+        self.assertSameBytes(UserPalaceSerializer, UserPalace.objects.order_by("id"), {"id": None})
+
+    def test_nested_lists_are_ordered_by_id(self):
+        # an update writes a new row version at the end of the table,
+        # an unordered read would return this card last
+        first = Flashcard.objects.filter(furniture__palace=self.palace).order_by("id").first()
+        Flashcard.objects.filter(pk=first.pk).update(back="updated")
+
+        self.assertSameBytes(UserPalaceSerializer, UserPalace.objects.order_by("id"))
+        response = self.client.get(f"/api/palaces/{self.palace.id}/")
+        cards = [card["id"] for furniture in response.data["furniture"] for card in furniture["flashcards"]]
+        self.assertEqual(cards[0], first.id)
+        self.assertEqual(cards, sorted(cards))
+
+    def test_one_query_per_nested_relation(self):
+        with self.assertNumQueries(3):
+            fast_serializer(UserPalaceSerializer).from_queryset(UserPalace.objects.all())
+
+        with self.assertNumQueries(1):
+            fast_serializer(UserPalaceSerializer, {"name": None}).from_queryset(UserPalace.objects.all())
+
+    def test_endpoints(self):
+        for url in (
+            "/api/flashcards/",
+            "/api/flashcards/?page_size=4",
+            "/api/flashcards/queue/?fields=id,front",
+            "/api/furniture/",
+            f"/api/palaces/{self.palace.id}/flashcards/",
+            f"/api/furniture/{Furniture.objects.first().id}/flashcards/",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+        cards = self.client.get("/api/flashcards/").content
+        expected = FlashcardSerializer(Flashcard.objects.order_by("next_review", "id"), many=True).data
+        self.assertEqual(cards, JSONRenderer().render(expected))
+
+        palaces = self.client.get("/api/palaces/").content
+        expected = UserPalaceSerializer(
+            UserPalace.objects.order_by("created_at", "id").prefetch_related(
+                *ordered_prefetch(UserPalace, "furniture__flashcards")
+            ),
+            many=True,
+        ).data
+        self.assertEqual(palaces, JSONRenderer().render(expected))
+
+    def test_unsupported_field(self):
+        from rest_framework import serializers
+
+        class WithMethodField(serializers.ModelSerializer):
+            title = serializers.SerializerMethodField()
+
+            class Meta:
+                model = UserPalace
+                fields = ["id", "title"]
+
+        with self.assertRaises(ValueError):
+            fast_serializer(WithMethodField)
@@ -0,0 +1,115 @@
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard
+
+
+class SparseFieldsetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="sparse", email="sparse@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        for f in range(3):
+            furniture = Furniture.objects.create(
+                user=self.user, palace=self.palace, name=f"item{f}"
+            )
+            for c in range(2):
+                Flashcard.objects.create(
+                    user=self.user,
+                    furniture=furniture,
+                    front=f"front {f}/{c}",
+                    back=f"back {f}/{c}",
+                    furniture_slot_index=c,
+                )
+        # palace without furniture still shows up with zero counts
+        UserPalace.objects.create(user=self.user, name="Empty")
+
+    def test_fields_restrict_top_level(self):
+        # etag + palaces, no furniture / flashcard prefetch
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/palaces/?fields=id,name")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0], {"id": self.palace.id, "name": "Palace"})
+
+    def test_dotted_fields_reach_into_nested(self):
+        # etag + palaces + furniture
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/palaces/?fields=id,furniture.name")
+
+        palace = response.data[0]
+        self.assertEqual(set(palace), {"id", "furniture"})
+        self.assertEqual([item["name"] for item in palace["furniture"]], ["item0", "item1", "item2"])
+        self.assertEqual(set(palace["furniture"][0]), {"name"})
+
+    def test_expand_leaves_out_unlisted_nested(self):
+        response = self.client.get(f"/api/palaces/{self.palace.id}/?expand=furniture")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("palace_matrix", response.data)
+        self.assertNotIn("flashcards", response.data["furniture"][0])
+
+        response = self.client.get(f"/api/palaces/{self.palace.id}/?expand=")
+        self.assertNotIn("furniture", response.data)
+
+    def test_selecting_a_relation_takes_all_of_it(self):
+        response = self.client.get("/api/palaces/?fields=furniture")
+
+        card = response.data[0]["furniture"][0]["flashcards"][0]
+        self.assertIn("front", card)
+        self.assertIn("next_review", card)
+
+    def test_unknown_field_returns_400(self):
+        response = self.client.get("/api/palaces/?fields=id,secret")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["fields"], ["Unknown field: secret"])
+
+    def test_summary_mode(self):
+        # etag + palaces with counts
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/palaces/?summary=true")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["furniture_count"], 3)
+        self.assertEqual(response.data[0]["flashcard_count"], 6)
+        self.assertNotIn("furniture", response.data[0])
+        self.assertEqual(response.data[1]["furniture_count"], 0)
+        self.assertEqual(response.data[1]["flashcard_count"], 0)
+
+    def test_sparse_palace_not_cached(self):
+        sparse = self.client.get(f"/api/palaces/{self.palace.id}/?fields=id")
+        full = self.client.get(f"/api/palaces/{self.palace.id}/")
+
+        self.assertNotIn("X-Cache", sparse)
+        self.assertEqual(full["X-Cache"], "MISS")
+        self.assertIn("furniture", full.data)
+
+    def test_flashcard_fields(self):
+        response = self.client.get("/api/flashcards/?fields=id,front&page_size=2")
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "front"})
+
+        response = self.client.get(f"/api/palaces/{self.palace.id}/flashcards/?fields=id")
+        self.assertEqual(set(response.data[0]), {"id"})
+
+    def test_furniture_fields(self):
+        # etag + furniture, flashcards are not prefetched
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/furniture/?fields=id,name")
+
+        self.assertEqual(set(response.data[0]), {"id", "name"})
+
+        response = self.client.get(f"/api/palaces/{self.palace.id}/furniture/?expand=")
+        self.assertEqual(len(response.data), 3)
+        self.assertNotIn("flashcards", response.data[0])
+
+    def test_writes_return_full_representation(self):
+        response = self.client.post("/api/palaces/?fields=id", {"name": "New"}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("furniture", response.data)
@@ -0,0 +1,72 @@
+import io
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Max
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard, FlashcardReview
+
+OPTIONS = dict(
+    users=3, palaces_per_user=2, matrix_size=6, furniture=4, cards_per_furniture=9,
+    now="2025-06-01T12:00:00+00:00", stdout=io.StringIO(),
+)
+
+
+class GenerateDatasetTests(APITestCase):
+
+    def generate(self, **options):
+        call_command("generate_dataset", **{**OPTIONS, **options})
+
+    def test_counts_and_consistency(self):
+        self.generate(batch_size=50)
+
+        users = User.objects.filter(username__startswith="gen")
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(UserPalace.objects.filter(user__in=users).count(), 6)
+        self.assertEqual(Furniture.objects.filter(user__in=users).count(), 24)
+        self.assertEqual(Flashcard.objects.filter(user__in=users).count(), 216)
+        self.assertTrue(FlashcardReview.objects.exists())
+        self.assertIsNotNone(authenticate(username="gen0", password="password123"))
+
+        slots = Flashcard.objects.values("furniture").annotate(count=Count("id"), top=Max("furniture_slot_index"))
+        self.assertTrue(all(row["count"] == 9 and row["top"] == 8 for row in slots))
+
+        # a card's scheduling state is the one its last review produced
+        for card in Flashcard.objects.filter(repetition__gt=0)[:20]:
+            last = card.reviews.order_by("-reviewed_at").first()
+            self.assertEqual(
+                (card.repetition, card.interval, card.ease_factor, card.next_review),
+                (last.repetition, last.interval, last.ease_factor, last.next_review),
+            )
+
+        # palace cells point at the palace's furniture
+        palace = UserPalace.objects.filter(user__in=users).first()
+        cells = {cell.split("_")[1] for row in palace.palace_matrix for cell in row if cell.count("_") == 2}
+        self.assertEqual(cells, {str(pk) for pk in palace.furniture.values_list("id", flat=True)})
+
+        # the sequences continue after the generated ids
+        Flashcard.objects.create(user=users[0], furniture=palace.furniture.first(), front="f", back="b")
+
+    def test_same_seed_same_data(self):
+        def snapshot(prefix):
+            return list(
+                Flashcard.objects.filter(user__username__startswith=prefix)
+                .order_by("id")
+                .values_list("front", "icon_name", "interval", "ease_factor", "repetition", "next_review")
+            )
+
+        self.generate(prefix="a", seed=7)
+        self.generate(prefix="b", seed=7)
+        self.generate(prefix="c", seed=8)
+
+        self.assertEqual(snapshot("a"), snapshot("b"))
+        self.assertNotEqual(snapshot("a"), snapshot("c"))
+
+    def test_existing_prefix(self):
+        User.objects.create_user(username="gen0", password="password123")
+
+        with self.assertRaises(CommandError):
+            self.generate()
@@ -0,0 +1,103 @@
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import instrumentation
+from api.models import UserPalace, Furniture, Flashcard
+
+
+@override_settings(SERVER_TIMING=True, METRICS_TOKEN="scrape-secret")
+class InstrumentationTests(APITestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        self.user = User.objects.create_user(
+            username="metrics", email="metrics@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        furniture = Furniture.objects.create(user=self.user, palace=self.palace, name="Desk")
+        for slot in range(3):
+            Flashcard.objects.create(user=self.user, furniture=furniture, front="f", back="b", furniture_slot_index=slot)
+
+    def metrics(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+
+    def timings(self, response):
+        return {
+            name: (float(duration), desc)
+            for name, duration, desc in re.findall(r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', response["Server-Timing"])
+        }
+
+    def total(self, metric, route):
+        match = re.search(rf'^{metric}{{route="{route}"}} (\S+)$', instrumentation.render_metrics(), re.M)
+        return float(match.group(1))
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/palaces/")
+
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {"db", "serialize", "render", "total"})
+        self.assertEqual(timings["db"][1], f"{len(queries)} queries")
+        self.assertGreaterEqual(timings["total"][0], timings["db"][0])
+        for name in ("serialize", "render"):
+            self.assertGreater(self.total(f"http_{name}_seconds_total", "palace-list"), 0)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        response = self.client.get("/api/palaces/")
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertIn('route="palace-list"', self.metrics().content.decode())
+
+    def test_metrics(self):
+        self.client.get(f"/api/palaces/{self.palace.id}/flashcards/")
+        self.client.get(f"/api/palaces/{self.palace.id}/flashcards/")
+        self.client.post(f"/api/flashcards/{Flashcard.objects.first().id}/review/", {"grade": 4}, format="json")
+        self.client.get("/api/nothing-here/")
+
+        response = self.metrics()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn('http_requests_total{route="palace-flashcards",method="GET",status="200"} 2', body)
+        self.assertIn('http_requests_total{route="flashcards-review",method="POST",status="200"} 1', body)
+        self.assertIn('http_requests_total{route="unmatched",method="GET",status="404"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="palace-flashcards",le="+Inf"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{route="palace-flashcards"} 2', body)
+        self.assertRegex(body, r'http_db_queries_total\{route="flashcards-review"\} [1-9]')
+        self.assertRegex(body, r'http_response_bytes_total\{route="palace-flashcards"\} [1-9]')
+        self.assertIn('palace_cache_operations_total{result="hits"}', body)
+        self.assertRegex(body, r'db_pool_size\{alias="default"\} [1-9]')
+        self.assertRegex(body, r'db_pool_requests_num_total\{alias="default"\} [1-9]')
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+        self.assertEqual(self.metrics().status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_without_token_only_in_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_async_views(self):
+        self.client.force_authenticate(None)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        with override_settings(ROOT_URLCONF="api.tests.test_async_views"):
+            response = self.client.get(f"/api/palaces/{self.palace.id}/flashcards/", **auth)
+
+        timings = self.timings(response)
+        self.assertGreater(int(timings["db"][1].split()[0]), 0)
+        for name in ("serialize", "render"):
+            self.assertGreater(self.total(f"http_{name}_seconds_total", "palace-flashcards"), 0)
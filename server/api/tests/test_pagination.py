@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard
+from api.pagination import KeysetPagination
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="pager", email="pager@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        now = timezone.now()
+
+        # 25 due cards, several sharing the same next_review to exercise the id tie-break
+        for f in range(5):
+            furniture = Furniture.objects.create(
+                user=self.user, palace=self.palace, name=f"item{f}"
+            )
+            for c in range(5):
+                Flashcard.objects.create(
+                    user=self.user,
+                    furniture=furniture,
+                    front=f"front {f}/{c}",
+                    back=f"back {f}/{c}",
+                    furniture_slot_index=c,
+                    next_review=now - timedelta(days=c),
+                )
+
+    def walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [card["id"] for card in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+        return ids, pages
+
+    def expected_ids(self):
+        return list(
+            Flashcard.objects.filter(user=self.user)
+            .order_by("next_review", "id")
+            .values_list("id", flat=True)
+        )
+
+    def test_without_params_returns_plain_list(self):
+        response = self.client.get("/api/flashcards/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 25)
+
+    def test_list_pages_cover_all_rows_in_order(self):
+        ids, pages = self.walk("/api/flashcards/?page_size=10")
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, self.expected_ids())
+
+    def test_queue_pages_cover_all_due_rows(self):
+        ids, pages = self.walk("/api/flashcards/queue/?page_size=7")
+
+        self.assertEqual(pages, 4)
+        self.assertEqual(ids, self.expected_ids())
+
+    def test_palace_flashcards_pages(self):
+        ids, _ = self.walk(
+            f"/api/palaces/{self.palace.id}/flashcards/?onlyInReview=true&page_size=4"
+        )
+
+        self.assertEqual(ids, self.expected_ids())
+
+    def test_later_page_costs_single_page_query(self):
+        response = self.client.get("/api/flashcards/?page_size=10")
+        url = self.client.get(response.data["next"]).data["next"]
+
+        # etag + page
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+    def test_deep_page_starts_at_the_cursor(self):
+        furniture = Furniture.objects.create(user=self.user, palace=self.palace, name="bulk")
+        now = timezone.now()
+        Flashcard.objects.bulk_create(
+            Flashcard(user=self.user, furniture=furniture, front="f", back="b",
+                      next_review=now + timedelta(minutes=i))
+            for i in range(3000)
+        )
+        deep = Flashcard.objects.filter(user=self.user).order_by("next_review", "id")[2900]
+        cursor = KeysetPagination().encode_cursor([deep.next_review, deep.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/flashcards/?page_size=10&cursor={cursor}")
+        self.assertEqual(len(response.data["results"]), 10)
+        page_sql = queries[-1]["sql"]
+
+        # the plan of a user with many cards: the index read in order, stopped by the LIMIT
+        settings = ("enable_seqscan", "enable_bitmapscan", "enable_sort")
+        with connection.cursor() as cursor:
+            for setting in settings:
+                cursor.execute(f"SET {setting} = off")
+            cursor.execute(f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF) {page_sql}")
+            plan = [row[0] for row in cursor.fetchall()]
+            for setting in settings:
+                cursor.execute(f"RESET {setting}")
+
+        # the scan starts at the cursor instead of filtering the 2900 rows before it
+        index_cond = next(line for line in plan if "Index Cond" in line)
+        self.assertIn("next_review >=", index_cond)
+        removed = sum(int(line.split(":")[1]) for line in plan if "Rows Removed by Filter" in line)
+        self.assertLessEqual(removed, 10)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get("/api/flashcards/?cursor=not-a-cursor")
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,208 @@
+import gzip
+import io
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import UserPalace, Furniture, Flashcard
+from api.services import palace_archive
+
+
+class PalaceArchiveTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="archivist", email="archivist@example.com", password="password123"
+        )
+        self.other = User.objects.create_user(
+            username="mover", email="mover@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Library")
+        self.due = timezone.now() + timedelta(days=3)
+        self.furniture = []
+        for f in range(2):
+            furniture = Furniture.objects.create(
+                user=self.user, palace=self.palace, name=f"shelf{f}", description=f"desc {f}"
+            )
+            self.furniture.append(furniture)
+            for c in range(3):
+                Flashcard.objects.create(
+                    user=self.user,
+                    furniture=furniture,
+                    front=f"front {f}/{c}",
+                    back=f"back {f}/{c}",
+                    furniture_slot_index=c,
+                    interval=6,
+                    ease_factor=2.36,
+                    repetition=2,
+                    next_review=self.due,
+                )
+
+        self.palace.palace_matrix = [
+            ["1_", f"1_{self.furniture[0].id}_"],
+            [f"2_{self.furniture[1].id}_", "2_999999_"],
+        ]
+        self.palace.save()
+
+    def export(self, palace):
+        response = self.client.get(f"/api/palaces/{palace.id}/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        return b"".join(response.streaming_content)
+
+    def test_export_records(self):
+        lines = gzip.decompress(self.export(self.palace)).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+
+        self.assertEqual(records[0]["type"], "palace")
+        self.assertEqual(records[0]["name"], "Library")
+        self.assertEqual([r["type"] for r in records[1:]], ["furniture"] * 2 + ["flashcard"] * 6)
+        self.assertEqual(records[3]["furniture"], self.furniture[0].id)
+        self.assertEqual(records[3]["repetition"], 2)
+
+    async def test_export_streams_under_asgi(self):
+        token = AccessToken.for_user(self.user)
+        response = await self.async_client.get(
+            f"/api/palaces/{self.palace.id}/export/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        # a sync iterator would be read to the end before the first byte is sent
+        self.assertTrue(response.is_async)
+        archive = b"".join([chunk async for chunk in response.streaming_content])
+        expected = await sync_to_async(self.export)(self.palace)
+        self.assertEqual(gzip.decompress(archive), gzip.decompress(expected))
+
+    def test_round_trip_remaps_furniture(self):
+        archive = self.export(self.palace)
+
+        self.client.force_authenticate(self.other)
+        response = self.client.generic(
+            "POST", "/api/palaces/import/", archive, content_type="application/gzip"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        palace = UserPalace.objects.get(pk=response.data["id"])
+        self.assertEqual(palace.user, self.other)
+        self.assertEqual(palace.name, "Library")
+
+        shelf0, shelf1 = Furniture.objects.filter(palace=palace).order_by("name")
+        self.assertNotEqual(shelf0.id, self.furniture[0].id)
+        self.assertEqual(shelf0.user, self.other)
+        self.assertEqual(shelf0.description, "desc 0")
+        self.assertEqual(palace.palace_matrix, [
+            ["1_", f"1_{shelf0.id}_"],
+            [f"2_{shelf1.id}_", None],
+        ])
+
+        cards = Flashcard.objects.filter(furniture=shelf1).order_by("furniture_slot_index")
+        self.assertEqual([card.front for card in cards], ["front 1/0", "front 1/1", "front 1/2"])
+        self.assertTrue(all(card.user == self.other for card in cards))
+        self.assertEqual((cards[0].interval, cards[0].ease_factor, cards[0].repetition), (6, 2.36, 2))
+        self.assertEqual(cards[0].next_review, self.due)
+
+    def test_import_uses_bulk_inserts(self):
+        archive = self.export(self.palace)
+        records = palace_archive.read_archive(io.BytesIO(archive))
+
+        # palace + furniture + flashcards + matrix update (+ savepoint)
+        with self.assertNumQueries(6):
+            palace_archive.import_archive(records, user=self.other)
+
+    def test_import_multipart(self):
+        upload = io.BytesIO(self.export(self.palace))
+        upload.name = "palace.ndjson.gz"
+
+        response = self.client.post("/api/palaces/import/", {"archive": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["furniture"]), 2)
+
+    def test_invalid_archive_returns_400(self):
+        response = self.client.generic(
+            "POST", "/api/palaces/import/", b"not gzip", content_type="application/gzip"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        bad_card = gzip.compress(
+            b'{"type": "palace", "version": 1, "name": "x"}\n'
+            b'{"type": "flashcard", "furniture": 1, "front": "f", "back": "b"}\n'
+        )
+        response = self.client.generic(
+            "POST", "/api/palaces/import/", bad_card, content_type="application/gzip"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("unknown furniture", response.data["error"])
+        self.assertFalse(UserPalace.objects.filter(name="x").exists())
+
+    def import_records(self, *records):
+        archive = gzip.compress(b"".join(
+            json.dumps(record).encode() + b"\n"
+            for record in ({"type": "palace", "version": 1, "name": "bad"}, *records)
+        ))
+        return self.client.generic("POST", "/api/palaces/import/", archive, content_type="application/gzip")
+
+    def test_invalid_records_return_400(self):
+        furniture = {"type": "furniture", "id": 1, "name": "desk"}
+        card = {"type": "flashcard", "furniture": 1, "front": "f", "back": "b", "furniture_slot_index": 0}
+        cases = [
+            ("front", {"front": None}),
+            ("front", {"front": 5}),
+            ("front", {"front": "nul \x00"}),
+            ("back", {"back": None}),
+            ("icon_name", {"icon_name": "i" * 101}),
+            ("furniture_slot_index", {"furniture_slot_index": 9}),
+            ("furniture_slot_index", {"furniture_slot_index": -1}),
+            ("furniture_slot_index", {"furniture_slot_index": "1"}),
+            ("interval", {"interval": "x"}),
+            ("interval", {"interval": 2 ** 40}),
+            ("interval", {"interval": 1.5}),
+            ("ease_factor", {"ease_factor": float("nan")}),
+            ("ease_factor", {"ease_factor": float("inf")}),
+            ("ease_factor", {"ease_factor": "2.5"}),
+            ("repetition", {"repetition": True}),
+            ("next_review", {"next_review": "tomorrow"}),
+            ("last_reviewed_at", {"last_reviewed_at": "2024-02-30T00:00:00"}),
+        ]
+        for field, change in cases:
+            with self.subTest(change=change):
+                response = self.import_records(furniture, {**card, **change})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("record 3 (flashcard)", response.data["error"])
+                self.assertIn(field, response.data["error"])
+
+        missing = dict(card)
+        del missing["front"]
+        response = self.import_records(furniture, missing)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("front", response.data["error"])
+
+        for bad in ({"name": None}, {"id": [1]}, {"description": {}}):
+            with self.subTest(furniture=bad):
+                response = self.import_records({**furniture, **bad})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("record 2 (furniture)", response.data["error"])
+
+        self.assertFalse(UserPalace.objects.filter(name="bad").exists())
+
+    def test_duplicate_slot_returns_400(self):
+        furniture = {"type": "furniture", "id": 1, "name": "desk"}
+        card = {"type": "flashcard", "furniture": 1, "front": "f", "back": "b", "furniture_slot_index": 0}
+
+        response = self.import_records(furniture, card, card)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("same furniture slot", response.data["error"])
+
+    def test_cannot_export_foreign_palace(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(f"/api/palaces/{self.palace.id}/export/")
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,122 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from api import palace_cache
+from api.models import UserPalace, Furniture, Flashcard
+
+
+class PalaceCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", password="password123")
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        self.furniture = Furniture.objects.create(user=self.user, palace=self.palace, name="desk")
+        self.card = Flashcard.objects.create(
+            user=self.user, furniture=self.furniture, front="q", back="a", furniture_slot_index=0
+        )
+        self.url = f"/api/palaces/{self.palace.id}/"
+
+    def test_second_read_is_a_hit(self):
+        before = palace_cache.stats()
+
+        first = self.client.get(self.url)
+        # etag only, its aggregate is the version and the payload comes from the cache
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+        after = palace_cache.stats()
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+    def test_flashcard_save_invalidates(self):
+        self.client.get(self.url)
+
+        self.card.front = "changed"
+        self.card.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["furniture"][0]["flashcards"][0]["front"], "changed")
+
+    def test_furniture_delete_invalidates(self):
+        self.client.get(self.url)
+
+        self.furniture.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["furniture"], [])
+
+    def test_batch_review_invalidates(self):
+        self.client.get(self.url)
+
+        self.client.post(
+            "/api/flashcards/reviews/",
+            {"reviews": [{"id": self.card.id, "grade": 5, "idempotency_key": "k1"}]},
+            format="json",
+        )
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["furniture"][0]["flashcards"][0]["repetition"], 1)
+
+    def test_cell_patch_invalidates(self):
+        self.palace.palace_matrix = [["1_", "1_"]]
+        self.palace.save()
+        self.client.get(self.url)
+
+        self.client.patch(
+            f"{self.url}cells/", {"cells": [{"row": 0, "col": 1, "value": "1_lamp_"}]}, format="json"
+        )
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["furniture"]), 2)
+        self.assertNotEqual(response.data["palace_matrix"][0][1], "1_")
+
+    def test_writes_of_other_processes_invalidate(self):
+        self.client.get(self.url)
+        self.client.get("/api/palaces/")
+
+        # nothing in this process hears about a write made elsewhere
+        # (another worker, instance or a script)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE api_flashcard SET back = 'elsewhere', updated_at = now() + interval '1 second' WHERE id = %s",
+                [self.card.id],
+            )
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["furniture"][0]["flashcards"][0]["back"], "elsewhere")
+        response = self.client.get("/api/palaces/")
+        self.assertEqual(response.data[0]["furniture"][0]["flashcards"][0]["back"], "elsewhere")
+
+    def test_list_and_detail_share_entries(self):
+        self.client.get("/api/palaces/")
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+    def test_list_renders_only_missing_palaces(self):
+        UserPalace.objects.create(user=self.user, name="Second")
+        self.client.get("/api/palaces/")
+
+        # etag + palace versions, all payloads cached
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/palaces/")
+
+        self.assertEqual([p["name"] for p in response.data], ["Palace", "Second"])
+
+    def test_other_users_cannot_read_cached_palace(self):
+        self.client.get(self.url)
+
+        other = User.objects.create_user(username="intruder", password="password123")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,129 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture
+from api.services.palace_matrix import normalize_palace_matrix, parse_cell
+
+
+class ParseCellTests(TestCase):
+
+    def test_tile_is_kept(self):
+        self.assertEqual(parse_cell(" 1_ "), ("1_", None))
+
+    def test_furniture_id_is_kept(self):
+        self.assertEqual(parse_cell("2_15_"), ("2_15_", None))
+
+    def test_furniture_name_is_collected(self):
+        self.assertEqual(parse_cell("3_chairWood_"), (None, ("3", "chairWood")))
+
+    def test_invalid_cells_become_none(self):
+        for cell in (None, 5, "", "abc", "1__"):
+            self.assertEqual(parse_cell(cell), (None, None))
+
+
+class NormalizePalaceMatrixTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="designer", password="password123")
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+
+    def test_new_furniture_is_created_in_one_insert(self):
+        matrix = [[f"{r}_item{r}x{c}_" for c in range(10)] for r in range(5)]
+
+        with self.assertNumQueries(1):
+            normalize_palace_matrix(matrix, user=self.user, palace=self.palace)
+
+        furniture = {f.id: f.name for f in Furniture.objects.filter(palace=self.palace)}
+        self.assertEqual(len(furniture), 50)
+        for r, row in enumerate(matrix):
+            for c, cell in enumerate(row):
+                room, furniture_id, _ = cell.split("_")
+                self.assertEqual(room, str(r))
+                self.assertEqual(furniture[int(furniture_id)], f"item{r}x{c}")
+
+    def test_matrix_without_new_furniture_runs_no_queries(self):
+        matrix = [["1_", "1_7_"], ["bad", None]]
+
+        with self.assertNumQueries(0):
+            normalize_palace_matrix(matrix, user=self.user, palace=self.palace)
+
+        self.assertEqual(matrix, [["1_", "1_7_"], [None, None]])
+
+
+class PalaceSaveQueryTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="saver", password="password123")
+        self.client.force_authenticate(self.user)
+
+    def create(self, furniture_count):
+        matrix = [["1_", f"1_chair{i}_"] for i in range(furniture_count)]
+        return self.client.post("/api/palaces/", {"name": "P", "palace_matrix": matrix}, format="json")
+
+    def test_create_cost_does_not_grow_with_furniture(self):
+        # savepoint, palace insert, furniture bulk insert, matrix update, release,
+        # reload palace + furniture + flashcards
+        with self.assertNumQueries(8):
+            response = self.create(2)
+        self.assertEqual(response.status_code, 201)
+
+        with self.assertNumQueries(8):
+            response = self.create(40)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["furniture"]), 40)
+
+
+class PalaceCellsPatchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="editor", password="password123")
+        self.client.force_authenticate(self.user)
+        self.palace = UserPalace.objects.create(
+            user=self.user,
+            name="Palace",
+            palace_matrix=[["1_", "1_", "1_"], ["2_", "2_", "2_"]],
+        )
+        self.url = f"/api/palaces/{self.palace.id}/cells/"
+
+    def patch(self, cells):
+        return self.client.patch(self.url, {"cells": cells}, format="json")
+
+    def test_edits_only_given_cells(self):
+        response = self.patch([
+            {"row": 0, "col": 1, "value": "1_chairWood_"},
+            {"row": 1, "col": 2, "value": None},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        chair = Furniture.objects.get(palace=self.palace, name="chairWood")
+        self.assertEqual(response.data["cells"][0]["value"], f"1_{chair.id}_")
+
+        self.palace.refresh_from_db()
+        self.assertEqual(
+            self.palace.palace_matrix,
+            [["1_", f"1_{chair.id}_", "1_"], ["2_", "2_", None]],
+        )
+
+    def test_single_update_statement(self):
+        cells = [{"row": 0, "col": c, "value": f"1_{c + 10}_"} for c in range(3)]
+
+        # palace lookup, savepoint, update, release
+        with self.assertNumQueries(4):
+            response = self.patch(cells)
+
+        self.assertEqual(response.status_code, 200)
+        self.palace.refresh_from_db()
+        self.assertEqual(self.palace.palace_matrix[0], ["1_10_", "1_11_", "1_12_"])
+
+    def test_out_of_bounds_cell_is_rejected(self):
+        response = self.patch([{"row": 0, "col": 3, "value": "1_"}])
+
+        self.assertEqual(response.status_code, 400)
+        self.palace.refresh_from_db()
+        self.assertEqual(self.palace.palace_matrix[0], ["1_", "1_", "1_"])
+
+    def test_matrix_is_returned_as_json(self):
+        response = self.client.get(f"/api/palaces/{self.palace.id}/")
+
+        self.assertEqual(response.data["palace_matrix"][1], ["2_", "2_", "2_"])
@@ -0,0 +1,106 @@
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every read endpoint must run a fixed number of queries,
+    no matter how many palaces / furniture / flashcards the user has.
+    Each budget includes the ETag aggregate query.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="budget", email="budget@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def make_palace(self, furniture_count=3, cards_per_furniture=3):
+        palace = UserPalace.objects.create(user=self.user, name="Palace")
+        for f in range(furniture_count):
+            furniture = Furniture.objects.create(
+                user=self.user, palace=palace, name=f"item{f}"
+            )
+            for c in range(cards_per_furniture):
+                Flashcard.objects.create(
+                    user=self.user,
+                    furniture=furniture,
+                    front=f"front {f}/{c}",
+                    back=f"back {f}/{c}",
+                    furniture_slot_index=c,
+                )
+        return palace
+
+    def assertConstantQueries(self, num, url_for):
+        """
+        Hit the endpoint with a small and a large dataset,
+        both must stay within the same query budget.
+        """
+        small = self.make_palace(furniture_count=1, cards_per_furniture=1)
+        url = url_for(small)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        large = self.make_palace(furniture_count=5, cards_per_furniture=9)
+        url = url_for(large)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_palace_list(self):
+        # etag + palace ids (cache lookup) + palaces + furniture + flashcards
+        self.assertConstantQueries(5, lambda palace: "/api/palaces/")
+
+    def test_palace_detail(self):
+        self.assertConstantQueries(4, lambda palace: f"/api/palaces/{palace.id}/")
+
+    def test_palace_furniture(self):
+        self.assertConstantQueries(
+            4, lambda palace: f"/api/palaces/{palace.id}/furniture/"
+        )
+
+    def test_palace_flashcards(self):
+        # palace lookup + etag + flashcards
+        self.assertConstantQueries(
+            3, lambda palace: f"/api/palaces/{palace.id}/flashcards/"
+        )
+
+    def test_furniture_list(self):
+        # etag + furniture + flashcards
+        self.assertConstantQueries(3, lambda palace: "/api/furniture/")
+
+    def test_furniture_detail(self):
+        self.assertConstantQueries(
+            3, lambda palace: f"/api/furniture/{palace.furniture.first().id}/"
+        )
+
+    def test_furniture_flashcards(self):
+        self.assertConstantQueries(
+            3, lambda palace: f"/api/furniture/{palace.furniture.first().id}/flashcards/"
+        )
+
+    def test_flashcard_list(self):
+        self.assertConstantQueries(2, lambda palace: "/api/flashcards/")
+
+    def test_flashcard_detail(self):
+        self.assertConstantQueries(
+            2, lambda palace: f"/api/flashcards/{Flashcard.objects.filter(furniture__palace=palace).first().id}/"
+        )
+
+    def test_flashcard_queue(self):
+        self.assertConstantQueries(2, lambda palace: "/api/flashcards/queue/")
+
+    def test_palace_update_response(self):
+        palace = self.make_palace(furniture_count=5, cards_per_furniture=9)
+        # select palace, update palace, reload palace + furniture + flashcards
+        with self.assertNumQueries(7):
+            response = self.client.put(
+                f"/api/palaces/{palace.id}/",
+                {"name": "Renamed", "palace_matrix": [["1_", "1_"]]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["furniture"]), 5)
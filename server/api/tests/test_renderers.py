@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import msgpack
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.models import UserPalace, Furniture, Flashcard
+from api.renderers import ORJSONRenderer
+from api.serializers import FlashcardSerializer
+
+
+class RendererTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="renderer", email="renderer@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        palace = UserPalace.objects.create(user=self.user, name="Palace")
+        furniture = Furniture.objects.create(user=self.user, palace=palace, name="Desk")
+        for slot in range(3):
+            Flashcard.objects.create(
+                user=self.user, furniture=furniture, front=f"żółw {slot}", back="turtle ", furniture_slot_index=slot
+            )
+
+    def test_orjson_matches_json_renderer(self):
+        data = {
+            "cards": FlashcardSerializer(Flashcard.objects.order_by("id"), many=True).data,
+            "now": datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "local": datetime(2025, 3, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=2))),
+            "amount": Decimal("1.50"),
+            "counts": {1: 2, 3: None},
+            "nested": [[1.5, True, " "]],
+        }
+
+        for media_type in (None, "application/json"):
+            self.assertEqual(
+                ORJSONRenderer().render(data, media_type),
+                JSONRenderer().render(data, media_type),
+            )
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+        self.assertEqual(ORJSONRenderer().render({"big": 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    def test_msgpack_response(self):
+        json_response = self.client.get("/api/flashcards/")
+        response = self.client.get("/api/flashcards/", HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+        self.assertIn("Accept", response["Vary"])
+
+        # another representation, another validator
+        self.assertNotEqual(response["ETag"], json_response["ETag"])
+        not_modified = self.client.get(
+            "/api/flashcards/", HTTP_ACCEPT="application/msgpack", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_msgpack_request(self):
+        response = self.client.generic(
+            "POST", "/api/palaces/", msgpack.packb({"name": "Packed", "palace_matrix": [["1_chairWood_"]]}),
+            content_type="application/msgpack", HTTP_ACCEPT="application/msgpack",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(msgpack.unpackb(response.content)["name"], "Packed")
+
+        response = self.client.generic("POST", "/api/palaces/", b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+
+    def test_json_parse_error(self):
+        response = self.client.generic("POST", "/api/palaces/", b'{"name": ', content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["detail"].startswith("JSON parse error - "))
@@ -0,0 +1,164 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from api.models import UserPalace, Furniture, Flashcard, FlashcardReview
+from api.services import reviews
+
+
+class ReviewBatchTests(APITestCase):
+    url = "/api/flashcards/reviews/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="reviewer", email="reviewer@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        palace = UserPalace.objects.create(user=self.user, name="Palace")
+        furniture = Furniture.objects.create(user=self.user, palace=palace, name="desk")
+        self.cards = [
+            Flashcard.objects.create(
+                user=self.user, furniture=furniture, front=f"q{i}", back=f"a{i}",
+                furniture_slot_index=i,
+            )
+            for i in range(5)
+        ]
+
+    def entries(self, grade=4):
+        return [
+            {"id": card.id, "grade": grade, "idempotency_key": f"key-{card.id}"}
+            for card in self.cards
+        ]
+
+    def test_applies_all_reviews(self):
+        response = self.client.post(self.url, {"reviews": self.entries()}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({r["status"] for r in response.data["results"]}, {"applied"})
+        self.assertEqual(len(response.data["flashcards"]), 5)
+        for card in Flashcard.objects.filter(user=self.user):
+            self.assertEqual(card.repetition, 1)
+        self.assertEqual(FlashcardReview.objects.filter(user=self.user).count(), 5)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        # savepoint, lock cards, idempotency lookup, bulk update, bulk insert, release
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, {"reviews": self.entries()}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_resend_is_idempotent(self):
+        self.client.post(self.url, {"reviews": self.entries()}, format="json")
+        response = self.client.post(self.url, {"reviews": self.entries(grade=0)}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({r["status"] for r in response.data["results"]}, {"duplicate"})
+        for card in Flashcard.objects.filter(user=self.user):
+            self.assertEqual(card.repetition, 1)
+        self.assertEqual(FlashcardReview.objects.filter(user=self.user).count(), 5)
+
+    def test_same_card_reviews_apply_in_reviewed_at_order(self):
+        card = self.cards[0]
+        start = timezone.now() - timedelta(days=2)
+        entries = [
+            {"id": card.id, "grade": 5, "idempotency_key": "second",
+             "reviewed_at": (start + timedelta(days=1)).isoformat()},
+            {"id": card.id, "grade": 5, "idempotency_key": "first",
+             "reviewed_at": start.isoformat()},
+        ]
+
+        response = self.client.post(self.url, {"reviews": entries}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        card.refresh_from_db()
+        self.assertEqual(card.repetition, 2)
+        self.assertEqual(card.interval, 6)
+        self.assertEqual(card.next_review, start + timedelta(days=7))
+
+    def test_unknown_card_rejects_whole_batch(self):
+        other = User.objects.create_user(username="other", password="password123")
+        palace = UserPalace.objects.create(user=other, name="Other")
+        furniture = Furniture.objects.create(user=other, palace=palace, name="desk")
+        foreign = Flashcard.objects.create(user=other, furniture=furniture, front="q", back="a")
+
+        entries = self.entries() + [{"id": foreign.id, "grade": 5, "idempotency_key": "x"}]
+        response = self.client.post(self.url, {"reviews": entries}, format="json")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data["ids"], [foreign.id])
+        self.assertFalse(FlashcardReview.objects.exists())
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.repetition, 0)
+
+    def test_invalid_grade_returns_400(self):
+        entries = [{"id": self.cards[0].id, "grade": 7, "idempotency_key": "k"}]
+
+        response = self.client.post(self.url, {"reviews": entries}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_persistent_key_conflict_returns_409(self):
+        entries = [{"id": self.cards[0].id, "grade": 4, "idempotency_key": "k"}]
+
+        with mock.patch("api.views.apply_review_batch", side_effect=IntegrityError):
+            response = self.client.post(self.url, {"reviews": entries}, format="json")
+
+        self.assertEqual(response.status_code, 409)
+
+
+class ConcurrentReviewBatchTests(APITransactionTestCase):
+    """
+    Two batches sharing an idempotency key on different cards, both past
+    the key lookup before either inserts.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="racer", password="password123")
+        furniture = Furniture.objects.create(user=self.user, name="desk")
+        self.cards = [
+            Flashcard.objects.create(
+                user=self.user, furniture=furniture, front="q", back="a", furniture_slot_index=i
+            )
+            for i in range(2)
+        ]
+
+    def test_shared_key_is_applied_once(self):
+        both_scheduled = threading.Barrier(2, timeout=10)
+        spread_reviews = reviews.spread_reviews
+
+        def spread_together(*args):
+            # only the first run of each batch gets here, a rerun finds the key recorded
+            both_scheduled.wait()
+            return spread_reviews(*args)
+
+        outcomes = {}
+
+        def review(card):
+            try:
+                outcomes[card.id] = reviews.apply_review_batch(
+                    self.user, [{"id": card.id, "grade": 4, "idempotency_key": "shared"}]
+                )[0][0]["status"]
+            except Exception as exc:
+                outcomes[card.id] = exc
+            finally:
+                connection.close()
+
+        with mock.patch("api.services.reviews.spread_reviews", side_effect=spread_together):
+            threads = [threading.Thread(target=review, args=(card,)) for card in self.cards]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertCountEqual(outcomes.values(), ["applied", "duplicate"])
+        self.assertEqual(FlashcardReview.objects.filter(idempotency_key="shared").count(), 1)
+        applied = FlashcardReview.objects.get().flashcard_id
+        self.assertEqual(
+            {card.id: card.repetition for card in Flashcard.objects.all()},
+            {card.id: 1 if card.id == applied else 0 for card in self.cards},
+        )
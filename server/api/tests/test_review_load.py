@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import UserPalace, Furniture, Flashcard
+from api.services.spaced_repetition import fuzz_range, fuzz_schedule
+
+
+class FuzzScheduleTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def schedule(self, intervals, seeds, load=None):
+        return fuzz_schedule(
+            intervals, [self.now + timedelta(days=days) for days in intervals], seeds, load
+        )
+
+    def test_short_intervals_stay(self):
+        interval, next_review = self.schedule([1, 2], ["a", "b"])
+        self.assertEqual(interval, [1, 2])
+        self.assertEqual(next_review, [self.now + timedelta(days=1), self.now + timedelta(days=2)])
+
+    def test_seeded_and_within_range(self):
+        intervals = [3, 6, 15, 40, 200] * 20
+        seeds = [f"card{i}" for i in range(len(intervals))]
+
+        first, moments = self.schedule(intervals, seeds)
+        self.assertEqual(self.schedule(intervals, seeds)[0], first)
+        for days, fuzzed, moment in zip(intervals, first, moments):
+            shortest, longest = fuzz_range(days)
+            self.assertTrue(shortest <= fuzzed <= longest)
+            self.assertEqual(moment, self.now + timedelta(days=fuzzed))
+        # not everything on the scheduled day
+        self.assertNotEqual(first, intervals)
+
+    def test_least_loaded_day(self):
+        today = timezone.localdate(self.now)
+        load = {today + timedelta(days=days): due for days, due in [(5, 9), (6, 4), (7, 9)]}
+
+        interval, _ = self.schedule([6, 6, 6, 2], ["a", "b", "c", "d"], load)
+
+        self.assertEqual(interval, [6, 6, 6, 2])
+        # rows are counted where they land
+        self.assertEqual(load[today + timedelta(days=6)], 7)
+        self.assertEqual(load[today + timedelta(days=2)], 1)
+
+
+class ForecastTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="forecast", email="forecast@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        self.furniture = Furniture.objects.create(
+            user=self.user, palace=UserPalace.objects.create(user=self.user, name="Palace"), name="Desk"
+        )
+        self.today = timezone.localdate()
+        self.slot = 0
+
+    def make_cards(self, days, count=1, **fields):
+        for _ in range(count):
+            Flashcard.objects.create(
+                user=self.user, furniture=self.furniture, front="f", back="b",
+                furniture_slot_index=self.slot % 9,
+                next_review=timezone.now() + timedelta(days=days), **fields,
+            )
+            self.slot += 1
+            if self.slot % 9 == 0:
+                self.furniture = Furniture.objects.create(
+                    user=self.user, palace=self.furniture.palace, name="Desk"
+                )
+
+    def test_due_per_day(self):
+        self.make_cards(-3, 2)
+        self.make_cards(2, 3)
+        self.make_cards(4)
+        self.make_cards(30)  # after the window
+        other = User.objects.create_user(username="other", password="password123")
+        Flashcard.objects.create(
+            user=other, furniture=Furniture.objects.create(user=other, name="Chair"), front="f", back="b"
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/flashcards/forecast/", {"days": 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["overdue"], 2)
+        self.assertEqual(
+            [(day["date"], day["due"]) for day in response.data["days"]],
+            [(self.today + timedelta(days=offset), due) for offset, due in enumerate([2, 0, 3, 0, 1])],
+        )
+
+    def test_days_is_validated(self):
+        self.assertEqual(len(self.client.get("/api/flashcards/forecast/").data["days"]), 30)
+        self.assertEqual(self.client.get("/api/flashcards/forecast/", {"days": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/flashcards/forecast/", {"days": 366}).status_code, 400)
+
+
+class ReviewFuzzTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="fuzz", email="fuzz@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+        self.furniture = Furniture.objects.create(user=self.user, name="Desk")
+        # a learned card: the next good review schedules it round(6 * 2.5) = 15 days ahead
+        self.card = Flashcard.objects.create(
+            user=self.user, furniture=self.furniture, front="f", back="b", furniture_slot_index=0,
+            repetition=2, interval=6, ease_factor=2.5,
+        )
+        # 4 cards due 15 days from now, 1 the day after, none the day before
+        busy = Furniture.objects.create(user=self.user, name="Shelf")
+        for slot in range(4):
+            Flashcard.objects.create(
+                user=self.user, furniture=busy, front="f", back="b", furniture_slot_index=slot,
+                next_review=timezone.now() + timedelta(days=15),
+            )
+        for slot in range(4, 5):
+            Flashcard.objects.create(
+                user=self.user, furniture=busy, front="f", back="b", furniture_slot_index=slot,
+                next_review=timezone.now() + timedelta(days=16),
+            )
+
+    def review(self):
+        response = self.client.post(f"/api/flashcards/{self.card.id}/review/", {"grade": 5}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return Flashcard.objects.get(pk=self.card.pk)
+
+    def test_off_by_default(self):
+        card = self.review()
+        self.assertEqual(card.interval, 15)
+
+    @override_settings(REVIEW_FUZZ=True)
+    def test_moves_to_the_least_loaded_day(self):
+        # card, load, update
+        with self.assertNumQueries(3):
+            self.client.post(f"/api/flashcards/{self.card.id}/review/", {"grade": 5}, format="json")
+        card = Flashcard.objects.get(pk=self.card.pk)
+        self.assertEqual(card.interval, 14)
+        self.assertEqual(timezone.localdate(card.next_review), timezone.localdate() + timedelta(days=14))
+
+    @override_settings(REVIEW_FUZZ=True, ROOT_URLCONF="api.tests.test_async_views")
+    def test_async_review(self):
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        card = self.review()
+        self.assertEqual(card.interval, 14)
+
+    @override_settings(REVIEW_FUZZ=True)
+    def test_batch_reviews_spread(self):
+        cards = [self.card] + [
+            Flashcard.objects.create(
+                user=self.user, furniture=self.furniture, front="f", back="b", furniture_slot_index=slot,
+                repetition=2, interval=6, ease_factor=2.5,
+            )
+            for slot in range(1, 5)
+        ]
+        response = self.client.post("/api/flashcards/reviews/", {"reviews": [
+            {"id": card.id, "grade": 5, "idempotency_key": f"k{card.id}"} for card in cards
+        ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        intervals = sorted(
+            Flashcard.objects.filter(id__in=[card.id for card in cards]).values_list("interval", flat=True)
+        )
+        # days 14 and 16 fill up in turn, day 15 stays at 4
+        self.assertEqual(intervals, [14, 14, 14, 16, 16])
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import UserPalace, Furniture, Flashcard
+
+
+class ReviewSessionTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="session", email="session@example.com", password="password123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        furniture = Furniture.objects.create(user=self.user, palace=self.palace, name="Desk")
+        other_palace = UserPalace.objects.create(user=self.user, name="Other")
+        other_furniture = Furniture.objects.create(user=self.user, palace=other_palace, name="Desk")
+
+        now = timezone.now()
+        # (days late, interval): overdue ratios 2, 0.5, 3, 0.1, 2 (tie, by id), 1
+        schedule = [(2, 1), (3, 6), (6, 2), (1, 10), (4, 2), (5, 5)]
+        self.cards = [
+            Flashcard.objects.create(
+                user=self.user, furniture=furniture, front=f"front {i}", back=f"back {i}",
+                furniture_slot_index=i, interval=interval, next_review=now - timedelta(days=late),
+            )
+            for i, (late, interval) in enumerate(schedule)
+        ]
+        self.expected = [self.cards[i].id for i in (2, 0, 4, 5, 1, 3)]
+
+        # not due, or in another palace
+        Flashcard.objects.create(
+            user=self.user, furniture=furniture, front="later", back="b",
+            furniture_slot_index=7, next_review=now + timedelta(days=1),
+        )
+        Flashcard.objects.create(
+            user=self.user, furniture=other_furniture, front="elsewhere", back="b",
+            furniture_slot_index=0, next_review=now - timedelta(days=30),
+        )
+
+    def start(self, **body):
+        response = self.client.post(f"/api/palaces/{self.palace.id}/review-session/", body, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def review(self, card_id, **body):
+        return self.client.post(f"/api/flashcards/{card_id}/review/", {"grade": 4, **body}, format="json")
+
+    def test_start(self):
+        data = self.start(size=3)
+
+        self.assertEqual(data["due"], 6)
+        self.assertEqual([card["id"] for card in data["flashcards"]], self.expected[:3])
+        self.assertIsInstance(data["session"], str)
+
+    def test_reviews_append_the_next_cards(self):
+        data = self.start(size=2)
+        queue = [card["id"] for card in data["flashcards"]]
+        cursor = data["session"]
+
+        seen = []
+        while queue:
+            card_id = queue.pop(0)
+            seen.append(card_id)
+            response = self.review(card_id, session=cursor)
+            self.assertEqual(response.status_code, 200)
+            cursor = response.data["session"]["cursor"]
+            queue += [card["id"] for card in response.data["session"]["flashcards"]]
+
+        self.assertEqual(seen, self.expected)
+
+        # the session is over, later reviews append nothing
+        response = self.review(self.expected[0], session=cursor, next=5)
+        self.assertEqual(response.data["session"]["flashcards"], [])
+
+    def test_review_without_session(self):
+        response = self.review(self.cards[0].id)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("session", response.data)
+
+    def test_review_query_count(self):
+        cursor = self.start(size=1)["session"]
+
+        # card, update, next card
+        with self.assertNumQueries(3):
+            response = self.review(self.expected[0], session=cursor)
+        self.assertEqual(len(response.data["session"]["flashcards"]), 1)
+
+    def test_invalid_sessions(self):
+        cursor = self.start(size=1)["session"]
+        before = Flashcard.objects.get(pk=self.cards[0].pk).repetition
+
+        self.assertEqual(self.review(self.cards[0].id, session=cursor[:-2] + "xx").status_code, 400)
+        self.assertEqual(self.review(self.cards[0].id, session=cursor, next=500).status_code, 400)
+
+        other = User.objects.create_user(username="other", email="other@example.com", password="password123")
+        card = Flashcard.objects.create(
+            user=other, furniture=Furniture.objects.create(user=other, name="Chair"), front="f", back="b"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.review(card.id, session=cursor).status_code, 400)
+
+        # nothing was applied
+        self.assertEqual(Flashcard.objects.get(pk=self.cards[0].pk).repetition, before)
+
+    def test_other_users_palace(self):
+        other = User.objects.create_user(username="other", email="other@example.com", password="password123")
+        self.client.force_authenticate(other)
+        response = self.client.post(f"/api/palaces/{self.palace.id}/review-session/", {}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(ROOT_URLCONF="api.tests.test_async_views")
+    def test_async_review(self):
+        cursor = self.start(size=1)["session"]
+
+        # the async views authenticate the token themselves
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        response = self.review(self.expected[0], session=cursor, next=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card["id"] for card in response.json()["session"]["flashcards"]], self.expected[1:3])
@@ -1,6 +1,10 @@
+import random
+from unittest import mock
+
 from django.test import TestCase
 from django.utils import timezone
-from api.services.spaced_repetition import apply_sm2
+from api.services import spaced_repetition
+from api.services.spaced_repetition import apply_sm2, apply_sm2_batch
 from datetime import datetime, timedelta
 
 
@@ -83,3 +87,78 @@ class SpacedRepetitionTests(TestCase):
 
         self.assertEqual(result["repetition"], 2)
         self.assertEqual(result["interval"], 6)
+
+
+class SpacedRepetitionBatchTests(TestCase):
+
+    def random_columns(self, size, seed=7):
+        rng = random.Random(seed)
+        return (
+            [rng.randint(0, 12) for _ in range(size)],
+            [rng.randint(1, 400) for _ in range(size)],
+            [rng.uniform(1.3, 3.5) for _ in range(size)],
+            [rng.randint(0, 5) for _ in range(size)],
+        )
+
+    def assertMatchesScalar(self, columns, now):
+        result = apply_sm2_batch(*columns, now=now)
+
+        for i, (repetition, interval, ef, grade) in enumerate(zip(*columns)):
+            card = apply_sm2(
+                {"repetition": repetition, "interval": interval, "ease_factor": ef},
+                grade,
+                now=now,
+            )
+            self.assertEqual(result["repetition"][i], card["repetition"])
+            self.assertEqual(result["interval"][i], card["interval"])
+            # exact float equality on purpose
+            self.assertEqual(result["ease_factor"][i], card["ease_factor"])
+            self.assertEqual(result["next_review"][i].isoformat(), card["next_review"])
+
+    def test_vectorized_batch_matches_scalar(self):
+        self.assertMatchesScalar(self.random_columns(5000), timezone.now())
+
+    def test_vectorized_rounding_ties_match_scalar(self):
+        # interval * 2.5 lands exactly on .5 for odd intervals
+        size = 100
+        columns = ([2] * size, list(range(1, size + 1)), [2.5] * size, [5] * size)
+
+        self.assertMatchesScalar(columns, timezone.now())
+
+    def test_python_fallback_matches_scalar(self):
+        with mock.patch.object(spaced_repetition, "np", None):
+            self.assertMatchesScalar(self.random_columns(500), timezone.now())
+
+    def test_small_batch_matches_scalar(self):
+        self.assertMatchesScalar(self.random_columns(3), timezone.now())
+
+    def test_returns_native_types(self):
+        result = apply_sm2_batch(*self.random_columns(200), now=timezone.now())
+
+        self.assertIsInstance(result["interval"][0], int)
+        self.assertIsInstance(result["repetition"][0], int)
+        self.assertIsInstance(result["ease_factor"][0], float)
+        self.assertIsInstance(result["next_review"][0], datetime)
+
+    def test_clock_is_called_once(self):
+        fixed = timezone.now()
+        clock = mock.Mock(return_value=fixed)
+
+        result = apply_sm2_batch([0, 1], [1, 1], [2.5, 2.5], [4, 4], clock=clock)
+
+        clock.assert_called_once_with()
+        self.assertEqual(result["next_review"], [fixed + timedelta(days=1), fixed + timedelta(days=6)])
+
+    def test_per_row_review_times(self):
+        start = timezone.now()
+        moments = [start, start + timedelta(days=3)]
+
+        result = apply_sm2_batch([0, 0], [1, 1], [2.5, 2.5], [5, 5], now=moments)
+
+        self.assertEqual(result["next_review"], [start + timedelta(days=1), start + timedelta(days=4)])
+
+    def test_empty_batch(self):
+        result = apply_sm2_batch([], [], [], [], now=timezone.now())
+
+        self.assertEqual(result["interval"], [])
+        self.assertEqual(result["next_review"], [])
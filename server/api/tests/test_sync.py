@@ -0,0 +1,151 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from api.models import UserPalace, Furniture, Flashcard, SyncTombstone
+from api.services.sync import prune_tombstones
+
+
+class SyncTests(APITransactionTestCase):
+    """
+    Change tracking follows committed transactions, so every write here has to commit.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="sync", email="sync@example.com", password="password123")
+        self.client.force_authenticate(self.user)
+
+        self.palace = UserPalace.objects.create(user=self.user, name="Palace")
+        self.furniture = Furniture.objects.create(user=self.user, palace=self.palace, name="Desk")
+        self.cards = [
+            Flashcard.objects.create(
+                user=self.user, furniture=self.furniture, front=f"f{i}", back="b", furniture_slot_index=i
+            )
+            for i in range(3)
+        ]
+
+        other = User.objects.create_user(username="other", email="other@example.com", password="password123")
+        other_palace = UserPalace.objects.create(user=other, name="Other")
+        Furniture.objects.create(user=other, palace=other_palace, name="Chair")
+
+    def sync(self, token=None):
+        response = self.client.get("/api/sync/", {"since": token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, data):
+        return {key: [row["id"] for row in data[key]] for key in ("palaces", "furniture", "flashcards")}
+
+    def test_full_then_nothing(self):
+        data = self.sync()
+
+        self.assertTrue(data["reset"])
+        self.assertEqual(self.ids(data), {
+            "palaces": [self.palace.id],
+            "furniture": [self.furniture.id],
+            "flashcards": [card.id for card in self.cards],
+        })
+        # flat rows
+        self.assertNotIn("furniture", data["palaces"][0])
+        self.assertNotIn("flashcards", data["furniture"][0])
+
+        data = self.sync(data["token"])
+        self.assertFalse(data["reset"])
+        self.assertEqual(self.ids(data), {"palaces": [], "furniture": [], "flashcards": []})
+        self.assertEqual(data["deleted"], {"palaces": [], "furniture": [], "flashcards": []})
+
+    def test_changes_and_deletes(self):
+        token = self.sync()["token"]
+
+        self.client.post(f"/api/flashcards/{self.cards[0].id}/review/", {"grade": 5}, format="json")
+        # writes that bypass save() are tracked too
+        Flashcard.objects.filter(pk=self.cards[1].pk).update(front="edited")
+        deleted_id = self.cards[2].id
+        self.cards[2].delete()
+        added = Furniture.objects.create(user=self.user, palace=self.palace, name="Lamp")
+
+        data = self.sync(token)
+        self.assertEqual(self.ids(data), {
+            "palaces": [],
+            "furniture": [added.id],
+            "flashcards": [self.cards[0].id, self.cards[1].id],
+        })
+        self.assertEqual(data["flashcards"][1]["front"], "edited")
+        self.assertEqual(data["deleted"]["flashcards"], [deleted_id])
+
+        # deleting a palace reports the cascade
+        palace_id = self.palace.id
+        self.palace.delete()
+        data = self.sync(data["token"])
+        self.assertEqual(data["deleted"], {
+            "palaces": [palace_id],
+            "furniture": sorted([self.furniture.id, added.id]),
+            "flashcards": [self.cards[0].id, self.cards[1].id],
+        })
+
+    def test_uncommitted_writes_are_not_skipped(self):
+        # a transaction that is still running when a sync starts commits afterwards
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_current_xact_id()::text::bigint")
+            running = cursor.fetchone()[0] + 1
+        with mock.patch("api.services.sync.current_snapshot", return_value=(running + 1, [running])):
+            token = self.sync()["token"]
+
+        Flashcard.objects.filter(pk=self.cards[0].pk).update(back="late")
+        self.assertIn(self.cards[0].id, self.ids(self.sync(token))["flashcards"])
+
+    def test_indexed_lookups(self):
+        token = self.sync()["token"]
+        with CaptureQueriesContext(connection) as queries:
+            self.sync(token)
+        sql = [query["sql"] for query in queries if "change_xid" in query["sql"]]
+        self.assertEqual(len(sql), 4)
+        flashcards = next(query for query in sql if 'FROM "api_flashcard"' in query)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {flashcards}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            cursor.execute("RESET enable_seqscan")
+        self.assertIn("flashcard_user_change_idx", plan)
+
+    def test_old_and_invalid_tokens(self):
+        token = self.sync()["token"]
+        self.cards[0].delete()
+
+        later = timezone.now() + timedelta(days=31)
+        with mock.patch("api.services.sync.timezone.now", return_value=later):
+            data = self.sync(token)
+        self.assertTrue(data["reset"])
+        self.assertEqual(len(data["flashcards"]), 2)
+
+        response = self.client.get("/api/sync/", {"since": token[:-3] + "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_prune_tombstones(self):
+        token = self.sync()["token"]
+        card_id = self.cards[0].id
+        self.cards[0].delete()
+        self.assertEqual(SyncTombstone.objects.count(), 1)
+
+        self.assertEqual(prune_tombstones(), 0)
+
+        # the last moment the token is accepted, its deletes survive a prune
+        last = timezone.now() + timedelta(days=30, minutes=-1)
+        self.assertEqual(prune_tombstones(now=last), 0)
+        with mock.patch("api.services.sync.timezone.now", return_value=last):
+            data = self.sync(token)
+        self.assertFalse(data["reset"])
+        self.assertEqual(data["deleted"]["flashcards"], [card_id])
+
+        self.assertEqual(prune_tombstones(now=timezone.now() + timedelta(days=31)), 1)
+
+    def test_deleting_a_user(self):
+        palace_id = self.palace.id
+        self.user.delete()
+        self.assertTrue(SyncTombstone.objects.filter(kind="palace", object_id=palace_id).exists())
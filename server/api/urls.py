@@ -1,9 +1,24 @@
+from django.conf import settings
+from django.urls import path, re_path
 from rest_framework.routers import DefaultRouter
-from .views import UserPalaceViewSet, FurnitureViewSet, FlashcardViewSet
+from .views import UserPalaceViewSet, FurnitureViewSet, FlashcardViewSet, SyncView
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'palaces', UserPalaceViewSet, basename='palace')
 router.register(r"furniture", FurnitureViewSet, basename="furniture")
 router.register(r"flashcards", FlashcardViewSet, basename="flashcards")
 
-urlpatterns = router.urls
+# async variants of the hot endpoints, same paths and names as the router's
+async_urlpatterns = [
+    re_path(r"^flashcards/queue/$", async_views.flashcard_queue, name="flashcards-queue"),
+    re_path(r"^flashcards/(?P<pk>[^/.]+)/review/$", async_views.flashcard_review, name="flashcards-review"),
+    re_path(r"^palaces/(?P<pk>[^/.]+)/flashcards/$", async_views.palace_flashcards, name="palace-flashcards"),
+]
+
+urlpatterns = router.urls + [
+    path("sync/", SyncView.as_view(), name="sync"),
+]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
@@ -1,56 +1,45 @@
-import re
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-import json
-from django.db import transaction
-from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+from django.db import IntegrityError, transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.db.models import Count
+from rest_framework import serializers, status
 
 from django.utils import timezone
 
 from .models import UserPalace, PalaceTemplate, Furniture, Flashcard
-from .serializers import UserPalaceSerializer, FurnitureSerializer, FlashcardSerializer
-from .services.spaced_repetition import apply_sm2
-
-CELL_RE = re.compile(r"^(?P<room>\d+?)_(?P<payload>[^_]+?)_$")
-
-def normalize_frontend_cell(cell: str, *, user, palace):
-    if cell is None:
-        return None
-
-    if not isinstance(cell, str):
-        return None
-
-    s = cell.strip()
-
-    # tiles like "1_" "0_" "2_"
-    if re.fullmatch(r"\d+_", s):
-        return s
-
-    m = CELL_RE.match(s)
-    if not m:
-        return None
-
-    room = m.group("room")
-    payload = m.group("payload")
-
-    # already "room_<id>_"
-    if payload.isdigit():
-        return f"{room}_{payload}_"
-
-    # "room_<name>_" -> create furniture and return "room_<newId>_"
-    furniture = Furniture.objects.create(
-        user=user,
-        palace=palace,        
-        name=payload,
-        description="",
-    )
-    return f"{room}_{furniture.id}_"
-
-
-
-class UserPalaceViewSet(viewsets.ModelViewSet):
+from .serializers import (
+    UserPalaceSerializer, UserPalaceSummarySerializer, FurnitureSerializer, FlashcardSerializer,
+    ReviewBatchSerializer, PalaceCellsSerializer, ReviewSessionSerializer, ForecastSerializer,
+)
+from .services.spaced_repetition import apply_sm2_batch
+from .services.palace_matrix import normalize_palace_matrix, normalize_cells, set_cells_expression
+from .services.reviews import apply_review_batch, UnknownFlashcards, SCHEDULING_FIELDS
+from .services.due_summary import summarize_due
+from .services.review_load import forecast, spread_reviews
+from .services.review_session import (
+    InvalidSession, start_session, next_batch, dump_session, session_queryset, continuation,
+)
+from .services.palace_archive import (
+    export_archive, aexport_archive, read_archive, import_archive, ArchiveError,
+)
+from .services.deck_import import import_deck, DeckImportError
+from .services.sync import changes, InvalidSyncToken
+from .pagination import KeysetPagination
+from .parsers import PalaceArchiveParser, DeckFileParser
+from .conditional import ConditionalMixin
+from .fieldsets import SparseFieldsetViewMixin, prefetch_lookups
+from .fast_serializers import fast_serializer, ordered_prefetch
+from .instrumentation import timed
+from . import palace_cache
+
+
+class UserPalaceViewSet(SparseFieldsetViewMixin, ConditionalMixin, viewsets.ModelViewSet):
     """
     GET /palaces/
         - Returns a list of all palaces.
@@ -64,21 +53,140 @@ class UserPalaceViewSet(viewsets.ModelViewSet):
     PUT /palaces/<id>/
         - Updates an existing palace
 
+    PATCH /palaces/<id>/cells/
+        - Updates single cells of the palace matrix
+
+    GET /palaces/due-summary/
+        - Due / new / total flashcard counts per palace and furniture
+
+    POST /palaces/<id>/review-session/
+        - Starts a review session: the first due cards and a session cursor
+
+    GET /palaces/<id>/export/
+        - Streams the palace as a gzip compressed archive
+
+    POST /palaces/import/
+        - Creates a palace from an archive
+
+    POST /palaces/<id>/deck/
+        - Imports a CSV / TSV deck into the palace furniture
+
     DELETE /palaces/<id>/
         - Deletes a palace.
+
+    Reads accept ?fields= / ?expand= (see api.fieldsets), list and detail also
+    ?summary=true: id, name and furniture / flashcard counts, nothing nested.
+
+    Reads carry ETag / Last-Modified (304 on If-None-Match), writes honour If-Match.
+    Rendered palaces are served from palace_cache (X-Cache: HIT / MISS on detail).
     """
     serializer_class = UserPalaceSerializer
     permission_classes = [IsAuthenticated]
+    etag_related = ("furniture", "furniture__flashcards")
+
+    def is_summary(self):
+        return (
+            self.action in ("list", "retrieve")
+            and self.request.query_params.get("summary", "false").lower() == "true"
+        )
+
+    def is_sparse(self):
+        return self.is_summary() or self.get_field_tree() is not None
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return UserPalaceSummarySerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         # return only palaces that belong to the logged-in user
         user = self.request.user
-        return UserPalace.objects.filter(user=user).order_by("created_at", "id")
+        qs = UserPalace.objects.filter(user=user).order_by("created_at", "id")
+
+        if self.is_summary():
+            # counts come from the same query, nothing is prefetched
+            return qs.annotate(
+                furniture_count=Count("furniture", distinct=True),
+                flashcard_count=Count("furniture__flashcards"),
+            )
+
+        # load nested furniture + flashcards in a fixed number of queries,
+        # only the relations the requested fields need
+        if self.action in ("list", "retrieve"):
+            qs = qs.prefetch_related(*ordered_prefetch(UserPalace, *self.get_prefetch_lookups(["furniture__flashcards"])))
+        elif self.action == "furniture":
+            tree = self.get_field_tree(FurnitureSerializer)
+            lookups = ["flashcards"] if tree is None else prefetch_lookups(tree)
+            qs = qs.prefetch_related(
+                *ordered_prefetch(UserPalace, "furniture", *("furniture__" + lookup for lookup in lookups))
+            )
+        return qs
 
     def perform_create(self, serializer):
         # always set user to request.user
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        if self.is_sparse():
+            # partial representations are not cached
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_queryset()
+        return self.conditional(
+            queryset,
+            lambda: Response(self.cached_representations(queryset)),
+            related=self.etag_related,
+            scope="list",
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.is_sparse():
+            return super().retrieve(request, *args, **kwargs)
+
+        def respond():
+            palace_id = self.lookup_value()
+            # the ETag aggregate over etag_related already holds the palace version
+            state = self.resource_state
+            versions = {}
+            if state["count"]:
+                versions[palace_id] = palace_cache.version(
+                    state["count_0"], state["count_1"], state["last"], state["last_0"], state["last_1"]
+                )
+            cached = palace_cache.get_many(request.user.id, versions)
+            if cached:
+                response = Response(cached[palace_id])
+                response["X-Cache"] = "HIT"
+                return response
+
+            data = self.get_serializer(self.get_object()).data
+            if versions:
+                palace_cache.set_many(request.user.id, {palace_id: data}, versions)
+            response = Response(data)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return self.conditional(self.object_queryset(), respond, related=self.etag_related, scope="object")
+
+    def cached_representations(self, queryset):
+        """
+        Serialized palaces of queryset in order, rendering only the ones missing from the cache.
+        """
+        user_id = self.request.user.id
+        versions = palace_cache.versions(queryset)
+        ids = [palace_id for palace_id, _ in versions]
+        versions = dict(versions)
+        cached = palace_cache.get_many(user_id, versions)
+
+        missing = [palace_id for palace_id in ids if palace_id not in cached]
+        if missing:
+            with timed("serialize"):
+                rows = self.fast_serializer().from_queryset(queryset.filter(id__in=missing))
+            fresh = {data["id"]: data for data in rows}
+            palace_cache.set_many(user_id, fresh, versions)
+            cached.update(fresh)
+
+        return [cached[palace_id] for palace_id in ids]
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -93,19 +201,13 @@ class UserPalaceViewSet(viewsets.ModelViewSet):
             )
 
             if matrix is not None:
-                for r, row in enumerate(matrix):
-                    for c, cell in enumerate(row):
-                        matrix[r][c] = normalize_frontend_cell(
-                            cell,
-                            user=request.user,
-                            palace=palace
-                        )
-
-            if matrix is not None:
-                palace.palace_matrix = json.dumps(matrix)
+                normalize_palace_matrix(matrix, user=request.user, palace=palace)
+                palace.palace_matrix = matrix
                 palace.save(update_fields=["palace_matrix"])
 
 
+        # reload with nested data prefetched
+        palace = UserPalace.objects.prefetch_related(*ordered_prefetch(UserPalace, "furniture__flashcards")).get(pk=palace.pk)
         output = self.get_serializer(palace)
         return Response(output.data, status=status.HTTP_201_CREATED)
 
@@ -128,39 +230,210 @@ class UserPalaceViewSet(viewsets.ModelViewSet):
 
 
             if matrix is not None:
-                for r, row in enumerate(matrix):
-                    for c, cell in enumerate(row):
-                        matrix[r][c] = normalize_frontend_cell(
-                            cell,
-                            user=request.user,
-                            palace=palace
-                        )
-
-                palace.palace_matrix = json.dumps(matrix)
+                normalize_palace_matrix(matrix, user=request.user, palace=palace)
+                palace.palace_matrix = matrix
 
 
             palace.save()
 
+        # reload with nested data prefetched
+        palace = UserPalace.objects.prefetch_related(*ordered_prefetch(UserPalace, "furniture__flashcards")).get(pk=palace.pk)
         output = self.get_serializer(palace)
         return Response(output.data, status=status.HTTP_200_OK)
 
 
 
 
+    @action(detail=True, methods=["patch"], url_path="cells")
+    def cells(self, request, pk=None):
+        """
+        PATCH /palaces/<id>/cells/
+        Body: {"cells": [{"row": 0, "col": 1, "value": "1_chairWood_"}, ...]}
+
+        Applies the edits with jsonb_set in a single UPDATE, only the edited
+        cells are normalized (new furniture is created for "room_<name>_").
+        Returns the normalized cells.
+        """
+        palace = self.get_object()
+
+        serializer = PalaceCellsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        edits = serializer.validated_data["cells"]
+
+        matrix = palace.palace_matrix
+        if not isinstance(matrix, list):
+            return Response({"error": "palace has no palace_matrix"}, status=status.HTTP_400_BAD_REQUEST)
+
+        for edit in edits:
+            row, col = edit["row"], edit["col"]
+            if row >= len(matrix) or not isinstance(matrix[row], list) or col >= len(matrix[row]):
+                return Response(
+                    {"error": f"cell ({row}, {col}) is outside the palace_matrix"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        with transaction.atomic():
+            values = normalize_cells(
+                [edit["value"] for edit in edits],
+                user=request.user,
+                palace=palace
+            )
+            applied = [(edit["row"], edit["col"], value) for edit, value in zip(edits, values)]
+
+            updated_at = timezone.now()
+            UserPalace.objects.filter(pk=palace.pk).update(
+                palace_matrix=set_cells_expression(applied),
+                updated_at=updated_at,
+            )
+
+        return Response({
+            "cells": [{"row": row, "col": col, "value": value} for row, col, value in applied],
+            "updated_at": updated_at,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="due-summary")
+    def due_summary(self, request):
+        """
+        GET /palaces/due-summary/
+
+        Counts for "N cards due" badges of every palace in one grouped query
+        (see summarize_due). Not conditional: cards become due as
+        time passes, without any row changing.
+        """
+        return Response(summarize_due(request.user), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["post"], url_path="review-session")
+    def review_session(self, request, pk=None):
+        """
+        POST /palaces/<id>/review-session/
+        Body (optional): {"size": 20}
+
+        Starts a review session over the cards of the palace due now, most
+        overdue relative to their interval first (see services.review_session).
+        Returns the first size cards, the number of cards due and the session cursor.
+        Reviews sent with the cursor (POST /flashcards/<id>/review/
+        {"grade": 4, "session": "<cursor>"}) answer with the next card to
+        append, so the list is never downloaded again during the session.
+        """
+        palace = self.get_object()
+
+        serializer = ReviewSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        session = start_session(request.user, palace)
+        due = session_queryset(request.user, session).count()
+        cards, session = next_batch(request.user, session, serializer.validated_data["size"])
+
+        return Response({
+            "session": dump_session(session),
+            "due": due,
+            "flashcards": FlashcardSerializer(cards, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"])
+    def export(self, request, pk=None):
+        """
+        GET /palaces/<id>/export/
+
+        Streams matrix, furniture and flashcards (with their scheduling state)
+        as gzip compressed NDJSON (see services.palace_archive). Rows are read
+        and compressed chunk by chunk, so memory stays flat for huge palaces.
+        Under ASGI that takes an async iterator, Django would buffer a sync one.
+        """
+        palace = self.get_object()
+
+        chunks = aexport_archive(palace) if isinstance(request._request, ASGIRequest) else export_archive(palace)
+        response = StreamingHttpResponse(chunks, content_type="application/gzip")
+        response["Content-Disposition"] = f'attachment; filename="palace-{palace.id}.ndjson.gz"'
+        return response
+
+    @action(
+        detail=False, methods=["post"], url_path="import",
+        parser_classes=[PalaceArchiveParser, MultiPartParser],
+    )
+    def import_palace(self, request):
+        """
+        POST /palaces/import/
+        Body: the archive (Content-Type: application/gzip),
+              or multipart/form-data with the archive in the "archive" field
+
+        Rebuilds the palace with bulk inserts, furniture ids inside the matrix
+        cells are remapped to the new furniture. Returns the new palace.
+        """
+        archive = request.data.get("archive")
+        if archive is None:
+            return Response({"error": "archive is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            palace = import_archive(read_archive(archive), user=request.user)
+        except ArchiveError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response(
+                {"error": "archive has two flashcards in the same furniture slot"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        palace = UserPalace.objects.prefetch_related(*ordered_prefetch(UserPalace, "furniture__flashcards")).get(pk=palace.pk)
+        return Response(UserPalaceSerializer(palace).data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=True, methods=["post"], url_path="deck",
+        parser_classes=[DeckFileParser, MultiPartParser],
+    )
+    def deck(self, request, pk=None):
+        """
+        POST /palaces/<id>/deck/?delimiter=comma|tab
+        Body: the file (Content-Type: text/csv or text/tab-separated-values),
+              or multipart/form-data with the file in the "file" field
+
+        Columns: furniture, front, back, optional icon_name and description.
+        Cards fill free slots (0–8) of the furniture with that name, new
+        furniture is created as needed (see services.deck_import).
+        All rows are imported in one transaction, or none on error
+        (409 when a concurrent import took the same slots).
+        """
+        palace = self.get_object()
+
+        upload = request.data.get("file")
+        if upload is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        delimiter = {"comma": ",", "tab": "\t"}.get(request.query_params.get("delimiter"))
+        if delimiter is None and request.content_type.startswith("text/tab-separated-values"):
+            delimiter = "\t"
+
+        try:
+            counts = import_deck(upload, user=request.user, palace=palace, delimiter=delimiter)
+        except DeckImportError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            # a concurrent import filled a slot this one picked, nothing was imported
+            return Response(
+                {"error": "furniture slots were taken by a concurrent import, resend the file"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(counts, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=["get"])
     def furniture(self, request, pk=None):
         """
         GET /palaces/<id>/furniture/
         Returns furniture only if the palace belongs to the logged-in user
         """
-        palace = self.get_object()
+        def respond():
+            palace = self.get_object()
 
-        # SECURITY CHECK
-        if palace.user != request.user:
-            return Response({"error": "Not allowed"}, status=403)
+            # SECURITY CHECK
+            if palace.user_id != request.user.id:
+                return Response({"error": "Not allowed"}, status=403)
+
+            # nested data is already prefetched by get_queryset
+            items = palace.furniture.all()
+            return Response(self.sparse_serializer(FurnitureSerializer, items, many=True).data)
 
-        items = palace.furniture.all()
-        return Response(FurnitureSerializer(items, many=True).data)
+        return self.conditional(self.object_queryset(), respond, related=self.etag_related, scope="furniture")
     
     @action(detail=True, methods=["get"], url_path="flashcards")
     def flashcards(self, request, pk=None):
@@ -169,6 +442,7 @@ class UserPalaceViewSet(viewsets.ModelViewSet):
 
         Returns all user's flashcards from given palace.
         If onlyInReview=true -> returns only cards due for review (next_review <= now).
+        Paginated with ?page_size= / ?cursor= (see KeysetPagination).
         """
         palace = self.get_object()
 
@@ -185,10 +459,15 @@ class UserPalaceViewSet(viewsets.ModelViewSet):
 
         qs = qs.order_by("next_review", "id")
 
-        return Response(FlashcardSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+        return self.conditional(
+            qs,
+            lambda: self.fast_list(qs, FlashcardSerializer, paginator=KeysetPagination()),
+            scope="flashcards",
+            digest_ids=only_in_review,
+        )
 
 
-class FurnitureViewSet(viewsets.ModelViewSet):
+class FurnitureViewSet(SparseFieldsetViewMixin, ConditionalMixin, viewsets.ModelViewSet):
     """
     GET /furniture/
         - Returns a list of all furniture.
@@ -210,14 +489,29 @@ class FurnitureViewSet(viewsets.ModelViewSet):
 
     POST /furniture/<id>/add_flashcard/
         - Creates a new flashcard for this furniture.
+
+    Reads accept ?fields= / ?expand= (see api.fieldsets).
+    Reads carry ETag / Last-Modified (304 on If-None-Match), writes honour If-Match.
     """
     
     serializer_class = FurnitureSerializer
     permission_classes = [IsAuthenticated]
+    etag_related = ("flashcards",)
 
     def get_queryset(self):
         # Return only furniture owned by the logged-in user
-        return Furniture.objects.filter(user=self.request.user)
+        qs = Furniture.objects.filter(user=self.request.user)
+
+        # load nested flashcards in one extra query, unless the requested fields leave them out
+        if self.action in ("list", "retrieve"):
+            qs = qs.prefetch_related(*ordered_prefetch(Furniture, *self.get_prefetch_lookups(["flashcards"])))
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(
+            queryset, lambda: self.fast_list(queryset), related=self.etag_related, scope="list"
+        )
 
     def perform_create(self, serializer):
         furniture = self.get_object()   # furnitureId z URL
@@ -227,7 +521,24 @@ class FurnitureViewSet(viewsets.ModelViewSet):
         )
 
 
-    @action(detail=True, methods=["post"], url_path="flashcards")
+    @action(detail=True, methods=["get"])
+    def flashcards(self, request, pk=None):
+        """
+        GET /furniture/<id>/flashcards/
+        Returns all flashcards associated with this specific furniture.
+        """
+        furniture = self.get_object()  # This checks user permission automatically via get_queryset
+
+        # Fetch flashcards linked to this furniture
+        cards = Flashcard.objects.filter(furniture=furniture)
+
+        return self.conditional(
+            cards,
+            lambda: self.fast_list(cards, FlashcardSerializer),
+            scope="flashcards"
+        )
+
+    @flashcards.mapping.post
     def add_flashcard(self, request, pk=None):
         """
         POST /furniture/<id>/flashcard/
@@ -236,7 +547,7 @@ class FurnitureViewSet(viewsets.ModelViewSet):
         furniture = self.get_object()
 
         # SECURITY CHECK
-        if furniture.user != request.user:
+        if furniture.user_id != request.user.id:
             return Response({"error": "Not allowed"}, status=403)
 
         serializer = FlashcardSerializer(data=request.data)
@@ -249,22 +560,9 @@ class FurnitureViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=400)
 
-    @action(detail=True, methods=["get"])
-    def flashcards(self, request, pk=None):
-        """
-        GET /furniture/<id>/flashcards/
-        Returns all flashcards associated with this specific furniture.
-        """
-        furniture = self.get_object()  # This checks user permission automatically via get_queryset
-
-        # Fetch flashcards linked to this furniture
-        cards = Flashcard.objects.filter(furniture=furniture)
-
-        return Response(FlashcardSerializer(cards, many=True).data)
-
 
 
-class FlashcardViewSet(viewsets.ModelViewSet):
+class FlashcardViewSet(SparseFieldsetViewMixin, ConditionalMixin, viewsets.ModelViewSet):
     """
     GET /flashcards/
         - Returns all flashcards.
@@ -280,15 +578,30 @@ class FlashcardViewSet(viewsets.ModelViewSet):
 
     DELETE /flashcards/<id>/
         - Deletes a flashcard.
+
+    POST /flashcards/<id>/review/
+        - Grades a single flashcard.
+
+    POST /flashcards/reviews/
+        - Grades many flashcards in one transaction (offline sessions).
+
+    List endpoints are paginated with ?page_size= / ?cursor= (see KeysetPagination).
+    Reads accept ?fields= (see api.fieldsets).
+    Reads carry ETag / Last-Modified (304 on If-None-Match), writes honour If-Match.
     """
     serializer_class = FlashcardSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         # Return only flashcards owned by the authenticated user,
         # ordered by next scheduled review (earliest first)   
         return Flashcard.objects.filter(user=self.request.user).order_by("next_review", "id")
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(queryset, lambda: self.fast_list(queryset), scope="list")
+
 
     def perform_create(self, serializer):
         # Automatically assign user to flashcard
@@ -300,11 +613,14 @@ class FlashcardViewSet(viewsets.ModelViewSet):
         """
         POST /flashcards/<id>/review/
         Body: {"grade": 0–5}
+        Optional: "session": "<cursor>" (see UserPalaceViewSet.review_session),
+        "next": 0–100 cards to append (default 1). The response then carries
+        "session": {"cursor": "<next cursor>", "flashcards": [...]}.
         """
         card = self.get_object()
         
         # USER FILTER ENFORCEMENT
-        if card.user != request.user:
+        if card.user_id != request.user.id:
             return Response({"error": "Not allowed"}, status=403)
             
         # Validate input
@@ -320,31 +636,61 @@ class FlashcardViewSet(viewsets.ModelViewSet):
         if not (0 <= grade <= 5):
             return Response({"error": "grade must be between 0 and 5"}, status=400)
 
-        # Prepare card data for SM2
-        card_data = {
-            "id": card.id,
-            "interval": card.interval,
-            "ease_factor": card.ease_factor,
-            "repetition": card.repetition,
-            "next_review": card.next_review,
-        }
-
-        updated = apply_sm2(card_data, grade)
+        try:
+            session, size = continuation(request.data, request.user)
+        except InvalidSession as exc:
+            return Response({"error": str(exc)}, status=400)
 
-        from datetime import datetime
-        iso_value = updated["next_review"]
-        next_review_dt = datetime.fromisoformat(iso_value.replace("Z", "+00:00"))
+        updated = spread_reviews(request.user, [card.id], apply_sm2_batch(
+            [card.repetition], [card.interval], [card.ease_factor], [grade]
+        ))
 
         # Save updated values
-        card.interval = updated["interval"]
-        card.ease_factor = updated["ease_factor"]
-        card.repetition = updated["repetition"]
-        card.next_review = next_review_dt
-        card.save()
-
-        return Response({
+        card.repetition = updated["repetition"][0]
+        card.interval = updated["interval"][0]
+        card.ease_factor = updated["ease_factor"][0]
+        card.next_review = updated["next_review"][0]
+        card.last_reviewed_at = timezone.now()
+        card.save(update_fields=SCHEDULING_FIELDS)
+
+        data = {
             "message": "Review updated successfully",
             "flashcard": FlashcardSerializer(card).data
+        }
+        if session is not None:
+            cards, session = next_batch(request.user, session, size)
+            data["session"] = {
+                "cursor": dump_session(session),
+                "flashcards": FlashcardSerializer(cards, many=True).data,
+            }
+        return Response(data, status=200)
+
+    @action(detail=False, methods=["post"], url_path="reviews")
+    def review_batch(self, request):
+        """
+        POST /flashcards/reviews/
+        Body: {"reviews": [{"id": 1, "grade": 0–5, "reviewed_at": "<iso>", "idempotency_key": "..."}, ...]}
+
+        Applies all reviews in one transaction with a single bulk write.
+        Entries with an already recorded idempotency key are reported as duplicates
+        and not applied again. Returns the scheduling state of every referenced card.
+        """
+        serializer = ReviewBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            results, cards = apply_review_batch(request.user, serializer.validated_data["reviews"])
+        except UnknownFlashcards as exc:
+            return Response({"error": "Flashcards not found", "ids": exc.ids}, status=404)
+        except IntegrityError:
+            return Response(
+                {"error": "idempotency keys are being used by a concurrent batch, resend it"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            "results": results,
+            "flashcards": FlashcardSerializer(cards, many=True).data,
         }, status=200)
 
     @action(detail=False, methods=["get"])
@@ -364,4 +710,61 @@ class FlashcardViewSet(viewsets.ModelViewSet):
 
         due_cards = cards.filter(next_review__lte=now).order_by("next_review", "id")
 
-        return Response(FlashcardSerializer(due_cards, many=True).data)
+        return self.conditional(
+            due_cards, lambda: self.fast_list(due_cards), scope="queue", digest_ids=True
+        )
+
+    @action(detail=False, methods=["get"])
+    def forecast(self, request):
+        """
+        GET /flashcards/forecast/
+        Optional: ?days=30 (1–365)
+
+        Cards due per day from today on, from one grouped query
+        (see services.review_load.forecast). Today includes the overdue cards.
+        """
+        serializer = ForecastSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(forecast(request.user, serializer.validated_data["days"]), status=200)
+
+
+class SyncView(APIView):
+    """
+    GET /sync/
+        - Everything: {"token", "reset": true, "palaces", "furniture", "flashcards", "deleted"}
+
+    GET /sync/?since=<token>
+        - Only the palaces, furniture and flashcards changed since the sync that
+          returned token, and the ids deleted since ("deleted": {"palaces": [...],
+          "furniture": [...], "flashcards": [...]}). Keep the new token for the next sync.
+          "reset": true means the token was too old, the response has everything
+          and the client replaces its copy.
+
+    Rows are flat (palaces without furniture, furniture without flashcards).
+    See services.sync.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_classes = {
+        "palaces": UserPalaceSerializer,
+        "furniture": FurnitureSerializer,
+        "flashcards": FlashcardSerializer,
+    }
+
+    def get(self, request):
+        try:
+            result = changes(request.user, request.query_params.get("since"))
+        except InvalidSyncToken as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {"token": result["token"], "reset": result["reset"]}
+        with timed("serialize"):
+            for key, queryset in result["changed"].items():
+                serializer_class = self.serializer_classes[key]
+                # plain fields only, nested lists are synced as rows of their own
+                tree = {
+                    name: None for name, field in serializer_class().fields.items()
+                    if not isinstance(field, serializers.BaseSerializer)
+                }
+                data[key] = fast_serializer(serializer_class, tree).from_queryset(queryset)
+        data["deleted"] = result["deleted"]
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,219 @@
+"""
+Throughput of the hot endpoints: threaded gunicorn (WSGI, today's setup)
+against uvicorn (ASGI) with the async views (ASYNC_VIEWS=True).
+
+Both servers run as subprocesses on a scratch test database, one worker each,
+and are loaded by the same number of concurrent keep-alive clients.
+--db-latency-ms puts a TCP / unix socket proxy in front of Postgres that
+delays every packet, to mimic a remote database behind a slow network.
+
+    python -m benchmarks.async_throughput --concurrency 64 --duration 10 --db-latency-ms 20
+    python -m benchmarks.async_throughput --servers asgi --endpoints queue
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.common import SERVERS, scratch_database, setup_django, start_server
+
+
+def endpoints(palace_id, card_ids):
+    cards = iter(card_ids * 1000)
+    return {
+        "queue": lambda: ("GET", "/api/flashcards/queue/?page_size=100", None),
+        "palace-flashcards": lambda: ("GET", f"/api/palaces/{palace_id}/flashcards/?onlyInReview=true&page_size=100", None),
+        "review": lambda: ("POST", f"/api/flashcards/{next(cards)}/review/", json.dumps({"grade": 4})),
+    }
+
+
+def load(user_count, cards_per_user):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+    from api.models import UserPalace, Furniture, Flashcard
+
+    user = User.objects.create_user(username="throughput", password="!")
+    palace = UserPalace.objects.create(user=user, name="Palace")
+    furniture = Furniture.objects.bulk_create(
+        Furniture(user=user, palace=palace, name=f"item{i}") for i in range(-(-cards_per_user // 9))
+    )
+    Flashcard.objects.bulk_create(
+        Flashcard(
+            user=user, furniture=furniture[i // 9], front=f"front {i}", back="back",
+            furniture_slot_index=i % 9,
+        )
+        for i in range(cards_per_user)
+    )
+    # other users' rows, so the queries do not scan a single-user table
+    for n in range(user_count - 1):
+        other = User.objects.create_user(username=f"throughput{n}", password="!")
+        other_palace = UserPalace.objects.create(user=other, name="Palace")
+        other_furniture = Furniture.objects.create(user=other, palace=other_palace, name="item")
+        Flashcard.objects.bulk_create(
+            Flashcard(user=other, furniture=other_furniture, front="f", back="b", furniture_slot_index=i)
+            for i in range(9)
+        )
+
+    card_ids = list(Flashcard.objects.filter(user=user).values_list("id", flat=True))
+    return str(AccessToken.for_user(user)), palace.id, card_ids
+
+
+class LatencyProxy:
+    """
+    Forwards connections to Postgres, delaying each chunk by delay seconds
+    in each direction (one round trip costs 2 * delay).
+    """
+
+    def __init__(self, host, port, delay):
+        self.upstream_host, self.upstream_port, self.delay = host, int(port or 5432), delay
+        self.unix = bool(host) and host.startswith("/")
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+
+    async def pipe(self, reader, writer):
+        try:
+            while chunk := await reader.read(65536):
+                await asyncio.sleep(self.delay)
+                writer.write(chunk)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, client_reader, client_writer):
+        if self.unix:
+            path = os.path.join(self.upstream_host, f".s.PGSQL.{self.upstream_port}")
+            server_reader, server_writer = await asyncio.open_unix_connection(path)
+        else:
+            server_reader, server_writer = await asyncio.open_connection(
+                self.upstream_host or "localhost", self.upstream_port
+            )
+        await asyncio.gather(
+            self.pipe(client_reader, server_writer),
+            self.pipe(server_reader, client_writer),
+        )
+
+    async def serve(self):
+        if self.unix:
+            # libpq connects to <dir>/.s.PGSQL.<port>
+            self.host, self.port = tempfile.mkdtemp(prefix="pgproxy"), self.upstream_port
+            path = os.path.join(self.host, f".s.PGSQL.{self.port}")
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+            self.host, self.port = "127.0.0.1", server.sockets[0].getsockname()[1]
+        self.ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.loop.run_until_complete, args=(self.serve(),), daemon=True).start()
+        self.ready.wait()
+        return self.host, self.port
+
+
+def run_load(port, token, make_request, concurrency, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        mine, failed = [], 0
+        while time.monotonic() < stop_at:
+            method, path, body = make_request()
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                ok = False
+            if ok:
+                mine.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float("nan")
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "errors": errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--endpoints", nargs="+", choices=["queue", "palace-flashcards", "review"],
+                        default=["queue", "palace-flashcards", "review"])
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per endpoint")
+    parser.add_argument("--cards", type=int, default=900, help="flashcards of the benchmark user")
+    parser.add_argument("--users", type=int, default=100, help="users in the database")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="added one-way delay to Postgres")
+    parser.add_argument("--keepdb", action="store_true", help="reuse the scratch test database")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.db import connection
+
+    with scratch_database(keepdb=args.keepdb):
+        User.objects.filter(username__startswith="throughput").delete()
+        token, palace_id, card_ids = load(args.users, args.cards)
+        db = dict(connection.settings_dict)
+        connection.close()
+
+        if args.db_latency_ms:
+            db["HOST"], db["PORT"] = LatencyProxy(db["HOST"], db["PORT"], args.db_latency_ms / 2000).start()
+
+        requests = endpoints(palace_id, card_ids)
+        results = {}
+        for name in args.servers:
+            process, port = start_server(name, db, token)
+            try:
+                for endpoint in args.endpoints:
+                    results[name, endpoint] = run_load(port, token, requests[endpoint], args.concurrency, args.duration)
+                    r = results[name, endpoint]
+                    print(f"{name:5} {endpoint:18} {r['rps']:8.1f} req/s  p50 {r['p50']:7.1f} ms  "
+                          f"p95 {r['p95']:7.1f} ms  errors {r['errors']}")
+            finally:
+                process.terminate()
+                process.wait()
+
+    if len(args.servers) == 2:
+        print("\n=== asgi / wsgi throughput ===")
+        for endpoint in args.endpoints:
+            ratio = results["asgi", endpoint]["rps"] / max(results["wsgi", endpoint]["rps"], 1e-9)
+            print(f"{endpoint:18} x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
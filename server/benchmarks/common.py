@@ -0,0 +1,96 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks never touch the configured database: they run inside a throwaway
+test database created by Django's test runner (``test_<DB_NAME>``).
+"""
+
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    "wsgi": {
+        "command": [
+            "gunicorn", "--bind", "127.0.0.1:{port}", "--workers", "1", "--threads", "8",
+            "--timeout", "0", "memory_palace.wsgi:application",
+        ],
+        "env": {"ASYNC_VIEWS": "False"},
+    },
+    "asgi": {
+        "command": [
+            "uvicorn", "--host", "127.0.0.1", "--port", "{port}", "--workers", "1",
+            "--no-access-log", "--log-level", "warning", "memory_palace.asgi:application",
+        ],
+        "env": {"ASYNC_VIEWS": "True", "SERVER": "asgi"},
+    },
+}
+
+
+def setup_django(settings_module="memory_palace.settings"):
+    if str(SERVER_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVER_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def scratch_database(keepdb=False, verbosity=0):
+    """
+    Create (or reuse with keepdb=True) the test database for the duration of the block.
+    """
+    from django.test.utils import setup_databases, teardown_databases
+
+    old_config = setup_databases(verbosity=verbosity, interactive=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity, keepdb=keepdb)
+
+
+@contextmanager
+def stopwatch(label, out=sys.stdout):
+    start = time.perf_counter()
+    yield
+    out.write(f"{label}: {time.perf_counter() - start:.2f}s\n")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(name, db, token):
+    """
+    Run the SERVERS[name] server on database settings db, returns (process, port)
+    once it answers an authenticated request.
+    """
+    port = free_port()
+    config = SERVERS[name]
+    env = {**os.environ, **config["env"], "DB_NAME": db["NAME"], "DB_HOST": str(db["HOST"] or ""), "DB_PORT": str(db["PORT"] or "")}
+    process = subprocess.Popen(
+        [part.format(port=port) for part in config["command"]],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=sys.stderr,
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/flashcards/queue/?page_size=1", headers={"Authorization": f"Bearer {token}"})
+            if conn.getresponse().status == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{name} server did not come up")
@@ -0,0 +1,152 @@
+"""
+Query plans and timings for the due-card hot path at production scale.
+
+Loads a synthetic library straight into a scratch test database with
+INSERT ... SELECT generate_series (10M flashcards take a few minutes),
+then prints EXPLAIN (ANALYZE, BUFFERS) and median timings for the
+queue / palace flashcards queries, with and without the composite indexes.
+
+    python -m benchmarks.due_queue_plans --rows 10000000 --users 1000
+    python -m benchmarks.due_queue_plans --rows 100000 --keepdb --no-compare
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.common import scratch_database, setup_django, stopwatch
+
+DUE_INDEXES = ("flashcard_user_due_idx", "flashcard_furniture_due_idx")
+
+
+def load(cursor, rows, users):
+    furniture_per_user = max(1, -(-rows // (users * 9)))
+
+    cursor.execute(
+        """
+        INSERT INTO auth_user (password, is_superuser, username, first_name, last_name,
+                               email, is_staff, is_active, date_joined)
+        SELECT '!', false, 'bench' || g, '', '', 'bench' || g || '@example.com', false, true, now()
+        FROM generate_series(1, %s) g
+        """,
+        [users],
+    )
+    cursor.execute(
+        """
+        INSERT INTO api_userpalace (user_id, name, palace_matrix, created_at, updated_at)
+        SELECT id, 'Palace', NULL, now(), now() FROM auth_user WHERE username LIKE 'bench%%'
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO api_furniture (user_id, palace_id, name, description, created_at, updated_at)
+        SELECT p.user_id, p.id, 'item' || g, '', now(), now()
+        FROM api_userpalace p CROSS JOIN generate_series(1, %s) g
+        """,
+        [furniture_per_user],
+    )
+    # next_review spread over +-30 days, so roughly half the library is due
+    cursor.execute(
+        """
+        INSERT INTO api_flashcard (user_id, furniture_id, front, back, icon_name,
+                                   furniture_slot_index, interval, ease_factor, repetition,
+                                   next_review, created_at, updated_at)
+        SELECT f.user_id, f.id, 'front ' || f.id || '/' || s, 'back', NULL,
+               s, 1, 2.5, 0, now() + (random() * 60 - 30) * interval '1 day', now(), now()
+        FROM api_furniture f CROSS JOIN generate_series(0, 8) s
+        """
+    )
+    # VACUUM sets the visibility map, which index-only scans depend on
+    for table in ("auth_user", "api_userpalace", "api_furniture", "api_flashcard"):
+        cursor.execute(f"VACUUM ANALYZE {table}")
+
+
+def hot_path_queries(user_id, palace_id):
+    from django.db.models import Count
+    from django.utils import timezone
+    from api.models import Flashcard
+
+    now = timezone.now()
+    due = Flashcard.objects.filter(user_id=user_id, next_review__lte=now).order_by("next_review", "id")
+
+    return {
+        "queue page (GET /flashcards/queue/?page_size=100)": due[:100],
+        "queue keyset ids (index-only)": due.values_list("next_review", "id")[:100],
+        "due count (index-only)": due.order_by().values("user_id").annotate(due=Count("id")),
+        "palace flashcards (GET /palaces/<id>/flashcards/?onlyInReview=true)": (
+            Flashcard.objects.filter(
+                user_id=user_id, furniture__palace_id=palace_id, next_review__lte=now
+            ).order_by("next_review", "id")
+        ),
+    }
+
+
+def median_ms(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(queryset._chain())
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def report(title, repeat, verbose):
+    from api.models import UserPalace
+
+    palace = UserPalace.objects.order_by("id")[UserPalace.objects.count() // 2]
+    print(f"\n=== {title} (user {palace.user_id}, palace {palace.id}) ===")
+
+    results = {}
+    for label, queryset in hot_path_queries(palace.user_id, palace.id).items():
+        results[label] = median_ms(queryset, repeat)
+        print(f"\n-- {label}: median {results[label]:.2f} ms")
+        if verbose:
+            print(queryset.explain(analyze=True, buffers=True))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="number of flashcards")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--keepdb", action="store_true", help="reuse the loaded test database")
+    parser.add_argument("--no-compare", action="store_true", help="skip the run without indexes")
+    parser.add_argument("--quiet", action="store_true", help="timings only, no plans")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from api.models import Flashcard
+
+    with scratch_database(keepdb=args.keepdb):
+        with connection.cursor() as cursor:
+            if not Flashcard.objects.exists():
+                with stopwatch(f"loaded {args.rows:,} flashcards"):
+                    load(cursor, args.rows, args.users)
+
+            indexed = report("with composite indexes", args.repeat, not args.quiet)
+
+            if args.no_compare:
+                return
+
+            # compare against the old single-column FK indexes
+            cursor.execute("BEGIN")
+            for name in DUE_INDEXES:
+                cursor.execute(f"DROP INDEX {name}")
+            cursor.execute("CREATE INDEX bench_user_fk ON api_flashcard (user_id)")
+            cursor.execute("CREATE INDEX bench_furniture_fk ON api_flashcard (furniture_id)")
+            cursor.execute("ANALYZE api_flashcard")
+            try:
+                plain = report("with FK indexes only", args.repeat, not args.quiet)
+            finally:
+                cursor.execute("ROLLBACK")
+
+    print("\n=== summary (median ms) ===")
+    print(f"{'composite':>10} {'FK only':>10}")
+    for label in indexed:
+        print(f"{indexed[label]:10.2f} {plain[label]:10.2f}  {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Load test with scripted study sessions against a real server.
+
+Every virtual user owns an account, a palace and a deck of due flashcards
+and loops through the session a client goes through:
+
+    login          POST  /api/auth/login/
+    palaces        GET   /api/palaces/
+    queue          GET   /api/flashcards/queue/?page_size=20
+    review         POST  /api/flashcards/<id>/review/      (--reviews per session)
+    palace-edit    PATCH /api/palaces/<id>/cells/
+
+The server (gunicorn or uvicorn, see benchmarks.common.SERVERS) runs as a
+subprocess on a scratch test database. Grades and edits come from a seeded
+random.Random per virtual user, so runs are reproducible. Queries per request
+are counted in-process with Django's test client, once per step, before the load.
+
+Reviews move cards out of the queue, so a deck of --cards lasts --cards / --reviews
+sessions. Then the virtual user makes its cards due again, directly in the database
+and outside the timed requests. Sessions that still get fewer due cards than
+--reviews are reported as starved.
+
+Reports p50 / p95 / p99 latency, throughput and queries per request per step.
+--save-baseline stores the results in benchmarks/baselines/<name>.json,
+--compare checks a run against one and exits with 1 on a regression
+(p95 worse than --threshold, or more queries per request).
+
+    python -m benchmarks.load --users 32 --duration 30 --save-baseline main
+    python -m benchmarks.load --users 32 --duration 30 --compare main
+
+The schema relies on Postgres (ArrayField, jsonb, concurrent index builds),
+so there is no SQLite mode.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.common import SERVER_DIR, SERVERS, scratch_database, setup_django, start_server
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+PASSWORD = "load-password"
+MATRIX_SIZE = 10
+STEPS = ("login", "palaces", "queue", "review", "palace-edit")
+
+
+def load(users, cards_per_user):
+    """
+    Accounts load0..loadN-1 (plus "load-profile" for the query counts), each
+    with a palace and cards_per_user due flashcards. Returns [(email, palace id)].
+    """
+    from datetime import timedelta
+
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from api.models import UserPalace, Furniture, Flashcard
+
+    # hashing is slow on purpose, all accounts share one hash
+    password = make_password(PASSWORD)
+    names = [f"load{n}" for n in range(users)] + ["load-profile"]
+    accounts = User.objects.bulk_create(
+        User(username=name, email=f"{name}@example.com", password=password) for name in names
+    )
+    palaces = UserPalace.objects.bulk_create(
+        UserPalace(user=user, name="Palace", palace_matrix=[["1_"] * MATRIX_SIZE for _ in range(MATRIX_SIZE)])
+        for user in accounts
+    )
+
+    per_palace = -(-cards_per_user // 9)
+    furniture = Furniture.objects.bulk_create(
+        Furniture(user=palace.user, palace=palace, name=f"item{i}")
+        for palace in palaces for i in range(per_palace)
+    )
+
+    now = timezone.now()
+    cards = []
+    for p, palace in enumerate(palaces):
+        for i in range(cards_per_user):
+            cards.append(Flashcard(
+                user=palace.user, furniture=furniture[p * per_palace + i // 9],
+                front=f"front {i}", back=f"back {i}", furniture_slot_index=i % 9,
+                next_review=now - timedelta(minutes=i),
+            ))
+    Flashcard.objects.bulk_create(cards, batch_size=5000)
+
+    return [(user.email, palace.id) for user, palace in zip(accounts, palaces)]
+
+
+def reset_due(email):
+    """
+    Makes all flashcards of the account due again, the queue then serves them by id.
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+    from api.models import Flashcard
+
+    now = timezone.now()
+    Flashcard.objects.filter(user__email=email).update(next_review=now - timedelta(days=1), updated_at=now)
+
+
+class Session:
+    """
+    One virtual user's scripted session. request(method, path, body) is
+    supplied by the caller and returns (status, parsed JSON body).
+    """
+
+    def __init__(self, email, palace_id, seed, reviews):
+        self.email, self.palace_id, self.reviews = email, palace_id, reviews
+        self.rng = random.Random(seed)
+        self.starved = 0  # sessions whose queue had fewer than reviews cards
+
+    def run(self, request):
+        status, body = request("login", "POST", "/api/auth/login/", {"email": self.email, "password": PASSWORD})
+        if status != 200:
+            return
+        token = body["token"]
+
+        def call(step, method, path, data=None):
+            return request(step, method, path, data, token)
+
+        call("palaces", "GET", "/api/palaces/")
+        status, queue = call("queue", "GET", "/api/flashcards/queue/?page_size=20")
+        cards = queue["results"] if status == 200 else []
+        if status == 200 and len(cards) < self.reviews:
+            self.starved += 1
+        for card in cards[:self.reviews]:
+            call("review", "POST", f"/api/flashcards/{card['id']}/review/", {"grade": self.rng.randint(2, 5)})
+
+        cell = {
+            "row": self.rng.randrange(MATRIX_SIZE),
+            "col": self.rng.randrange(MATRIX_SIZE),
+            "value": self.rng.choice(["0_", "1_", "2_"]),
+        }
+        call("palace-edit", "PATCH", f"/api/palaces/{self.palace_id}/cells/", {"cells": [cell]})
+
+
+def count_queries(email, palace_id, reviews):
+    """
+    Queries per request of every step, from one in-process session.
+    """
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+    setup_test_environment()
+    client = Client()
+    counts = defaultdict(list)
+
+    def request(step, method, path, data=None, token=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = client.generic(
+                method, path, json.dumps(data) if data is not None else "",
+                content_type="application/json", **headers,
+            )
+        counts[step].append(len(queries))
+        return response.status_code, response.json() if response.content else None
+
+    Session(email, palace_id, seed=0, reviews=reviews).run(request)
+    return {step: max(values) for step, values in counts.items()}
+
+
+def run_load(port, accounts, duration, reviews, seed, cards_per_user):
+    from django.db import connection
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    sessions, starved = [0], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(n, email, palace_id):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        mine, failed, completed = defaultdict(list), defaultdict(int), 0
+
+        def request(step, method, path, data=None, token=None):
+            nonlocal conn
+            headers = {"Content-Type": "application/json"}
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=json.dumps(data) if data is not None else None, headers=headers)
+                response = conn.getresponse()
+                content = response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                status, content = 0, b""
+            if status < 400 and status:
+                mine[step].append(time.perf_counter() - start)
+            else:
+                failed[step] += 1
+            return status, json.loads(content) if content and status < 400 and status else None
+
+        session = Session(email, palace_id, seed=seed + n, reviews=reviews)
+        while time.monotonic() < stop_at:
+            if completed and completed % (cards_per_user // reviews) == 0:
+                reset_due(email)
+            session.run(request)
+            completed += 1
+        connection.close()
+
+        with lock:
+            for step in mine:
+                latencies[step].extend(mine[step])
+            for step in failed:
+                errors[step] += failed[step]
+            sessions[0] += completed
+            starved[0] += session.starved
+
+    threads = [
+        threading.Thread(target=client, args=(n, email, palace_id))
+        for n, (email, palace_id) in enumerate(accounts)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    def percentile(values, p):
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else None
+
+    steps = {}
+    for step in STEPS:
+        values = sorted(latencies[step])
+        steps[step] = {
+            "requests": len(values),
+            "rps": len(values) / elapsed,
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+            "errors": errors[step],
+        }
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "rps": total / elapsed, "sessions_per_s": sessions[0] / elapsed,
+        "sessions": sessions[0], "starved_sessions": starved[0], "steps": steps,
+    }
+
+
+def print_results(results):
+    print(f"{'step':12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}")
+    for step in STEPS:
+        r = results["steps"][step]
+        latency = [f"{r[p]:8.1f}" if r[p] is not None else f"{'-':>8}" for p in ("p50", "p95", "p99")]
+        print(f"{step:12} {r['rps']:8.1f} {' '.join(latency)} {r.get('queries', '-'):>8} {r['errors']:>7}")
+    print(f"total {results['rps']:.1f} req/s, {results['sessions_per_s']:.2f} sessions/s")
+    if results.get("starved_sessions"):
+        print(
+            f"warning: {results['starved_sessions']} of {results['sessions']} sessions got fewer than "
+            f"--reviews due cards, the review step is under-loaded"
+        )
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the change against baseline, returns the regressions.
+    """
+    print(f"\n=== against baseline {baseline['name']} ({baseline['commit']}) ===")
+    regressions = []
+    for step in STEPS:
+        now, then = results["steps"][step], baseline["results"]["steps"].get(step)
+        if not then:
+            continue
+        line = f"{step:12}"
+        if now["p95"] is not None and then["p95"]:
+            change = now["p95"] / then["p95"] - 1
+            line += f" p95 {then['p95']:7.1f} -> {now['p95']:7.1f} ms ({change:+.0%})"
+            if change > threshold:
+                regressions.append(f"{step}: p95 {change:+.0%}")
+        if "queries" in now and "queries" in then:
+            line += f"  queries {then['queries']} -> {now['queries']}"
+            if now["queries"] > then["queries"]:
+                regressions.append(f"{step}: {now['queries'] - then['queries']} more queries per request")
+        print(line)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=list(SERVERS), default="wsgi")
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--cards", type=int, default=180, help="due flashcards per user")
+    parser.add_argument("--reviews", type=int, default=10, help="reviews per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 regression (0.2 = 20%%)")
+    parser.add_argument("--keepdb", action="store_true", help="reuse the scratch test database")
+    args = parser.parse_args()
+    if args.cards < args.reviews:
+        parser.error("--cards must be at least --reviews, every session reviews --reviews due cards")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    with scratch_database(keepdb=args.keepdb):
+        User.objects.filter(username__startswith="load").delete()
+        accounts = load(args.users, args.cards)
+        queries = count_queries(*accounts.pop(), reviews=args.reviews)
+
+        token = str(AccessToken.for_user(User.objects.get(username="load0")))
+        db = dict(connection.settings_dict)
+        connection.close()
+
+        process, port = start_server(args.server, db, token)
+        try:
+            results = run_load(port, accounts, args.duration, args.reviews, args.seed, args.cards)
+        finally:
+            process.terminate()
+            process.wait()
+
+    for step, count in queries.items():
+        results["steps"][step]["queries"] = count
+    print_results(results)
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps({
+            "name": args.save_baseline,
+            "commit": git_commit(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("save_baseline", "compare")},
+            "results": results,
+        }, indent=2))
+        print(f"\nbaseline saved to {path}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nregressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+DRF serializers against the fast read path (api.fast_serializers).
+
+Loads flashcards into a scratch test database, then renders the same rows
+through both paths (flashcard list, furniture with nested flashcards, one
+palace with everything nested), checks the JSON is byte-identical and
+prints the median time of each, database time included.
+
+    python -m benchmarks.serializers
+    python -m benchmarks.serializers --rows 1000 10000 --repeat 10
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.common import scratch_database, setup_django
+
+
+def load(rows):
+    from django.contrib.auth.models import User
+    from api.models import UserPalace, Furniture, Flashcard
+
+    user = User.objects.create_user(username=f"serializers{rows}", password="!")
+    palace = UserPalace.objects.create(user=user, name="Palace", palace_matrix=[["1_chairWood_"] * 20] * 20)
+    furniture = Furniture.objects.bulk_create(
+        Furniture(user=user, palace=palace, name=f"item{i}", description="desc") for i in range(-(-rows // 9))
+    )
+    for start in range(0, rows, 5000):
+        Flashcard.objects.bulk_create(
+            Flashcard(
+                user=user, furniture=furniture[i // 9], front=f"front {i}", back=f"back {i}",
+                icon_name="book" if i % 2 else None, furniture_slot_index=i % 9, ease_factor=2.5 - (i % 7) / 10,
+            )
+            for i in range(start, min(rows, start + 5000))
+        )
+    return user, palace
+
+
+def median_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000], help="flashcards per run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (median is reported)")
+    parser.add_argument("--keepdb", action="store_true", help="reuse the scratch test database")
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from api.fast_serializers import fast_serializer, ordered_prefetch
+    from api.models import UserPalace, Furniture, Flashcard
+    from api.serializers import FlashcardSerializer, FurnitureSerializer, UserPalaceSerializer
+
+    renderer = JSONRenderer()
+
+    with scratch_database(keepdb=args.keepdb):
+        for rows in args.rows:
+            user, palace = load(rows)
+            cases = [
+                ("flashcards", FlashcardSerializer, Flashcard.objects.filter(user=user).order_by("next_review", "id")),
+                ("furniture", FurnitureSerializer,
+                 Furniture.objects.filter(user=user).prefetch_related(*ordered_prefetch(Furniture, "flashcards"))),
+                ("palace", UserPalaceSerializer,
+                 UserPalace.objects.filter(pk=palace.pk).prefetch_related(
+                     *ordered_prefetch(UserPalace, "furniture__flashcards")
+                 )),
+            ]
+
+            print(f"\n=== {rows} flashcards ===")
+            for name, serializer_class, queryset in cases:
+                drf, expected = median_time(
+                    lambda: renderer.render(serializer_class(queryset.all(), many=True).data), args.repeat
+                )
+                fast, actual = median_time(
+                    lambda: renderer.render(fast_serializer(serializer_class).from_queryset(queryset.all())),
+                    args.repeat,
+                )
+                if actual != expected:
+                    raise SystemExit(f"{name}: fast path output differs from {serializer_class.__name__}")
+                print(f"{name:11} drf {drf * 1000:9.1f} ms  fast {fast * 1000:9.1f} ms  x{drf / fast:.1f}  "
+                      f"({len(expected) / 1024:.0f} KiB, identical)")
+
+            user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,71 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from whitenoise.middleware import WhiteNoiseMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'memory_palace.settings')
 
+WHITENOISE = 'whitenoise.middleware.WhiteNoiseMiddleware'
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFiles(WhiteNoiseMiddleware):
+    """
+    WhiteNoise in front of the Django ASGI application, for SERVER=asgi
+    (see settings.SERVER): static files are answered here, everything else
+    goes to Django without passing a sync middleware. File access runs on
+    threads, like WhiteNoise's own reads under the WSGI server.
+    """
+
+    def __init__(self, application):
+        super().__init__()
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            path = scope['path'][len(scope.get('root_path', '')):] or '/'
+            if self.autorefresh:
+                static_file = await sync_to_async(self.find_file, thread_sensitive=False)(path)
+            else:
+                static_file = self.files.get(path)
+            if static_file is not None:
+                return await self.serve_asgi(static_file, scope, send)
+        return await self.application(scope, receive, send)
+
+    @staticmethod
+    async def serve_asgi(static_file, scope, send):
+        # the request headers the way WhiteNoise reads them, WSGI environ names
+        headers = {
+            'HTTP_' + name.decode('latin-1').upper().replace('-', '_'): value.decode('latin-1')
+            for name, value in scope['headers']
+        }
+        response = await sync_to_async(static_file.get_response, thread_sensitive=False)(
+            scope['method'], headers
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': int(response.status),
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in response.headers
+            ],
+        })
+        if response.file is None:
+            return await send({'type': 'http.response.body', 'body': b''})
+
+        read = sync_to_async(response.file.read, thread_sensitive=False)
+        try:
+            while chunk := await read(CHUNK_SIZE):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            response.file.close()
+        await send({'type': 'http.response.body', 'body': b''})
+
+
 application = get_asgi_application()
+
+if WHITENOISE not in settings.MIDDLEWARE:
+    application = StaticFiles(application)
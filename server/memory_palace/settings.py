@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -50,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its total time covers the whole stack (see api/instrumentation.py)
+    'api.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -61,6 +64,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# the server the Dockerfile runs: threaded gunicorn (wsgi) or uvicorn (asgi).
+# WhiteNoiseMiddleware is sync only, under uvicorn it would put every request on a
+# thread around the whole stack; memory_palace.asgi serves the static files instead
+SERVER = os.getenv('SERVER', 'wsgi')
+if SERVER == 'asgi':
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'memory_palace.urls'
 
 TEMPLATES = [
@@ -95,9 +105,74 @@ DATABASES = {
         'OPTIONS': {
                     'sslmode': 'require',
                 },
+        # with the pool: connections are checked (SELECT 1) when taken from it
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# per-process psycopg connection pool, requests reuse connections instead of
+# opening one (TCP + TLS handshake) each. max_size should cover the server's
+# threads (gunicorn runs 8, see Dockerfile), under uvicorn the requests in flight,
+# each holds a connection until it ends; requests wait up to DB_POOL_TIMEOUT
+# seconds for a free connection. DB_POOL=False opens a connection per request.
+if os.getenv('DB_POOL', 'True') == 'True':
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE') or 2),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE') or (32 if SERVER == 'asgi' else 8)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT') or 10),
+        # seconds, connections are replaced after max_lifetime and closed when idle for max_idle
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME') or 1800),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE') or 600),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# locmem by default, any backend can be plugged in through .env, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND') or 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.getenv('CACHE_LOCATION') or 'memory-palace',
     }
 }
 
+# per-request timings, see api/instrumentation.py
+# (internal timings, so only in development unless turned on)
+SERVER_TIMING = os.getenv('SERVER_TIMING', str(DEBUG)) == 'True'
+# GET /metrics requires "Authorization: Bearer <METRICS_TOKEN>";
+# without a token it is only served with DEBUG
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+# users of authenticated requests, see accounts/authentication.py
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL') or 30)
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE') or 10000)
+
+# rendered palace payloads, see api/palace_cache.py
+PALACE_CACHE_TIMEOUT = int(os.getenv('PALACE_CACHE_TIMEOUT') or 3600)
+
+# GET /api/sync/ reports deletes this long, older tokens get a full reset. Tombstones older than
+# this are deleted by `manage.py prune_sync_tombstones`, run it daily (cron or a scheduled job):
+# a token it still accepts is younger than any tombstone pruned, so no delete is lost
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS') or 30)
+
+# reviews move their next due date to the least loaded nearby day, see api/services/review_load.py;
+# the seed makes the choice reproducible
+REVIEW_FUZZ = os.getenv('REVIEW_FUZZ', 'False') == 'True'
+REVIEW_FUZZ_SEED = os.getenv('REVIEW_FUZZ_SEED') or ''
+
+# async variants of the hot endpoints (api/async_views.py),
+# meant for the ASGI server (SERVER=asgi in the Dockerfile)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# email login (accounts/backends.py), usernames still work for the admin
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -122,8 +197,20 @@ AUTH_PASSWORD_VALIDATORS = [
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES":(
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "accounts.authentication.CachedJWTAuthentication",
+    ),
+    # JSON on orjson (same output as DRF's), MessagePack with Accept / Content-Type: application/msgpack
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.ORJSONRenderer",
+        "api.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.ORJSONParser",
+        "api.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -142,6 +229,10 @@ USE_TZ = True
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# conditional requests (ETag / If-None-Match / If-Match) from browser clients
+CORS_ALLOW_HEADERS = (*default_headers, "if-match", "if-none-match")
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified"]
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 